@@ -1,10 +1,216 @@
+"""AI enhancement of specials.
+
+Specials are enhanced in batches: each request to the model carries up to
+``AI_BATCH_SIZE`` specials of one owner and asks for structured JSON back.
+Batches run in parallel up to ``AI_BATCH_CONCURRENCY``. Each request is billed
+to the owner (see ``app.metering``); when the owner's budget refuses every
+batch, ``metering.BudgetExceeded`` is raised. Every returned item is
+validated before all changes are written with one ``bulk_update``.
+"""
+from __future__ import annotations
+
 import datetime
 import json
-import os
-from dotenv import load_dotenv
-load_dotenv()  # take environment variables
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from app import ai_gateway, metering, scheduler, widget_cache
+from app.models import Special
+
+
+logger = logging.getLogger(__name__)
+
+MODEL = "gpt-4.1-mini"
+FIELDS = ("title", "description", "price", "start_date", "end_date")
+
+ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "price": {"type": "string"},
+        "start_date": {"type": "string"},
+        "end_date": {"type": "string"},
+    },
+    "required": ["id", *FIELDS],
+    "additionalProperties": False,
+}
+RESPONSE_FORMAT = {
+    "format": {
+        "type": "json_schema",
+        "name": "enhanced_specials",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"specials": {"type": "array", "items": ITEM_SCHEMA}},
+            "required": ["specials"],
+            "additionalProperties": False,
+        },
+    }
+}
+
+
+def _prompt(specials: Sequence[Special]) -> str:
+    items = [
+        {
+            "id": str(special.pk),
+            "title": special.title,
+            "description": special.description,
+            "price": str(special.price),
+            "start_date": _isoformat(special.start_date),
+            "end_date": _isoformat(special.end_date),
+        }
+        for special in specials
+    ]
+    return (
+        "Enhance each of the following restaurant specials. Keep every id unchanged and return "
+        "one item per special with keys: id, title, description, price, start_date, end_date. "
+        "Dates are ISO 8601.\n" + json.dumps({"specials": items})
+    )
+
+
+def _isoformat(value: Any) -> str:
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _parse_when(value: Any, current: Any) -> Optional[datetime.datetime]:
+    """Parse an ISO date or datetime; a bare date keeps ``current``'s time of day."""
+    if not isinstance(value, str):
+        return None
+    try:
+        day = parse_date(value)
+        if day is not None:
+            time_of_day = current.timetz() if isinstance(current, datetime.datetime) else datetime.time()
+            parsed = datetime.datetime.combine(day, time_of_day)
+        else:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                return None
+    except ValueError:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _validate(special: Special, item: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the fields of ``item`` that are valid changes to ``special``."""
+    changes: Dict[str, Any] = {}
+    title = item.get("title")
+    if isinstance(title, str) and title.strip():
+        changes["title"] = title.strip()[:Special._meta.get_field("title").max_length]
+    description = item.get("description")
+    if isinstance(description, str) and description.strip():
+        changes["description"] = description.strip()
+    try:
+        price = Decimal(str(item.get("price")).lstrip("$")).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        price = None
+    if price is not None and price.is_finite() and Decimal("0") <= price < Decimal("100000000"):
+        changes["price"] = price
+    start = _parse_when(item.get("start_date"), special.start_date)
+    end = _parse_when(item.get("end_date"), special.end_date)
+    if start and end and start <= end:
+        changes["start_date"] = start
+        changes["end_date"] = end
+    return {
+        field: value for field, value in changes.items() if value != getattr(special, field)
+    }
+
+
+def _request(batch: Sequence[Special]) -> List[Dict[str, Any]]:
+    """Items the model returned for ``batch``; ``BudgetExceeded`` propagates, other failures give none."""
+    try:
+        response = ai_gateway.respond(MODEL, _prompt(batch), tenant=batch[0].user_id, text=RESPONSE_FORMAT)
+        data = json.loads(response.output[0].content[0].text)
+        items = data.get("specials")
+    except metering.BudgetExceeded:
+        raise
+    except Exception:
+        logger.exception("AI enhancement request for %d specials failed", len(batch))
+        return []
+    if not isinstance(items, list):
+        logger.warning("AI enhancement returned no specials list for %d specials", len(batch))
+        return []
+    return [item for item in items if isinstance(item, dict)]
+
+
+def _attempt(batch: Sequence[Special]) -> Tuple[List[Dict[str, Any]], Optional[metering.BudgetExceeded]]:
+    try:
+        return _request(batch), None
+    except metering.BudgetExceeded as e:
+        logger.warning("Skipped AI enhancement of %d specials: %s", len(batch), e)
+        return [], e
+
+
+def _attempt_in_thread(batch: Sequence[Special]) -> Tuple[List[Dict[str, Any]], Optional[metering.BudgetExceeded]]:
+    try:
+        return _attempt(batch)
+    finally:
+        connection.close()
+
+
+def enhance_specials(specials: Sequence[Special], batch_size: Optional[int] = None) -> List[Special]:
+    """Enhance ``specials`` in as few model round trips as possible.
+
+    Returns the specials that changed; their new values are saved with a
+    single ``bulk_update``. Batches refused by the budget are skipped, and
+    ``metering.BudgetExceeded`` is raised if all of them were.
+    """
+    specials = list(specials)
+    if not specials or not ai_gateway.is_configured():
+        return []
+    batch_size = batch_size or getattr(settings, "AI_BATCH_SIZE", 20)
+    by_owner: Dict[Any, List[Special]] = {}
+    for special in specials:
+        by_owner.setdefault(special.user_id, []).append(special)
+    batches = [
+        owned[i:i + batch_size] for owned in by_owner.values() for i in range(0, len(owned), batch_size)
+    ]
+    workers = min(len(batches), getattr(settings, "AI_BATCH_CONCURRENCY", 4))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_attempt_in_thread, batches))
+    else:
+        outcomes = [_attempt(batch) for batch in batches]
+    refused = [error for _, error in outcomes if error is not None]
+    if len(refused) == len(batches):
+        raise refused[0]
+    results = [items for items, _ in outcomes]
+
+    by_id = {str(special.pk): special for special in specials}
+    changed: Dict[str, Special] = {}
+    fields = set()
+    for item in (item for items in results for item in items):
+        special = by_id.get(str(item.get("id")))
+        if special is None:
+            continue
+        changes = _validate(special, item)
+        for field, value in changes.items():
+            setattr(special, field, value)
+        if changes:
+            changed[str(special.pk)] = special
+            fields.update(changes)
+    if changed:
+        now = timezone.now()
+        for special in changed.values():
+            special.updated_at = now
+        Special.objects.bulk_update(list(changed.values()), sorted(fields) + ["updated_at"], batch_size=batch_size)
+        widget_cache.invalidate_many({special.user_id for special in changed.values()})
+        if fields & {"start_date", "end_date"}:
+            # bulk_update sends no signals, so wake the schedulers here.
+            scheduler.rearm()
+    logger.info("AI enhanced %d of %d specials in %d requests", len(changed), len(specials), len(batches))
+    return list(changed.values())
 
-from openai import OpenAI
 
 def enhance_special_content(special):
     """Use OpenAI to enhance textual content for a Special.
@@ -12,40 +218,5 @@ def enhance_special_content(special):
     Sends the current title, description, price, start_date, and end_date
     to the OpenAI API and updates the instance with any returned values.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or OpenAI is None:
-        return special
-    client = OpenAI(api_key=api_key)
-    prompt = (
-        "Enhance the following restaurant special. "
-        "Return JSON with keys: title, description, price, start_date, end_date.\n"
-        f"Title: {special.title}\n"
-        f"Description: {special.description}\n"
-        f"Price: {special.price}\n"
-        f"Start Date: {special.start_date}\n"
-        f"End Date: {special.end_date}"
-    )
-    response = client.responses.create(
-        model="gpt-4.1-mini",
-        input=prompt,
-        text={"format": {"type": "json_object"}}
-    )
-    print("OpenAI response:", response )
-    try:
-        content = response.output[0].content[0].text
-        print(content)
-        data = json.loads(content)
-    except Exception:
-        return special
-    for field in ["title", "description", "price", "start_date", "end_date"]:
-        value = data.get(field)
-        if not value:
-            continue
-        if field in {"start_date", "end_date"}:
-            try:
-                value = datetime.date.fromisoformat(value)
-            except Exception:
-                continue
-        setattr(special, field, value)
-    special.save()
+    enhance_specials([special])
     return special
@@ -0,0 +1,152 @@
+"""Single entry point for calls to the OpenAI API.
+
+Every AI feature goes through this module. It keeps one lazily created client
+per process, so HTTP keep-alive connections are reused across requests and
+``OPENAI_API_KEY`` is read once. It also applies the ``AI_TIMEOUT``,
+``AI_MAX_RETRIES`` and ``AI_MAX_CONNECTIONS`` settings. ``AI_CLIENT_FACTORY``
+is the dotted path of the client class. It defaults to ``openai.OpenAI``;
+point it at a local stand-in (such as the bundled ``openai`` stub) to run
+without the API.
+
+Every call is metered by ``app.metering``. Pass ``tenant`` (the ``User`` the
+call is made for) to bill it to that user and enforce their tier's budget;
+``metering.BudgetExceeded`` is raised before anything is sent when it is used
+up or cannot hold the call's estimated tokens.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from app import metering
+
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_lock = threading.Lock()
+
+
+class NotConfigured(Exception):
+    """No API key is configured, so AI calls cannot be made."""
+
+
+def api_key() -> Optional[str]:
+    return getattr(settings, "OPENAI_API_KEY", None) or os.getenv("OPENAI_API_KEY")
+
+
+def is_configured() -> bool:
+    return bool(api_key())
+
+
+def _http_client():
+    try:
+        import httpx
+    except ModuleNotFoundError:
+        return None
+    max_connections = getattr(settings, "AI_MAX_CONNECTIONS", 20)
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=getattr(settings, "AI_TIMEOUT", 30),
+    )
+
+
+def get_client():
+    """Return the process-wide AI client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                key = api_key()
+                if not key:
+                    raise NotConfigured("OpenAI API key not configured")
+                factory = import_string(getattr(settings, "AI_CLIENT_FACTORY", "openai.OpenAI"))
+                options = {
+                    "api_key": key,
+                    "timeout": getattr(settings, "AI_TIMEOUT", 30),
+                    "max_retries": getattr(settings, "AI_MAX_RETRIES", 2),
+                }
+                http_client = _http_client()
+                if http_client is not None:
+                    options["http_client"] = http_client
+                _client = factory(**options)
+                logger.info("Created AI client %s", factory.__name__)
+    return _client
+
+
+def reset_client() -> None:
+    """Drop the shared client; the next call creates a new one (e.g. after settings change)."""
+    global _client
+    with _lock:
+        _client = None
+
+
+def _metered(tenant: Any, model: str, tokens: int, call: Callable[[], Any]) -> Any:
+    reservation = metering.reserve(tenant, model, tokens)
+    started = time.monotonic()
+    try:
+        response = call()
+    except Exception:
+        metering.record(tenant, model, metering.Usage(), time.monotonic() - started, ok=False, reservation=reservation)
+        raise
+    metering.record(tenant, model, metering.usage_of(response), time.monotonic() - started, reservation=reservation)
+    return response
+
+
+def _metered_stream(
+    tenant: Any, model: str, stream: Iterator[Any], started: float, reservation: Optional[int]
+) -> Iterator[Any]:
+    usage = metering.Usage()
+    ok = False
+    try:
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = metering.usage_of(chunk)
+            yield chunk
+        ok = True
+    finally:
+        metering.record(tenant, model, usage, time.monotonic() - started, ok=ok, reservation=reservation)
+
+
+def chat(model: str, messages: Any, tenant: Any = None, **params: Any) -> Any:
+    """Run a chat completion and return the response."""
+    return _metered(
+        tenant,
+        model,
+        metering.estimate_tokens(messages, params),
+        lambda: get_client().chat.completions.create(model=model, messages=messages, **params),
+    )
+
+
+def stream_chat(model: str, messages: Any, tenant: Any = None, **params: Any) -> Iterator[Any]:
+    """Run a streaming chat completion; the last chunk carries the token usage.
+
+    The budget is reserved when the stream is opened; the call is recorded
+    once it has been consumed, with latency up to the last chunk.
+    """
+    reservation = metering.reserve(tenant, model, metering.estimate_tokens(messages, params))
+    started = time.monotonic()
+    try:
+        stream = get_client().chat.completions.create(
+            model=model, messages=messages, stream=True, stream_options={"include_usage": True}, **params
+        )
+    except Exception:
+        metering.record(tenant, model, metering.Usage(), time.monotonic() - started, ok=False, reservation=reservation)
+        raise
+    return _metered_stream(tenant, model, stream, started, reservation)
+
+
+def respond(model: str, input: Any, tenant: Any = None, **params: Any) -> Any:
+    """Run a Responses API request and return the response."""
+    return _metered(
+        tenant,
+        model,
+        metering.estimate_tokens(input, params),
+        lambda: get_client().responses.create(model=model, input=input, **params),
+    )
@@ -0,0 +1,117 @@
+"""Hourly and daily rollups of widget engagement counters."""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from app.models import DailySpecialStats, HourlySpecialStats, Special
+
+
+METRICS = ("views", "clicks", "shares", "email_signups", "signup_opens")
+
+GRANULARITIES = {
+    "hour": (HourlySpecialStats, timedelta(hours=1)),
+    "day": (DailySpecialStats, timedelta(days=1)),
+}
+
+
+def hour_bucket(dt: datetime) -> datetime:
+    """Truncate ``dt`` to the start of its hour."""
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(dt: datetime) -> datetime:
+    """Truncate ``dt`` to the start of its (UTC) day."""
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _truncate(dt: datetime, granularity: str) -> datetime:
+    return hour_bucket(dt) if granularity == "hour" else day_bucket(dt)
+
+
+def fold(increments: Mapping[Tuple[str, datetime], Mapping[str, int]]) -> None:
+    """Add counter increments into the hourly and daily rollup tables.
+
+    ``increments`` maps ``(special_id, hour)`` to per-metric counts. Missing
+    rollup rows are created first, then every row is bumped with a single
+    ``F()`` update so concurrent folds never lose counts. Call inside a
+    transaction.
+    """
+    if not increments:
+        return
+    special_ids = {special_id for special_id, _ in increments}
+    owners = {
+        str(pk): user_id
+        for pk, user_id in Special.objects.filter(pk__in=special_ids).values_list("pk", "user_id")
+    }
+    for granularity, (model, _) in GRANULARITIES.items():
+        merged: Dict[Tuple[str, datetime], Counter] = defaultdict(Counter)
+        for (special_id, when), counts in increments.items():
+            if special_id in owners:
+                merged[(special_id, _truncate(when, granularity))].update(counts)
+        if not merged:
+            continue
+        model.objects.bulk_create(
+            [
+                model(special_id=special_id, user_id=owners[special_id], bucket=bucket)
+                for special_id, bucket in merged
+            ],
+            ignore_conflicts=True,
+        )
+        for (special_id, bucket), counts in merged.items():
+            model.objects.filter(special_id=special_id, bucket=bucket).update(
+                **{metric: F(metric) + amount for metric, amount in counts.items() if amount}
+            )
+
+
+def _series(queryset, start: datetime, end: datetime, granularity: str) -> List[Dict]:
+    _, step = GRANULARITIES[granularity]
+    rows = {
+        row["bucket"]: row
+        for row in queryset.filter(bucket__gte=_truncate(start, granularity), bucket__lt=end)
+        .values("bucket")
+        .annotate(**{metric: Sum(metric) for metric in METRICS})
+        .order_by("bucket")
+    }
+    series = []
+    bucket = _truncate(start, granularity)
+    while bucket < end:
+        row = rows.get(bucket)
+        series.append({"bucket": bucket, **{metric: (row[metric] if row else 0) for metric in METRICS}})
+        bucket += step
+    return series
+
+
+def special_series(special, start: datetime, end: datetime, granularity: str = "day") -> List[Dict]:
+    """Return one row per bucket in ``[start, end)`` for a single special.
+
+    Buckets without activity are filled with zeros.
+    """
+    model, _ = GRANULARITIES[granularity]
+    return _series(model.objects.filter(special=special), start, end, granularity)
+
+
+def restaurant_series(user, start: datetime, end: datetime, granularity: str = "day") -> List[Dict]:
+    """Return one row per bucket in ``[start, end)`` summed over all of a restaurant's specials."""
+    model, _ = GRANULARITIES[granularity]
+    return _series(model.objects.filter(user=user), start, end, granularity)
+
+
+def recent_days(user, days: int = 14, now: Optional[datetime] = None) -> List[Dict]:
+    """Return the daily series for the last ``days`` days, including today."""
+    now = now or timezone.now()
+    end = day_bucket(now) + timedelta(days=1)
+    return restaurant_series(user, end - timedelta(days=days), end)
+
+
+def chart(series: List[Dict], metric: str) -> List[Dict]:
+    """Return ``series`` as bars for one metric, with heights as a percent of the peak."""
+    peak = max((row[metric] for row in series), default=0) or 1
+    return [
+        {"bucket": row["bucket"], "value": row[metric], "height": round(100 * row[metric] / peak)}
+        for row in series
+    ]
@@ -5,4 +5,5 @@ class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
 
-    
+    def ready(self):
+        from app import signals  # noqa: F401
@@ -0,0 +1,96 @@
+"""Content-hashed static bundles built at deploy time.
+
+``python manage.py build_bundles`` copies every entry of ``BUNDLES`` to
+``BUNDLE_DIR`` under a name containing a hash of its contents and records the
+mapping in a manifest. Hashed copies left from earlier builds are removed.
+``collectstatic`` then ships the hashed copies, which never change and can be
+cached forever.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+
+BUNDLES = [
+    "widget/appertivo-widget.js",
+]
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+
+
+def _bundle_dir() -> Path:
+    return Path(getattr(settings, "BUNDLE_DIR", Path(settings.BASE_DIR) / "static" / "dist"))
+
+
+def _static_prefix(out_dir: Path) -> str:
+    """Return the static path of ``out_dir`` relative to the static dir holding it."""
+    for static_dir in getattr(settings, "STATICFILES_DIRS", []):
+        try:
+            return out_dir.relative_to(Path(static_dir)).as_posix()
+        except ValueError:
+            continue
+    return out_dir.name
+
+
+def hashed_name(name: str, content: bytes) -> str:
+    """Return ``name`` with a content hash inserted before the extension."""
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    path = Path(name)
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+
+
+def _prune(out_dir: Path, name: str, keep: str) -> None:
+    """Delete hashed copies of ``name`` other than ``keep`` from earlier builds."""
+    path = Path(name)
+    pattern = re.compile(rf"^{re.escape(path.stem)}\.[0-9a-f]{{{HASH_LENGTH}}}{re.escape(path.suffix)}$")
+    directory = (out_dir / name).parent
+    for old in directory.glob(f"{path.stem}.*{path.suffix}"):
+        if pattern.match(old.name) and old.name != Path(keep).name:
+            old.unlink()
+
+
+def build() -> Dict[str, str]:
+    """Write hashed copies of all bundles, drop stale ones and return the manifest."""
+    out_dir = _bundle_dir()
+    prefix = _static_prefix(out_dir)
+    manifest: Dict[str, str] = {}
+    for name in BUNDLES:
+        source = finders.find(name)
+        if source is None:
+            raise FileNotFoundError(f"Static bundle source not found: {name}")
+        content = Path(source).read_bytes()
+        target = hashed_name(name, content)
+        (out_dir / target).parent.mkdir(parents=True, exist_ok=True)
+        (out_dir / target).write_bytes(content)
+        _prune(out_dir, name, target)
+        manifest[name] = f"{prefix}/{target}"
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    load_manifest.cache_clear()
+    return manifest
+
+
+@lru_cache(maxsize=1)
+def load_manifest() -> Dict[str, str]:
+    """Return the manifest written by :func:`build`, or an empty mapping."""
+    try:
+        return json.loads((_bundle_dir() / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def bundle_url(name: str) -> str:
+    """Return the static URL of the hashed build of ``name``.
+
+    Falls back to the unhashed source when no build has been made, which is
+    the normal case in development.
+    """
+    return static(load_manifest().get(name, name))
@@ -0,0 +1,249 @@
+"""Resumable, rate-limited notification campaigns.
+
+A campaign walks the restaurant's active subscribers in signup order.
+Each step records the next page of subscribers as ``pending`` recipients and
+moves the campaign cursor past them in one transaction, then sends to the
+pending recipients, marking each one as its send completes.
+
+Only one run sends for a campaign at a time. A run first claims the
+campaign with a conditional update that sets ``claimed_by`` and a lease in
+``claimed_until``. A run that finds a live claim sends nothing and checks
+back when the claim lapses. That covers a duplicate job and a job whose
+lease expired. The owner renews the lease before each page and before each
+send once a third of ``CAMPAIGN_LEASE_SECONDS`` has passed, and stops as
+soon as a renewal fails. A run that dies part way is taken over when its
+lease expires. The takeover resumes with exactly the recipients that were
+not recorded as sent, so at most the single message in flight at the time
+of the crash is repeated.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Callable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from app import emails, jobs, mailer, subscribers
+from app.models import Campaign, CampaignRecipient, EmailSignup
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Allow ``rate`` operations per second with bursts of up to ``capacity``."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            self.sleep(wait)
+
+
+_bucket: Optional[TokenBucket] = None
+
+
+def bucket() -> TokenBucket:
+    """Return this process's send-rate bucket.
+
+    ``CAMPAIGN_SENDS_PER_SECOND`` applies per worker process; divide the
+    provider's limit by the number of ``run_jobs`` workers.
+    """
+    global _bucket
+    rate = getattr(settings, "CAMPAIGN_SENDS_PER_SECOND", 10)
+    if _bucket is None or _bucket.rate != rate:
+        _bucket = TokenBucket(rate)
+    return _bucket
+
+
+def start(special) -> Campaign:
+    """Create a campaign for ``special`` and queue its first run."""
+    campaign = Campaign.objects.create(special=special)
+    jobs.enqueue("app.campaigns.run", campaign_id=campaign.pk)
+    return campaign
+
+
+class _Lease:
+    """A run's claim on a campaign, renewed while it sends."""
+
+    def __init__(self, campaign_id, token: str) -> None:
+        self.campaign_id = campaign_id
+        self.token = token
+        self.seconds = getattr(settings, "CAMPAIGN_LEASE_SECONDS", 300)
+        self.renewed = time.monotonic()
+
+    def _until(self):
+        return timezone.now() + timedelta(seconds=self.seconds)
+
+    def claim(self) -> bool:
+        now = timezone.now()
+        claimed = (
+            Campaign.objects.filter(pk=self.campaign_id, status="sending")
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+            .update(claimed_by=self.token, claimed_until=self._until())
+        )
+        self.renewed = time.monotonic()
+        return bool(claimed)
+
+    def held(self) -> bool:
+        """Return whether this run still owns the campaign, renewing the lease when due."""
+        if time.monotonic() - self.renewed < self.seconds / 3:
+            return True
+        renewed = Campaign.objects.filter(pk=self.campaign_id, claimed_by=self.token).update(
+            claimed_until=self._until()
+        )
+        self.renewed = time.monotonic()
+        if not renewed:
+            logger.warning("Campaign %s: lease lost, stopping this run", self.campaign_id)
+        return bool(renewed)
+
+    def release(self) -> None:
+        Campaign.objects.filter(pk=self.campaign_id, claimed_by=self.token).update(claimed_by="", claimed_until=None)
+
+
+def run(campaign_id) -> None:
+    """Job entry point: send for up to ``CAMPAIGN_SLICE_SECONDS``, then queue a follow-up run.
+
+    Keeping each run shorter than ``JOB_LEASE_SECONDS`` means a healthy run is
+    rarely mistaken for a dead one. If it is, the campaign claim keeps the
+    second run from sending.
+    """
+    lease = _Lease(campaign_id, uuid.uuid4().hex)
+    if not lease.claim():
+        claimed_until = (
+            Campaign.objects.filter(pk=campaign_id, status="sending").values_list("claimed_until", flat=True).first()
+        )
+        if claimed_until:
+            # Check back when the claim lapses, in case its owner died.
+            logger.info("Campaign %s is claimed by another run until %s", campaign_id, claimed_until)
+            jobs.enqueue("app.campaigns.run", run_at=claimed_until + timedelta(seconds=1), campaign_id=campaign_id)
+        return
+    try:
+        campaign = Campaign.objects.select_related("special__user").filter(pk=campaign_id).first()
+        more = campaign is not None and _run_slice(campaign, lease)
+    finally:
+        lease.release()
+    if more:
+        jobs.enqueue("app.campaigns.run", campaign_id=campaign_id)
+
+
+def _run_slice(campaign: Campaign, lease: _Lease) -> bool:
+    """Send until the slice ends; return whether a follow-up run is needed."""
+    page_size = getattr(settings, "CAMPAIGN_PAGE_SIZE", 500)
+    deadline = time.monotonic() + getattr(settings, "CAMPAIGN_SLICE_SECONDS", 60)
+    while time.monotonic() < deadline:
+        if not lease.held():
+            return False
+        pending = list(
+            campaign.recipients.filter(status="pending")
+            .order_by("signup_id")
+            .values_list("pk", "signup_id", "email")[:page_size]
+        )
+        if pending:
+            try:
+                _send(campaign, pending, lease)
+            except mailer.Abort:
+                return False
+        elif not _record_page(campaign, page_size):
+            _finish(campaign)
+            return False
+    return True
+
+
+def _record_page(campaign: Campaign, page_size: int) -> int:
+    """Add the next page of subscribers as pending recipients and advance the cursor."""
+    # Without a position (a new campaign, or one whose cursor predates
+    # cursor_signed_up_at) paging restarts; recipients already recorded are
+    # skipped by the (campaign, signup) constraint.
+    after = (campaign.cursor_signed_up_at, campaign.cursor) if campaign.cursor_signed_up_at else None
+    page = next(subscribers.active_pages(campaign.special.user_id, page_size, after=after), [])
+    if not page:
+        return 0
+    signed_up_at, cursor, _ = page[-1]
+    with transaction.atomic():
+        CampaignRecipient.objects.bulk_create(
+            [CampaignRecipient(campaign=campaign, signup_id=pk, email=email) for _, pk, email in page],
+            ignore_conflicts=True,
+        )
+        Campaign.objects.filter(pk=campaign.pk).update(cursor=cursor, cursor_signed_up_at=signed_up_at)
+    campaign.cursor, campaign.cursor_signed_up_at = cursor, signed_up_at
+    return len(page)
+
+
+def _send(campaign: Campaign, pending: List[Tuple[int, object, str]], lease: Optional[_Lease] = None) -> None:
+    # Subscribers who left since their row was recorded are not mailed.
+    active = set(
+        EmailSignup.objects.filter(pk__in=[signup_id for _, signup_id, _ in pending], is_active=True)
+        .values_list("pk", flat=True)
+    )
+    skipped = [pk for pk, signup_id, _ in pending if signup_id not in active]
+    if skipped:
+        CampaignRecipient.objects.filter(pk__in=skipped).update(status="skipped")
+    pending = [row for row in pending if row[1] in active]
+
+    def messages():
+        rows = iter(pending)
+        for message in emails.build_special_messages(campaign.special, ((s, e) for _, s, e in pending)):
+            message.campaign_recipient_id = next(rows)[0]
+            yield message
+
+    def on_result(message, error):
+        if error is None:
+            CampaignRecipient.objects.filter(pk=message.campaign_recipient_id).update(
+                status="sent", sent_at=timezone.now()
+            )
+        else:
+            CampaignRecipient.objects.filter(pk=message.campaign_recipient_id).update(
+                status="failed", error=str(error)[:1000]
+            )
+
+    def throttle():
+        if lease is not None and not lease.held():
+            raise mailer.Abort(f"campaign {campaign.pk} claimed by another run")
+        bucket().acquire()
+
+    report = mailer.deliver(messages(), throttle=throttle, on_result=on_result)
+    _update_counts(campaign)
+    logger.info("Campaign %s: %d sent, %d failed this step", campaign.pk, report.delivered, report.failed)
+
+
+def _update_counts(campaign: Campaign) -> None:
+    counts = campaign.recipients.aggregate(
+        sent=Count("pk", filter=Q(status="sent")), failed=Count("pk", filter=Q(status="failed"))
+    )
+    Campaign.objects.filter(pk=campaign.pk).update(sent_count=counts["sent"], failed_count=counts["failed"])
+
+
+def _finish(campaign: Campaign) -> None:
+    _update_counts(campaign)
+    Campaign.objects.filter(pk=campaign.pk).update(status="done", finished_at=timezone.now())
+    logger.info("Campaign %s for special %s finished", campaign.pk, campaign.special_id)
@@ -0,0 +1,197 @@
+"""Write-behind buffer for the engagement counters stored on ``Special``.
+
+Buffered increments are also folded into the hourly/daily rollups in
+``app.analytics`` when they are flushed.
+
+The buffer lives in the worker's memory. It is flushed when it holds
+``COUNTER_FLUSH_THRESHOLD`` increments, every ``COUNTER_FLUSH_INTERVAL``
+seconds by a background thread (``COUNTER_BACKGROUND_FLUSH``) and at a clean
+exit. A worker that dies without exiting cleanly (SIGKILL, the OOM killer)
+loses up to one interval of counts; the counters are engagement statistics
+and that loss is accepted in exchange for not writing on every beacon.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app import analytics
+from app.models import Special
+
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("views", "clicks", "shares", "email_signups", "signup_opens")
+
+
+class FlushingBuffer:
+    """Base for in-memory buffers flushed by threshold, by interval and by a background thread.
+
+    Subclasses implement :meth:`pending` and :meth:`flush` and call
+    :meth:`_ensure_started` before buffering.
+    """
+
+    thread_name = "buffer-flush"
+
+    def __init__(
+        self,
+        flush_interval: Optional[float] = None,
+        flush_threshold: Optional[int] = None,
+        background: Optional[bool] = None,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.background = background
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _interval(self) -> float:
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, "COUNTER_FLUSH_INTERVAL", 30)
+
+    def _threshold(self) -> int:
+        if self.flush_threshold is not None:
+            return self.flush_threshold
+        return getattr(settings, "COUNTER_FLUSH_THRESHOLD", 1000)
+
+    def _background(self) -> bool:
+        if self.background is not None:
+            return self.background
+        return getattr(settings, "COUNTER_BACKGROUND_FLUSH", True)
+
+    def _due(self) -> bool:
+        # Called with the lock held.
+        return self._pending >= self._threshold() or time.monotonic() - self._last_flush >= self._interval()
+
+    def _ensure_started(self) -> None:
+        if self._background() and (self._thread is None or not self._thread.is_alive()):
+            self.start()
+
+    def start(self) -> None:
+        """Start the thread that flushes every interval, so an idle worker does not sit on its buffer.
+
+        Started lazily on the first write, which also restarts it in a forked worker.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval()):
+            if not self.pending():
+                continue
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+    def pending(self) -> int:
+        raise NotImplementedError
+
+    def flush(self) -> int:
+        raise NotImplementedError
+
+
+class CounterBuffer(FlushingBuffer):
+    """Collect counter increments in memory and flush them in batches.
+
+    Each flush issues one ``UPDATE ... SET field = field + n`` per special, so
+    flushes from several workers add up instead of overwriting each other and
+    ``updated_at`` is left alone.
+    """
+
+    thread_name = "counter-flush"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._counts: Dict[Tuple[str, datetime], Counter] = defaultdict(Counter)
+
+    def incr(self, special_id, field: str = "views", amount: int = 1) -> None:
+        """Buffer ``amount`` increments of ``field`` for a special."""
+        if field not in FIELDS:
+            raise ValueError(f"Unknown counter field: {field}")
+        self._ensure_started()
+        hour = analytics.hour_bucket(timezone.now())
+        with self._lock:
+            self._counts[(str(special_id), hour)][field] += amount
+            self._pending += amount
+            due = self._due()
+        if due:
+            self.flush()
+
+    def pending(self) -> int:
+        """Return the number of increments waiting to be flushed."""
+        with self._lock:
+            return self._pending
+
+    def flush(self) -> int:
+        """Apply buffered increments to the database and return how many were written."""
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(Counter)
+            total, self._pending = self._pending, 0
+            self._last_flush = time.monotonic()
+        if not counts:
+            return 0
+        totals: Dict[str, Counter] = defaultdict(Counter)
+        for (special_id, _), fields in counts.items():
+            totals[special_id].update(fields)
+        try:
+            with transaction.atomic():
+                for special_id, fields in totals.items():
+                    Special.objects.filter(pk=special_id).update(
+                        **{name: F(name) + amount for name, amount in fields.items()}
+                    )
+                analytics.fold(counts)
+        except Exception:
+            logger.exception("Failed to flush %d counter increments; will retry", total)
+            self._restore(counts, total)
+            return 0
+        logger.debug("Flushed %d counter increments for %d specials", total, len(totals))
+        return total
+
+    def _restore(self, counts: Dict[Tuple[str, datetime], Counter], total: int) -> None:
+        with self._lock:
+            for key, fields in counts.items():
+                self._counts[key].update(fields)
+            self._pending += total
+
+
+buffer = CounterBuffer()
+
+
+def incr(special_id, field: str = "views", amount: int = 1) -> None:
+    """Buffer an increment on the shared process-wide buffer."""
+    buffer.incr(special_id, field, amount)
+
+
+def pending() -> int:
+    """Return the number of increments waiting in the shared buffer."""
+    return buffer.pending()
+
+
+def flush() -> int:
+    """Flush the shared buffer."""
+    return buffer.flush()
+
+
+atexit.register(flush)
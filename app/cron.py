@@ -1,18 +1,66 @@
 """Scheduled tasks for the application."""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
 from app.models import Special
-from app import distribution
+from app import distribution, widget_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExpiryReport:
+    """Outcome of one :func:`unpublish_expired_specials` run."""
+
+    expired: int = 0
+    removals_queued: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
 
 
-def unpublish_expired_specials() -> None:
+def unpublish_expired_specials(chunk_size: Optional[int] = None, now: Optional[datetime] = None) -> ExpiryReport:
     """Unpublish specials whose end date has passed.
 
-    For each special that is currently active and whose end date is in the past,
-    mark it as expired and trigger removal from any connected distributions.
+    Active specials whose end date is in the past are marked expired a chunk at
+    a time (one locked SELECT and one UPDATE per chunk). Removal from connected
+    distributions is queued in bulk for the job workers, which make the channel
+    calls in parallel (``run_jobs --concurrency``).
     """
-    expired = Special.objects.filter(status="active", end_date__lt=timezone.now())
-    for special in expired:
-        special.status = "expired"
-        special.save(update_fields=["status"])
-        distribution.remove_special_from_distributions(special)
+    started = time.monotonic()
+    chunk_size = chunk_size or getattr(settings, "EXPIRY_CHUNK_SIZE", 500)
+    now = now or timezone.now()
+    report = ExpiryReport()
+    while True:
+        with transaction.atomic():
+            expired = list(
+                Special.objects.select_for_update(skip_locked=True)
+                .filter(status="active", end_date__lt=now)
+                .only("id", "user_id", "google_post_name")
+                .order_by()[:chunk_size]
+            )
+            if not expired:
+                break
+            Special.objects.filter(pk__in=[s.pk for s in expired]).update(status="expired")
+            for special in expired:
+                special.status = "expired"
+            queued = distribution.remove_specials_from_distributions(expired)
+        widget_cache.invalidate_many({s.user_id for s in expired})
+        report.expired += len(expired)
+        report.removals_queued += len(queued)
+        report.chunks += 1
+    report.seconds = time.monotonic() - started
+    logger.info(
+        "Expired %d specials in %d chunks and queued %d channel removals in %.2fs",
+        report.expired, report.chunks, report.removals_queued, report.seconds,
+    )
+    return report
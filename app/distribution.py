@@ -1,14 +1,168 @@
-"""Helpers to remove specials from various distribution platforms."""
+"""Publish specials to, and remove them from, connected distribution channels.
+
+Every (special, connection) pair has a ``Publication`` row. ``publish`` and
+``remove_special_from_distributions`` only record what should happen and queue
+one job per channel, so the owner's request never waits on third-party APIs;
+``run_jobs`` workers make the calls (in parallel with ``--concurrency``) and
+record each channel's outcome on its publication.
+"""
 from __future__ import annotations
 
-from app.models import Connection, Special
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from app import jobs
 from app.integrations import google
+from app.models import Connection, Publication, Special
+
+
+logger = logging.getLogger(__name__)
+
+TASK = "app.distribution.run_publication"
+
+
+class ChannelError(Exception):
+    """A channel refused a publish or removal; the job is not retried."""
+
+
+def _google_publish(special: Special, connection: Connection) -> str:
+    post_name = google.publish_special(special, connection=connection)
+    if not post_name:
+        raise ChannelError("Google did not accept the post")
+    return post_name
+
+
+def _google_remove(special: Special, connection: Connection, external_id: str) -> None:
+    if not google.remove_special(special, connection=connection, post_name=external_id or None):
+        raise ChannelError("Google did not remove the post")
+
+
+# platform -> (publish(special, connection) -> external id, remove(special, connection, external id))
+# Future platforms (POS, delivery apps, etc.) are added here.
+CHANNELS: Dict[str, Tuple[Callable[..., str], Callable[..., None]]] = {
+    "google_business": (_google_publish, _google_remove),
+}
+
+
+def _connections(special: Special):
+    return Connection.objects.filter(user_id=special.user_id, is_connected=True, platform__in=list(CHANNELS))
+
+
+def publish(special: Special) -> List[Publication]:
+    """Queue ``special`` for publishing on every connected channel."""
+    publications = []
+    with transaction.atomic():
+        for connection in _connections(special):
+            publication, _ = Publication.objects.update_or_create(
+                special=special, connection=connection, defaults={"status": "pending", "last_error": ""}
+            )
+            publications.append(publication)
+        jobs.enqueue_many(TASK, [{"publication_id": p.pk, "action": "publish"} for p in publications])
+    return publications
+
+
+def remove_specials_from_distributions(specials: Iterable[Special]) -> List[Publication]:
+    """Queue ``specials`` for removal from every channel they were published to.
+
+    Connections and publications for all of them are loaded up front, so the
+    cost in queries does not grow with the number of specials.
+    """
+    specials = list(specials)
+    if not specials:
+        return []
+    connections: Dict[int, List[Connection]] = defaultdict(list)
+    for connection in Connection.objects.filter(
+        user_id__in={s.user_id for s in specials}, is_connected=True, platform__in=list(CHANNELS)
+    ):
+        connections[connection.user_id].append(connection)
+    existing = {
+        (p.special_id, p.connection_id): p for p in Publication.objects.filter(special__in=specials)
+    }
+    created: List[Publication] = []
+    updated: List[Publication] = []
+    for special in specials:
+        for connection in connections[special.user_id]:
+            publication = existing.get((special.pk, connection.pk))
+            if publication is None:
+                # Published before publications were tracked.
+                if connection.platform == "google_business" and special.google_post_name:
+                    created.append(
+                        Publication(
+                            special=special,
+                            connection=connection,
+                            status="removing",
+                            external_id=special.google_post_name,
+                        )
+                    )
+            elif publication.status not in ("removing", "removed") and (
+                publication.external_id or publication.status == "pending"
+            ):
+                publication.status = "removing"
+                updated.append(publication)
+    with transaction.atomic():
+        Publication.objects.bulk_create(created)
+        if updated:
+            Publication.objects.filter(pk__in=[p.pk for p in updated]).update(
+                status="removing", updated_at=timezone.now()
+            )
+        jobs.enqueue_many(TASK, [{"publication_id": p.pk, "action": "remove"} for p in created + updated])
+    return created + updated
+
+
+def remove_special_from_distributions(special: Special) -> List[Publication]:
+    """Queue ``special`` for removal from every channel it was published to."""
+    return remove_specials_from_distributions([special])
+
+
+def run_publication(publication_id: int, action: str) -> None:
+    """Job task: carry out ``action`` ("publish" or "remove") for one publication."""
+    publication = Publication.objects.select_related("special", "connection").filter(pk=publication_id).first()
+    if publication is None:
+        return
+    publish_to, remove_from = CHANNELS[publication.connection.platform]
+    try:
+        if action == "publish":
+            if publication.status == "pending":
+                external_id = publish_to(publication.special, publication.connection)
+                _published(publication, external_id)
+        elif publication.status == "removing":
+            _remove(publication, remove_from)
+    except ChannelError as exc:
+        logger.warning(
+            "Could not %s special %s on %s: %s", action, publication.special_id, publication.connection.platform, exc
+        )
+        Publication.objects.filter(pk=publication.pk).update(
+            status="failed", last_error=str(exc), updated_at=timezone.now()
+        )
+    except Exception as exc:
+        Publication.objects.filter(pk=publication.pk).update(last_error=repr(exc), updated_at=timezone.now())
+        raise
+
+
+def _published(publication: Publication, external_id: str) -> None:
+    if Publication.objects.filter(pk=publication.pk, status="pending").update(
+        status="published", external_id=external_id, last_error="", updated_at=timezone.now()
+    ):
+        return
+    # A removal was requested while the post was being created.
+    Publication.objects.filter(pk=publication.pk).update(external_id=external_id, updated_at=timezone.now())
+    publication.refresh_from_db()
+    if publication.status == "removed":
+        publication.status = "removing"
+        _remove(publication, CHANNELS[publication.connection.platform][1])
 
 
-def remove_special_from_distributions(special: Special) -> None:
-    """Remove a special from all connected distribution channels."""
-    connections = Connection.objects.filter(user=special.user, is_connected=True)
-    for conn in connections:
-        if conn.platform == "google_business":
-            google.remove_special(special, connection=conn)
-        # Future platforms (POS, delivery apps, etc.) can be handled here.
+def _remove(publication: Publication, remove_from: Callable[..., None]) -> None:
+    if not publication.external_id:
+        # Nothing was posted yet; a publish finishing later sees the removal and undoes itself.
+        if Publication.objects.filter(pk=publication.pk, status="removing", external_id="").update(
+            status="removed", updated_at=timezone.now()
+        ):
+            return
+        publication.refresh_from_db()
+    remove_from(publication.special, publication.connection, publication.external_id)
+    Publication.objects.filter(pk=publication.pk).update(status="removed", last_error="", updated_at=timezone.now())
@@ -1,7 +1,18 @@
-from django.core.mail import send_mail
+import logging
+import re
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, send_mail
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.conf import settings
+from django.utils.html import escape
+
+from app.models import EmailSignup
+
+
+logger = logging.getLogger(__name__)
 
 
 def send_special_published_email(special):
@@ -15,3 +26,98 @@ def send_special_published_email(special):
     })
     subject = f'Your special "{special.title}" is live'
     send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [profile.email])
+
+
+def send_special_notification(special):
+    """Start a notification campaign to every active subscriber of ``special``'s restaurant.
+
+    Returns immediately; ``run_jobs`` delivers it (see ``app.campaigns``).
+    """
+    from app import campaigns  # campaigns builds its messages with this module
+
+    return campaigns.start(special)
+
+
+NOTIFICATION_TEMPLATES = ("emails/special_notification.txt", "emails/special_notification.html")
+# Per-recipient placeholders, filled in after the cached render.
+TOKEN_RE = re.compile(r"%%(\w+)%%")
+UNSUBSCRIBE_SALT = "app.emails.unsubscribe"
+
+
+def _absolute(url):
+    if not url or "://" in url:
+        return url
+    return getattr(settings, "SITE_URL", "https://appertivo.com").rstrip("/") + url
+
+
+def render_special_notification(special):
+    """Return the recipient-independent ``{"subject", "text", "html"}`` for ``special``.
+
+    The result is cached per special and ``updated_at``, so an edit renders
+    fresh copy while every batch of a send shares one render. Bodies still
+    contain ``%%name%%`` placeholders; see :func:`personalize`.
+    """
+    key = f"emails:special:{special.pk}:{special.updated_at.timestamp()}"
+    rendered = cache.get(key)
+    if rendered is not None:
+        return rendered
+    restaurant_name = special.user.profile.restaurant_name if hasattr(special.user, 'profile') else special.user.username
+    context = {
+        "special": special,
+        "restaurant_name": restaurant_name,
+        "image_url": _absolute(special.image.url) if special.image else None,
+        "unsubscribe_url": "%%unsubscribe_url%%",
+    }
+    text_template, html_template = NOTIFICATION_TEMPLATES
+    rendered = {
+        "subject": f"🍽️ New Special at {restaurant_name}: {special.title}",
+        "text": render_to_string(text_template, context).strip() + "\n",
+        "html": render_to_string(html_template, context),
+    }
+    cache.set(key, rendered, getattr(settings, "NOTIFICATION_RENDER_CACHE_TIMEOUT", 24 * 60 * 60))
+    return rendered
+
+
+def compile_template(body):
+    """Split ``body`` into alternating literal text and placeholder names."""
+    return TOKEN_RE.split(body)
+
+
+def personalize(parts, values):
+    """Join compiled ``parts`` with placeholders replaced from ``values``."""
+    out = parts[:]
+    for i in range(1, len(out), 2):
+        out[i] = values.get(out[i], "")
+    return "".join(out)
+
+
+def unsubscribe_url(signup_id):
+    token = signing.dumps(str(signup_id), salt=UNSUBSCRIBE_SALT)
+    return _absolute(reverse("unsubscribe", args=[token]))
+
+
+def signup_from_token(token):
+    """Return the ``EmailSignup`` an unsubscribe token refers to, or ``None``."""
+    try:
+        signup_id = signing.loads(token, salt=UNSUBSCRIBE_SALT)
+    except signing.BadSignature:
+        return None
+    return EmailSignup.objects.filter(pk=signup_id).first()
+
+
+def build_special_messages(special, recipients):
+    """Yield one personalized message per ``(signup_id, email)`` in ``recipients``."""
+    rendered = render_special_notification(special)
+    text_parts = compile_template(rendered["text"])
+    html_parts = compile_template(rendered["html"])
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@appertivo.com")
+    for signup_id, email in recipients:
+        url = unsubscribe_url(signup_id)
+        yield EmailMultiAlternatives(
+            subject=rendered["subject"],
+            body=personalize(text_parts, {"unsubscribe_url": url}),
+            from_email=from_email,
+            to=[email],
+            alternatives=[(personalize(html_parts, {"unsubscribe_url": escape(url)}), "text/html")],
+            headers={"List-Unsubscribe": f"<{url}>", "List-Unsubscribe-Post": "List-Unsubscribe=One-Click"},
+        )
@@ -0,0 +1,64 @@
+"""A small HyperLogLog implementation for approximate distinct counts."""
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Optional, Union
+
+
+DEFAULT_PRECISION = 10  # 1024 one-byte registers, ~3.3% standard error
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch stored as ``2 ** precision`` byte registers."""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None) -> None:
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.m)
+        elif len(registers) != self.m:
+            raise ValueError(f"expected {self.m} registers, got {len(registers)}")
+        else:
+            self.registers = bytearray(registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """Rebuild a sketch from :meth:`to_bytes` output."""
+        data = bytes(data)
+        return cls(data[0], data[1:])
+
+    def to_bytes(self) -> bytes:
+        """Serialize as one precision byte followed by the registers."""
+        return bytes([self.precision]) + bytes(self.registers)
+
+    def add(self, value: Union[str, bytes]) -> None:
+        """Add ``value`` to the sketch."""
+        if isinstance(value, str):
+            value = value.encode()
+        x = int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+        index = x >> (64 - self.precision)
+        w = (x << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = min(65 - w.bit_length(), 65 - self.precision)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Fold ``other`` into this sketch (register-wise maximum)."""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches with different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def is_empty(self) -> bool:
+        return not any(self.registers)
+
+    def count(self) -> int:
+        """Return the estimated number of distinct values added."""
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
@@ -2,14 +2,22 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple, List, Optional
-from datetime import datetime
-from urllib.parse import urlencode
+from typing import Any, Callable, Dict, Tuple, List, Optional
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, urlsplit
 import logging
 import os
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -28,6 +36,126 @@ SCOPES = ["https://www.googleapis.com/auth/business.manage"]
 REDIRECT_URI = "https://appertivo.com/dashboard"  # must match Google console
 
 
+# ------------------------------------------------------------------------------
+# HTTP client
+# ------------------------------------------------------------------------------
+
+class GoogleBusinessClient:
+    """HTTP client shared by every Google call.
+
+    Requests go through one pooled ``requests.Session`` so connections (and
+    their TLS handshakes) are reused. 429 and 5xx responses and connection
+    errors are retried with exponential backoff and jitter, waiting at least
+    as long as ``Retry-After`` asks. POSTs are only retried on 429 and 503,
+    which tell us the request was not processed.
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    UNPROCESSED_STATUSES = frozenset({429, 503})
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        max_retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+        timeout: Optional[float] = None,
+        pool_size: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.max_retries = getattr(settings, "GOOGLE_HTTP_MAX_RETRIES", 3) if max_retries is None else max_retries
+        self.backoff = getattr(settings, "GOOGLE_HTTP_BACKOFF", 0.5) if backoff is None else backoff
+        self.max_backoff = getattr(settings, "GOOGLE_HTTP_MAX_BACKOFF", 30) if max_backoff is None else max_backoff
+        self.timeout = timeout or getattr(settings, "GOOGLE_HTTP_TIMEOUT", 10)
+        self.session = session or self._build_session(pool_size or getattr(settings, "GOOGLE_HTTP_POOL_SIZE", 10))
+        self.sleep = sleep
+
+    @staticmethod
+    def _build_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        # Retries are handled in ``request`` so Retry-After and logging apply.
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request, retrying transient failures; return the final response."""
+        method = method.upper()
+        kwargs.setdefault("timeout", self.timeout)
+        idempotent = method in self.IDEMPOTENT_METHODS
+        path = urlsplit(url).path
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt_started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if not idempotent or attempt >= self.max_retries:
+                    logger.warning("Google %s %s failed after %d attempts: %s", method, path, attempt + 1, exc)
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning("Google %s %s error (%s); retrying in %.2fs", method, path, exc, delay)
+            else:
+                logger.debug(
+                    "Google %s %s -> %s in %.0fms",
+                    method, path, response.status_code, (time.monotonic() - attempt_started) * 1000,
+                )
+                retryable = self.RETRY_STATUSES if idempotent else self.UNPROCESSED_STATUSES
+                if response.status_code not in retryable or attempt >= self.max_retries:
+                    if attempt:
+                        logger.info(
+                            "Google %s %s -> %s after %d attempts in %.0fms",
+                            method, path, response.status_code, attempt + 1, (time.monotonic() - started) * 1000,
+                        )
+                    return response
+                delay = max(self._backoff(attempt), self._retry_after(response))
+                logger.warning("Google %s %s -> %s; retrying in %.2fs", method, path, response.status_code, delay)
+            attempt += 1
+            self.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _retry_after(self, response: requests.Response) -> float:
+        value = (getattr(response, "headers", None) or {}).get("Retry-After")
+        if not value:
+            return 0.0
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(value) - timezone.now()).total_seconds()
+            except (TypeError, ValueError):
+                return 0.0
+        return min(self.max_backoff, max(0.0, seconds))
+
+
+_client: Optional[GoogleBusinessClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GoogleBusinessClient:
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GoogleBusinessClient()
+        return _client
+
+
 # ------------------------------------------------------------------------------
 # OAuth flow
 # ------------------------------------------------------------------------------
@@ -59,13 +187,13 @@ def exchange_code_for_tokens(code: str) -> Dict[str, Any]:
         "grant_type": "authorization_code",
         "redirect_uri": REDIRECT_URI,
     }
-    response = requests.post(TOKEN_ENDPOINT, data=data, timeout=10)
+    response = get_client().post(TOKEN_ENDPOINT, data=data)
     logger.info("Exchanged code for tokens; status=%s", response.status_code)
     return response.json()
 
 
-def refresh_access_token(refresh_token: str) -> Optional[str]:
-    """Use a refresh token to obtain a new access token."""
+def _request_token_refresh(refresh_token: str) -> Optional[Dict[str, Any]]:
+    """Call the token endpoint with ``refresh_token``; return the JSON body or ``None``."""
     data = {
         "client_id": os.getenv("GOOGLE_CLIENT_ID"),
         "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
@@ -73,19 +201,140 @@ def refresh_access_token(refresh_token: str) -> Optional[str]:
         "grant_type": "refresh_token",
     }
     try:
-        response = requests.post(TOKEN_ENDPOINT, data=data, timeout=10)
+        response = get_client().post(TOKEN_ENDPOINT, data=data)
         response.raise_for_status()
         result = response.json()
-        new_token = result.get("access_token")
-        if new_token:
-            logger.info("Successfully refreshed Google access token")
-            return new_token
-        else:
-            logger.error("Failed to refresh token: %s", result)
-            return None
     except Exception as exc:
         logger.exception("Error refreshing Google token: %s", exc)
         return None
+    if not result.get("access_token"):
+        logger.error("Failed to refresh token: %s", result)
+        return None
+    logger.info("Successfully refreshed Google access token")
+    return result
+
+
+def refresh_access_token(refresh_token: str) -> Optional[str]:
+    """Use a refresh token to obtain a new access token."""
+    result = _request_token_refresh(refresh_token)
+    return result["access_token"] if result else None
+
+
+def _expiry(tokens: Dict[str, Any]) -> Optional[float]:
+    expires_in = tokens.get("expires_in")
+    return time.time() + float(expires_in) if expires_in else None
+
+
+def _token_is_fresh(settings_data: Dict[str, Any]) -> bool:
+    expires_at = settings_data.get("token_expires_at")
+    if not settings_data.get("access_token"):
+        return False
+    if expires_at is None:
+        # Connected before expiry was tracked; rely on the 401 retry.
+        return True
+    margin = getattr(settings, "GOOGLE_TOKEN_REFRESH_MARGIN", 120)
+    return expires_at - margin > time.time()
+
+
+def _claim_refresh(connection: Connection) -> bool:
+    """Mark ``connection`` as being refreshed by this worker; ``False`` if another worker holds the mark."""
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "GOOGLE_TOKEN_REFRESH_LEASE", 30))
+    return bool(
+        Connection.objects.filter(pk=connection.pk)
+        .filter(Q(token_refresh_until__isnull=True) | Q(token_refresh_until__lt=now))
+        .update(token_refresh_until=now + lease)
+    )
+
+
+def _await_refresh(connection: Connection, current: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """Wait for another worker's refresh; return ``(claimed, token)``.
+
+    ``token`` is the replacement stored by the other worker. ``claimed`` is
+    set instead when the other worker gave up or its mark expired, so this
+    worker refreshes itself.
+    """
+    deadline = time.monotonic() + getattr(settings, "GOOGLE_TOKEN_REFRESH_WAIT", 10)
+    while time.monotonic() < deadline:
+        time.sleep(0.2)
+        stored = Connection.objects.get(pk=connection.pk).settings or {}
+        if stored.get("access_token") != current:
+            connection.settings = stored
+            return False, stored.get("access_token")
+        if _claim_refresh(connection):
+            return True, None
+    return False, None
+
+
+def get_access_token(connection: Connection, stale_token: Optional[str] = None) -> Optional[str]:
+    """Return a usable access token for ``connection``, refreshing it shortly before expiry.
+
+    Pass ``stale_token`` after a 401 to force a refresh unless another worker
+    already replaced that token. Only one worker refreshes at a time: it
+    claims ``token_refresh_until`` with a conditional UPDATE, and the others
+    wait up to ``GOOGLE_TOKEN_REFRESH_WAIT`` seconds for its token. The
+    refresh request is made outside any transaction; the new token is then
+    stored with a short compare-and-swap that only writes if the stored token
+    is still the one being replaced.
+    """
+    settings_data = connection.settings or {}
+    if stale_token is None and _token_is_fresh(settings_data):
+        return settings_data.get("access_token")
+
+    settings_data = Connection.objects.get(pk=connection.pk).settings or {}
+    current = settings_data.get("access_token")
+    replaced = stale_token is not None and current and current != stale_token
+    if replaced or (stale_token is None and _token_is_fresh(settings_data)):
+        connection.settings = settings_data
+        return current
+
+    if not _claim_refresh(connection):
+        claimed, token = _await_refresh(connection, current)
+        if not claimed:
+            if token is None:
+                logger.warning("Timed out waiting for another worker to refresh Google connection %s", connection.pk)
+                return None if stale_token else current
+            return token
+
+    try:
+        refresh_token = settings_data.get("refresh_token")
+        tokens = _request_token_refresh(refresh_token) if refresh_token else None
+        if not tokens:
+            logger.warning("Could not refresh Google token for connection %s", connection.pk)
+            return None if stale_token else current
+
+        with transaction.atomic():
+            locked = Connection.objects.select_for_update().get(pk=connection.pk)
+            stored = locked.settings or {}
+            if stored.get("access_token") != current:
+                # Another worker refreshed after our mark expired; keep theirs.
+                connection.settings = stored
+                return stored.get("access_token")
+            stored["access_token"] = tokens["access_token"]
+            stored["token_expires_at"] = _expiry(tokens)
+            if tokens.get("refresh_token"):
+                stored["refresh_token"] = tokens["refresh_token"]
+            locked.settings = stored
+            locked.save(update_fields=["settings"])
+        connection.settings = stored
+        return stored["access_token"]
+    finally:
+        Connection.objects.filter(pk=connection.pk).update(token_refresh_until=None)
+
+
+def _authorized(connection: Connection, method: str, url: str, **kwargs: Any) -> Optional[requests.Response]:
+    """Call the API with the connection's token, retrying once with a new token on 401."""
+    token = get_access_token(connection)
+    if not token:
+        return None
+    send = getattr(get_client(), method)
+    response = send(url, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+    if response.status_code == 401:
+        logger.info("Google token rejected for connection %s; refreshing", connection.pk)
+        token = get_access_token(connection, stale_token=token)
+        if token:
+            response = send(url, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+    return response
 
 
 # ------------------------------------------------------------------------------
@@ -102,10 +351,11 @@ BUSINESS_INFO_URL = "https://mybusinessbusinessinformation.googleapis.com/v1"
 def get_accounts_and_locations(access_token: str) -> Tuple[str, str, List[Dict[str, Any]], Dict[str, Any]]:
     """Return account and location details for the authenticated user."""
     headers = {"Authorization": f"Bearer {access_token}"}
+    client = get_client()
 
     try:
         # --- Get Accounts ---
-        resp = requests.get(f"{ACCOUNT_MGMT_URL}/accounts", headers=headers, timeout=10)
+        resp = client.get(f"{ACCOUNT_MGMT_URL}/accounts", headers=headers)
         logger.debug("Accounts API raw response [%s]: %s", resp.status_code, resp.text[:500])
 
         if resp.status_code != 200:
@@ -126,8 +376,7 @@ def get_accounts_and_locations(access_token: str) -> Tuple[str, str, List[Dict[s
         # --- Get Locations ---
         read_mask = "name,title,websiteUri,latlng,profile,metadata"
         loc_url = f"{BUSINESS_INFO_URL}/{account_resource_name}/locations?readMask={read_mask}"
-        print(loc_url)
-        loc_resp = requests.get(loc_url, headers=headers, timeout=10)
+        loc_resp = client.get(loc_url, headers=headers)
         logger.debug("Locations API raw response [%s]: %s", loc_resp.status_code, loc_resp.text[:500])
 
         if loc_resp.status_code != 200:
@@ -180,6 +429,7 @@ def complete_google_auth(user, code: str) -> Optional[Connection]:
             "settings": {
                 "access_token": access_token,
                 "refresh_token": refresh_token,
+                "token_expires_at": _expiry(tokens),
                 "account_id": account_id,
                 "account_name": account_name,
                 "locations": locations,  # persist all locations
@@ -194,35 +444,30 @@ def complete_google_auth(user, code: str) -> Optional[Connection]:
 # ------------------------------------------------------------------------------
 # Posting specials (using legacy v4 localPosts API)
 # ------------------------------------------------------------------------------
-def publish_special(special: Any, location_id: Optional[str] = None) -> None:
-    """Post a special to Google Business Profile as an Offer post (v4 API)."""
+def publish_special(
+    special: Any, location_id: Optional[str] = None, connection: Optional[Connection] = None
+) -> Optional[str]:
+    """Post a special to Google Business Profile as an Offer post (v4 API).
+
+    Returns the created post's name, or ``None`` if it could not be published.
+    """
     try:
-        connection = Connection.objects.get(
-            user=special.user, platform="google_business", is_connected=True
-        )
+        if connection is None:
+            connection = Connection.objects.get(
+                user=special.user, platform="google_business", is_connected=True
+            )
     except Connection.DoesNotExist:
         logger.warning("No Google connection found for user %s", special.user)
-        return
+        return None
 
     settings_data = connection.settings or {}
-    access_token = settings_data.get("access_token")
-    refresh_token = settings_data.get("refresh_token")
     account_id = settings_data.get("account_id")
 
     # allow override from user selection
     location_id = location_id or settings_data.get("location_id")
-    if not (access_token and account_id and location_id):
+    if not (settings_data.get("access_token") and account_id and location_id):
         logger.warning("Missing Google credentials for user %s; cannot publish", special.user)
-        return
-
-    # Refresh token if needed
-    if refresh_token and not access_token:
-        new_token = refresh_access_token(refresh_token)
-        if new_token:
-            access_token = new_token
-            settings_data["access_token"] = new_token
-            connection.settings = settings_data
-            connection.save(update_fields=["settings"])
+        return None
 
     parent = f"accounts/{account_id}/locations/{location_id}"
     url = f"https://mybusiness.googleapis.com/v4/{parent}/localPosts"
@@ -264,10 +509,11 @@ def publish_special(special: Any, location_id: Optional[str] = None) -> None:
         ]
 
 
-    headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
-        if response.status_code >= 400:
+        response = _authorized(connection, "post", url, json=payload)
+        if response is None:
+            logger.error("No valid Google token for user %s; cannot publish", special.user)
+        elif response.status_code >= 400:
             logger.error("Google publish failed %s: %s", response.status_code, response.text)
         else:
             data = response.json()
@@ -279,32 +525,41 @@ def publish_special(special: Any, location_id: Optional[str] = None) -> None:
                     special.save(update_fields=["google_post_name"])
                 except Exception:
                     logger.exception("Unable to save google_post_name for %s", special)
+            return post_name
     except Exception as exc:
         logger.exception("Failed to publish special to Google: %s", exc)
+    return None
+
+def remove_special(
+    special: Any, connection: Optional[Connection] = None, post_name: Optional[str] = None
+) -> bool:
+    """Delete a previously published special from Google Business Profile.
 
-def remove_special(special: Any, connection: Optional[Connection] = None) -> None:
-    """Delete a previously published special from Google Business Profile."""
+    Returns whether the post was removed.
+    """
     try:
         if connection is None:
             connection = Connection.objects.get(user=special.user, platform="google_business", is_connected=True)
     except Connection.DoesNotExist:
         logger.warning("No Google connection found for user %s", special.user)
-        return
+        return False
 
     settings_data = connection.settings or {}
-    access_token = settings_data.get("access_token")
-    post_name = getattr(special, "google_post_name", None)
-    if not (access_token and post_name):
+    post_name = post_name or getattr(special, "google_post_name", None)
+    if not (settings_data.get("access_token") and post_name):
         logger.warning("Missing Google data; cannot remove special for user %s", special.user)
-        return
+        return False
 
     url = f"{API_BASE_URL}/{post_name}"
-    headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        response = requests.delete(url, headers=headers, timeout=10)
-        if response.status_code >= 400:
+        response = _authorized(connection, "delete", url)
+        if response is None:
+            logger.error("No valid Google token for user %s; cannot remove post", special.user)
+        elif response.status_code >= 400:
             logger.error("Google removal failed %s: %s", response.status_code, response.text)
         else:
             logger.info("Removed Google post %s", post_name)
+            return True
     except Exception as exc:
         logger.exception("Failed to remove special from Google: %s", exc)
+    return False
@@ -0,0 +1,145 @@
+"""Database-backed job outbox.
+
+Jobs are rows in ``Job``, written in the same transaction as the change that
+caused them, and executed by ``manage.py run_jobs``. Workers claim jobs with a
+lease, so a job held by a worker that died is picked up again once the lease
+expires; failures are retried with exponential backoff. A batch can run on a
+thread pool (``JOB_CONCURRENCY``) when its jobs mostly wait on network calls.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q, Subquery
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from app.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(task: str, *, run_at=None, max_attempts: Optional[int] = None, **payload: Any) -> Job:
+    """Queue ``task`` (a dotted function path) to be called with ``payload``.
+
+    Call inside the transaction that makes the job necessary; the job only
+    becomes visible to workers when that transaction commits.
+    """
+    return Job.objects.create(
+        task=task,
+        payload=payload,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or _setting("JOB_MAX_ATTEMPTS", 5),
+    )
+
+
+def enqueue_many(task: str, payloads: List[dict]) -> List[Job]:
+    """Queue one ``task`` job per payload with a single insert."""
+    now = timezone.now()
+    max_attempts = _setting("JOB_MAX_ATTEMPTS", 5)
+    return Job.objects.bulk_create(
+        [Job(task=task, payload=payload, run_at=now, max_attempts=max_attempts) for payload in payloads]
+    )
+
+
+def claim(batch_size: int = 10, worker: Optional[str] = None) -> List[Job]:
+    """Lease up to ``batch_size`` due jobs to ``worker`` and return them.
+
+    The claim writes first: one UPDATE marks the due ids picked by a subquery
+    with a token unique to this claim, then the jobs are read back by that
+    token. SQLite therefore takes its write lock before reading, so parallel
+    workers queue for it instead of failing a lock upgrade. The due condition
+    is repeated on the UPDATE so that PostgreSQL, which skips rows locked by
+    another claim, never re-claims a job that changed while it waited.
+    ``locked_by`` is ``worker`` followed by ``/`` and the token.
+    """
+    now = timezone.now()
+    lease_expired = now - timedelta(seconds=_setting("JOB_LEASE_SECONDS", 300))
+    due = Q(status="queued", run_at__lte=now) | Q(status="running", locked_at__lt=lease_expired)
+    token = f"{(worker or worker_name())[:55]}/{uuid.uuid4().hex[:8]}"
+    candidates = Job.objects.filter(due).order_by("run_at", "id").values("id")[:batch_size]
+    if connection.features.has_select_for_update_skip_locked:
+        candidates = candidates.select_for_update(skip_locked=True)
+    with transaction.atomic():
+        claimed = Job.objects.filter(due, pk__in=Subquery(candidates)).update(
+            status="running", locked_at=now, locked_by=token, attempts=F("attempts") + 1
+        )
+    if not claimed:
+        return []
+    return list(Job.objects.filter(locked_by=token, status="running").order_by("run_at", "id"))
+
+
+def run(job: Job) -> bool:
+    """Execute a claimed job and record the outcome; return whether it succeeded."""
+    try:
+        import_string(job.task)(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%s) failed permanently after %d attempts", job.pk, job.task, job.attempts)
+            Job.objects.filter(pk=job.pk).update(status="failed", last_error=error, locked_at=None, updated_at=timezone.now())
+        else:
+            delay = _setting("JOB_RETRY_DELAY", 30) * 2 ** (job.attempts - 1)
+            logger.warning("Job %s (%s) failed; retrying in %ss", job.pk, job.task, delay)
+            Job.objects.filter(pk=job.pk).update(
+                status="queued",
+                run_at=timezone.now() + timedelta(seconds=delay),
+                last_error=error,
+                locked_at=None,
+                updated_at=timezone.now(),
+            )
+        return False
+    Job.objects.filter(pk=job.pk).update(status="done", locked_at=None, last_error="", updated_at=timezone.now())
+    return True
+
+
+def _run_in_thread(job: Job) -> bool:
+    try:
+        return run(job)
+    finally:
+        connection.close()
+
+
+def work(batch_size: int = 10, worker: Optional[str] = None, concurrency: Optional[int] = None) -> int:
+    """Claim and run one batch of jobs; return how many were run.
+
+    With ``concurrency`` above one the batch runs on that many threads, each
+    with its own database connection.
+    """
+    jobs = claim(batch_size, worker)
+    concurrency = min(concurrency or _setting("JOB_CONCURRENCY", 1), len(jobs))
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(_run_in_thread, jobs))
+    else:
+        for job in jobs:
+            run(job)
+    return len(jobs)
+
+
+def drain(batch_size: int = 10, worker: Optional[str] = None, concurrency: Optional[int] = None) -> int:
+    """Run jobs until none are due; return the total run."""
+    total = 0
+    while True:
+        count = work(batch_size, worker, concurrency)
+        if not count:
+            return total
+        total += count
@@ -0,0 +1,269 @@
+"""Content-addressed cache for language model responses.
+
+Responses are keyed by a SHA-256 of the model, the normalized messages and the
+sampling parameters. Lookups go to a bounded in-process LRU first and then to
+``LLMCacheEntry`` rows, so a repeated request is answered without calling the
+model in this or any other worker. Entries expire after ``LLM_CACHE_TTL``
+seconds; :func:`evict` trims the table to ``LLM_CACHE_MAX_ROWS`` least
+recently used rows, at most every ``LLM_CACHE_EVICT_INTERVAL`` seconds per
+worker and hourly from cron. Each row counts its hits, which gives the hit
+rate and the tokens saved (see :func:`stats`). Hits are written in batches
+(``LLM_CACHE_HIT_FLUSH_THRESHOLD``, ``LLM_CACHE_HIT_FLUSH_INTERVAL``) rather
+than one UPDATE per lookup, so the table lags by up to one batch.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from app.models import LLMCacheEntry
+
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", value).strip()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def cache_key(model: str, messages: Any, **params: Any) -> str:
+    """Hash of ``model``, whitespace-normalized ``messages`` and ``params``."""
+    source = json.dumps(
+        {"model": model, "messages": _normalize(messages), "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached: bool = False
+
+
+class ResponseCache:
+    """Bounded in-memory LRU in front of the ``LLMCacheEntry`` table.
+
+    ``hits`` and ``misses`` count this instance's lookups only; :func:`stats`
+    has the totals across workers.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[CachedResponse, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._hit_counts: Counter = Counter()
+        self._last_used: Dict[str, Any] = {}
+        self._last_hit_flush = time.monotonic()
+        self._last_evict = time.monotonic()
+
+    def _max_entries(self) -> int:
+        if self.max_entries is not None:
+            return self.max_entries
+        return getattr(settings, "LLM_CACHE_MEMORY_ENTRIES", 256)
+
+    def _remember(self, key: str, response: CachedResponse, expires_at) -> None:
+        with self._lock:
+            self._entries[key] = (response, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries():
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached response for ``key``, or ``None``."""
+        now = timezone.now()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            row = LLMCacheEntry.objects.filter(key=key, expires_at__gt=now).first()
+            if row is None:
+                return None
+            response = CachedResponse(row.response, row.prompt_tokens, row.completion_tokens)
+            self._remember(key, response, row.expires_at)
+            entry = (response, row.expires_at)
+        self._count_hit(key, now)
+        response = entry[0]
+        return CachedResponse(response.text, response.prompt_tokens, response.completion_tokens, cached=True)
+
+    def _count_hit(self, key: str, now) -> None:
+        with self._lock:
+            self._hit_counts[key] += 1
+            self._last_used[key] = now
+            due = (
+                sum(self._hit_counts.values()) >= getattr(settings, "LLM_CACHE_HIT_FLUSH_THRESHOLD", 50)
+                or time.monotonic() - self._last_hit_flush >= getattr(settings, "LLM_CACHE_HIT_FLUSH_INTERVAL", 60)
+            )
+        if due:
+            self.flush_hits()
+
+    def flush_hits(self) -> int:
+        """Write the buffered hit counts and last-use times; return how many hits were written."""
+        with self._lock:
+            counts, self._hit_counts = self._hit_counts, Counter()
+            last_used, self._last_used = self._last_used, {}
+            self._last_hit_flush = time.monotonic()
+        if not counts:
+            return 0
+        try:
+            with transaction.atomic():
+                for key, count in counts.items():
+                    LLMCacheEntry.objects.filter(key=key).update(hits=F("hits") + count, last_used_at=last_used[key])
+        except Exception:
+            logger.exception("Could not record %d LLM cache hits", sum(counts.values()))
+            return 0
+        return sum(counts.values())
+
+    def set(self, key: str, model: str, response: CachedResponse) -> None:
+        """Store ``response`` under ``key`` in memory and in the database."""
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=getattr(settings, "LLM_CACHE_TTL", 7 * 24 * 60 * 60))
+        fields = dict(
+            model=model,
+            response=response.text,
+            prompt_tokens=response.prompt_tokens,
+            completion_tokens=response.completion_tokens,
+            last_used_at=now,
+            expires_at=expires_at,
+        )
+        try:
+            _, created = LLMCacheEntry.objects.update_or_create(key=key, defaults=fields)
+        except IntegrityError:
+            # Another worker stored the same response first.
+            created = False
+        self._remember(key, response, expires_at)
+        if created:
+            self._maybe_evict()
+
+    def _maybe_evict(self) -> None:
+        with self._lock:
+            due = time.monotonic() - self._last_evict >= getattr(settings, "LLM_CACHE_EVICT_INTERVAL", 300)
+            if due:
+                self._last_evict = time.monotonic()
+        if due:
+            evict()
+
+    def lookup(self, model: str, messages: Any, **params: Any) -> Optional[CachedResponse]:
+        """Return the cached response for this request, or ``None`` (counted as a miss)."""
+        key = cache_key(model, messages, **params)
+        response = self.get(key)
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if response is None:
+            return None
+        logger.debug(
+            "LLM cache hit %s (%d tokens saved)", key[:12], response.prompt_tokens + response.completion_tokens
+        )
+        return response
+
+    def store(self, model: str, messages: Any, response: CachedResponse, **params: Any) -> None:
+        """Cache ``response`` for this request, e.g. once a streamed reply has finished."""
+        self.set(cache_key(model, messages, **params), model, response)
+
+    def get_or_compute(
+        self, model: str, messages: Any, compute: Callable[[], CachedResponse], **params: Any
+    ) -> CachedResponse:
+        """Return the cached response for this request, calling ``compute`` on a miss."""
+        response = self.lookup(model, messages, **params)
+        if response is None:
+            response = compute()
+            self.store(model, messages, response, **params)
+        return response
+
+    def clear(self) -> None:
+        """Forget this process's in-memory entries and unwritten hits."""
+        with self._lock:
+            self._entries.clear()
+            self._hit_counts.clear()
+            self._last_used.clear()
+
+
+def evict() -> int:
+    """Delete expired rows and trim the table to ``LLM_CACHE_MAX_ROWS``; return how many went."""
+    deleted, _ = LLMCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+    max_rows = getattr(settings, "LLM_CACHE_MAX_ROWS", 10000)
+    cutoff = list(
+        LLMCacheEntry.objects.order_by("-last_used_at").values_list("last_used_at", flat=True)[max_rows:max_rows + 1]
+    )
+    if cutoff:
+        trimmed, _ = LLMCacheEntry.objects.filter(last_used_at__lte=cutoff[0]).delete()
+        deleted += trimmed
+    return deleted
+
+
+def stats() -> Dict[str, Any]:
+    """Hit rate and tokens saved across all workers, from the cache table.
+
+    Every stored row is one miss; every lookup it answered is one hit. This
+    worker's buffered hits are written first; other workers' may lag.
+    """
+    responses.flush_hits()
+    totals = LLMCacheEntry.objects.aggregate(
+        entry_count=Count("id"),
+        hit_count=Sum("hits"),
+        saved=Sum((F("prompt_tokens") + F("completion_tokens")) * F("hits")),
+    )
+    entries = totals["entry_count"]
+    hits = totals["hit_count"] or 0
+    return {
+        "entries": entries,
+        "hits": hits,
+        "hit_rate": hits / (hits + entries) if hits + entries else 0.0,
+        "tokens_saved": totals["saved"] or 0,
+    }
+
+
+responses = ResponseCache()
+
+
+def get_or_compute(model: str, messages: Any, compute: Callable[[], CachedResponse], **params: Any) -> CachedResponse:
+    """Look up or compute a response on the shared process-wide cache."""
+    return responses.get_or_compute(model, messages, compute, **params)
+
+
+def lookup(model: str, messages: Any, **params: Any) -> Optional[CachedResponse]:
+    """Look up a response on the shared process-wide cache."""
+    return responses.lookup(model, messages, **params)
+
+
+def store(model: str, messages: Any, response: CachedResponse, **params: Any) -> None:
+    """Store a response on the shared process-wide cache."""
+    responses.store(model, messages, response, **params)
+
+
+atexit.register(responses.flush_hits)
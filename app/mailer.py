@@ -0,0 +1,131 @@
+"""Batched email delivery over reused backend connections."""
+from __future__ import annotations
+
+import logging
+import smtplib
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+
+logger = logging.getLogger(__name__)
+
+# Refusals for a single address; retrying the connection will not help.
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused,)
+
+
+class Abort(Exception):
+    """Raised by a ``throttle`` to stop delivery at once.
+
+    The rest of the messages are neither sent nor reported, and the
+    exception propagates to the caller of :func:`deliver`.
+    """
+
+
+@dataclass
+class DeliveryReport:
+    """Outcome of one :func:`deliver` call."""
+
+    delivered: int = 0
+    failed: int = 0
+    batches: int = 0
+    failed_recipients: List[str] = field(default_factory=list)
+
+    def merge(self, other: "DeliveryReport") -> None:
+        self.delivered += other.delivered
+        self.failed += other.failed
+        self.batches += other.batches
+        self.failed_recipients.extend(other.failed_recipients)
+
+
+def _batches(messages: Iterable[EmailMessage], size: int) -> Iterator[List[EmailMessage]]:
+    batch: List[EmailMessage] = []
+    for message in messages:
+        batch.append(message)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def deliver(
+    messages: Iterable[EmailMessage],
+    batch_size: Optional[int] = None,
+    retries: Optional[int] = None,
+    backend: Optional[str] = None,
+    throttle: Optional[Callable[[], None]] = None,
+    on_result: Optional[Callable[[EmailMessage, Optional[Exception]], None]] = None,
+) -> DeliveryReport:
+    """Send ``messages`` over one backend connection per batch of ``batch_size``.
+
+    A connection failure closes the connection and resends the rest of the
+    batch on a fresh one, up to ``retries`` times; messages already accepted
+    are never resent. Refused recipients are reported as failed without a
+    retry.
+
+    ``throttle`` is called before every send attempt (e.g. to wait for a rate
+    limit) and may raise :class:`Abort` to stop; ``on_result`` is called after
+    each message with ``None`` on success or the exception it finally failed
+    with.
+    """
+    batch_size = batch_size or getattr(settings, "MAIL_BATCH_SIZE", 100)
+    retries = getattr(settings, "MAIL_BATCH_RETRIES", 2) if retries is None else retries
+    report = DeliveryReport()
+    for batch in _batches(messages, batch_size):
+        report.merge(_send_batch(batch, retries, backend, throttle, on_result))
+    logger.info("Delivered %d messages in %d batches, %d failed", report.delivered, report.batches, report.failed)
+    return report
+
+
+def _send_batch(
+    batch: List[EmailMessage],
+    retries: int,
+    backend: Optional[str],
+    throttle: Optional[Callable[[], None]] = None,
+    on_result: Optional[Callable[[EmailMessage, Optional[Exception]], None]] = None,
+) -> DeliveryReport:
+    report = DeliveryReport(batches=1)
+    on_result = on_result or (lambda message, error: None)
+    pending = list(batch)
+    attempt = 0
+    while pending:
+        connection = get_connection(backend, fail_silently=False)
+        try:
+            connection.open()
+            while pending:
+                message = pending[0]
+                if throttle:
+                    throttle()
+                try:
+                    report.delivered += connection.send_messages([message])
+                except PERMANENT_ERRORS as exc:
+                    logger.warning("Recipient refused for %s: %s", message.to, exc)
+                    report.failed += 1
+                    report.failed_recipients.extend(message.to)
+                    on_result(pending.pop(0), exc)
+                else:
+                    on_result(pending.pop(0), None)
+        except Abort:
+            raise
+        except Exception as exc:
+            attempt += 1
+            if attempt > retries:
+                logger.error("Giving up on %d messages after %d attempts: %s", len(pending), attempt, exc)
+                report.failed += len(pending)
+                report.failed_recipients.extend(addr for message in pending for addr in message.to)
+                for message in pending:
+                    on_result(message, exc)
+                pending = []
+            else:
+                logger.warning("Mail batch interrupted (%s); retrying %d messages", exc, len(pending))
+                time.sleep(getattr(settings, "MAIL_RETRY_DELAY", 1) * attempt)
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                logger.debug("Error closing mail connection", exc_info=True)
+    return report
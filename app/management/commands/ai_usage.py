@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app import metering
+
+
+class Command(BaseCommand):
+    help = "Show AI calls and tokens per day and model, and p50/p95 latency per model."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Days of daily totals to show")
+        parser.add_argument("--hours", type=int, default=24, help="Window for latency percentiles")
+
+    def handle(self, *args, **options):
+        for row in metering.daily_totals(options["days"]):
+            self.stdout.write(
+                f"{row['day']} {row['model']}: {row['total_calls']} calls, {row['total_errors']} errors, "
+                f"{row['total_prompt_tokens']} prompt + {row['total_completion_tokens']} completion tokens"
+            )
+        since = timezone.now() - timedelta(hours=options["hours"])
+        for model, latency in sorted(metering.latency_percentiles(since=since).items()):
+            self.stdout.write(f"{model}: p50 {latency['p50']} ms, p95 {latency['p95']} ms over {latency['calls']} calls")
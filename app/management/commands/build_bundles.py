@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from app import bundles
+
+
+class Command(BaseCommand):
+    help = "Write content-hashed copies of the static bundles. Run before collectstatic."
+
+    def handle(self, *args, **options):
+        manifest = bundles.build()
+        for name, target in sorted(manifest.items()):
+            self.stdout.write(f"{name} -> {target}")
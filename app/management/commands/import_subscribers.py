@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from app import subscribers
+
+
+class Command(BaseCommand):
+    help = "Import email subscribers for a restaurant from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Restaurant owner's username")
+        parser.add_argument("path", help="CSV file with an 'email' column (or emails in the first column)")
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+
+        def progress(report):
+            self.stdout.write(f"{report.rows} rows read, {report.created} imported")
+
+        with open(options["path"], encoding="utf-8-sig", newline="") as handle:
+            report = subscribers.import_csv(user, handle, options["chunk_size"], progress)
+        for line_no, value in report.errors:
+            self.stderr.write(f"line {line_no}: invalid email {value!r}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.created} subscribers ({report.duplicates} duplicates, {report.invalid} invalid)"
+        ))
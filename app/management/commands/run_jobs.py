@@ -0,0 +1,49 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from app import jobs
+
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF = 60  # seconds
+
+class Command(BaseCommand):
+    help = "Run queued background jobs from the database outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit once no jobs are due")
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument(
+            "--concurrency", type=int, default=None, help="Threads per batch (default: JOB_CONCURRENCY or 1)"
+        )
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+
+    def handle(self, *args, **options):
+        worker = jobs.worker_name()
+        self.stdout.write(f"Job worker {worker} started")
+        failures = 0
+        while True:
+            try:
+                count = jobs.work(options["batch_size"], worker, options["concurrency"])
+            except DatabaseError:
+                # Locked or unreachable database: unfinished jobs are re-claimed once their lease expires.
+                failures += 1
+                delay = min(options["sleep"] * 2 ** failures, MAX_BACKOFF)
+                logger.exception("Job worker %s could not reach the database; retrying in %ss", worker, delay)
+                connection.close()
+                time.sleep(delay)
+                continue
+            failures = 0
+            if count:
+                self.stdout.write(f"Ran {count} jobs")
+                continue
+            if options["once"]:
+                return
+            try:
+                time.sleep(options["sleep"])
+            except KeyboardInterrupt:
+                return
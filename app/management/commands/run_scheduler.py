@@ -0,0 +1,45 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from app.scheduler import Scheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Expire and activate specials at their end and start dates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process boundaries that have passed and exit")
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler()
+        count = scheduler.load()
+        self.stdout.write(f"Scheduler started with {count} upcoming boundaries")
+        reload = False
+        while True:
+            try:
+                if reload:
+                    # A failed tick may have popped boundaries it never processed.
+                    scheduler.load()
+                    reload = False
+                report = scheduler.tick()
+            except DatabaseError:
+                # The watermark only advances on success, so the next poll catches up.
+                logger.exception("Scheduler could not reach the database; retrying in %ss", scheduler.poll)
+                connection.close()
+                reload = True
+                time.sleep(scheduler.poll)
+                continue
+            if report:
+                self.stdout.write(f"Expired {report.expired} and activated {report.activated} specials")
+            if options["once"]:
+                return
+            try:
+                time.sleep(scheduler.seconds_until_next())
+            except KeyboardInterrupt:
+                return
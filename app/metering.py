@@ -0,0 +1,276 @@
+"""Metering and budgets for AI calls.
+
+``app.ai_gateway`` calls :func:`reserve` before every request and
+:func:`record` after it. Each call is stored as an ``AIUsage`` row, which
+holds its tokens, latency and model, and is folded into the ``DailyAIUsage``
+rollup. The row is created by :func:`reserve`, in flight and holding an
+estimate of the call's tokens, so concurrent calls count against the budget
+before any of them has finished. Raw rows older than
+``AI_USAGE_RETENTION_DAYS`` are dropped by :func:`prune`, and the rollups are
+kept.
+
+Budgets come from ``AI_BUDGETS``, keyed by ``UserProfile.subscription_tier``.
+Each tier has a daily token allowance and a per-minute request cap, and
+``None`` means unlimited. Users without a profile are billed as ``free``.
+Calls made without a tenant, such as system jobs, are metered but never
+limited. Reservations of calls that never report back stop counting after
+``AI_RESERVATION_TIMEOUT`` seconds.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from app.models import AIUsage, DailyAIUsage, UserProfile
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGETS = {
+    "free": {"daily_tokens": 20_000, "requests_per_minute": 10},
+    "pro": {"daily_tokens": 500_000, "requests_per_minute": 60},
+    "enterprise": {"daily_tokens": None, "requests_per_minute": 300},
+}
+
+
+class BudgetExceeded(Exception):
+    """The tenant has used up its AI allowance; the request was not sent."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Usage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+def _user_id(tenant: Any) -> Optional[int]:
+    """``tenant`` is a ``User``, a user id or ``None``."""
+    return getattr(tenant, "pk", tenant)
+
+
+def _int(value: Any) -> int:
+    return value if isinstance(value, int) and not isinstance(value, bool) and value > 0 else 0
+
+
+def usage_of(response: Any) -> Usage:
+    """Token counts from a chat completion, a Responses API reply or a stream's last chunk."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return Usage()
+    return Usage(
+        prompt_tokens=_int(getattr(usage, "prompt_tokens", None)) or _int(getattr(usage, "input_tokens", None)),
+        completion_tokens=_int(getattr(usage, "completion_tokens", None)) or _int(getattr(usage, "output_tokens", None)),
+    )
+
+
+def tier(tenant: Any) -> str:
+    user_id = _user_id(tenant)
+    value = UserProfile.objects.filter(user_id=user_id).values_list("subscription_tier", flat=True).first()
+    return value or "free"
+
+
+def budget(tier_name: str) -> Dict[str, Optional[int]]:
+    budgets = getattr(settings, "AI_BUDGETS", DEFAULT_BUDGETS)
+    return budgets.get(tier_name) or budgets.get("free") or {}
+
+
+def estimate_tokens(payload: Any, params: Dict[str, Any]) -> int:
+    """Rough upper bound on a request's tokens: about four characters per prompt token plus the output cap."""
+    prompt = len(json.dumps(payload, default=str)) // 4
+    completion = (
+        params.get("max_tokens")
+        or params.get("max_completion_tokens")
+        or params.get("max_output_tokens")
+        or getattr(settings, "AI_RESERVED_COMPLETION_TOKENS", 500)
+    )
+    return prompt + completion
+
+
+def tokens_today(tenant: Any, now=None) -> int:
+    now = now or timezone.now()
+    totals = DailyAIUsage.objects.filter(user_id=_user_id(tenant), day=now.date()).aggregate(
+        prompt=Sum("prompt_tokens"), completion=Sum("completion_tokens")
+    )
+    return (totals["prompt"] or 0) + (totals["completion"] or 0)
+
+
+def tokens_reserved(tenant: Any, now=None, exclude: Optional[int] = None) -> int:
+    """Tokens held by ``tenant``'s calls that are still in flight, except reservation ``exclude``."""
+    now = now or timezone.now()
+    since = max(
+        now - timedelta(seconds=getattr(settings, "AI_RESERVATION_TIMEOUT", 600)),
+        now.replace(hour=0, minute=0, second=0, microsecond=0),
+    )
+    held = AIUsage.objects.filter(user_id=_user_id(tenant), in_flight=True, created_at__gt=since)
+    return held.exclude(pk=exclude).aggregate(held=Sum("reserved_tokens"))["held"] or 0
+
+
+def check_budget(tenant: Any, now=None, tokens: int = 0, exclude: Optional[int] = None) -> None:
+    """Raise :class:`BudgetExceeded` if ``tenant`` may not make an AI call of about ``tokens`` right now.
+
+    Calls in flight count towards the per-minute cap and hold their
+    reserved tokens against the daily allowance. ``exclude`` is the caller's
+    own reservation, which is not counted twice.
+    """
+    if tenant is None:
+        return
+    now = now or timezone.now()
+    tier_name = tier(tenant)
+    limits = budget(tier_name)
+
+    per_minute = limits.get("requests_per_minute")
+    if per_minute is not None:
+        recent = (
+            AIUsage.objects.filter(user_id=_user_id(tenant), created_at__gt=now - timedelta(minutes=1))
+            .exclude(pk=exclude)
+            .count()
+        )
+        if recent >= per_minute:
+            logger.warning("AI rate limit hit for user %s (%s tier)", _user_id(tenant), tier_name)
+            raise BudgetExceeded(f"AI request limit of {per_minute} per minute reached", retry_after=60)
+
+    daily = limits.get("daily_tokens")
+    if daily is not None:
+        used = tokens_today(tenant, now) + tokens_reserved(tenant, now, exclude)
+        if used >= daily or used + tokens > daily:
+            midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            logger.warning("AI token budget exhausted for user %s (%s tier)", _user_id(tenant), tier_name)
+            raise BudgetExceeded(
+                f"Daily AI budget of {daily} tokens used up", retry_after=int((midnight - now).total_seconds()) + 1
+            )
+
+
+def reserve(tenant: Any, model: str, tokens: int = 0, now=None) -> int:
+    """Check the budget and hold ``tokens`` for a call about to be sent; return the reservation id.
+
+    Pass the id to :func:`record` when the call is done. The in-flight row is
+    inserted before the budget is read, so the transaction holds the write
+    lock (SQLite) or the tenant's row lock (PostgreSQL) while it checks, and
+    parallel calls of one tenant check one after another. An exceeded budget
+    rolls the row back. Lock errors are retried ``AI_RESERVE_ATTEMPTS``
+    times; after that the call is refused rather than sent unreserved.
+    """
+    now = now or timezone.now()
+    user_id = _user_id(tenant)
+    attempts = getattr(settings, "AI_RESERVE_ATTEMPTS", 3)
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic():
+                reservation = AIUsage.objects.create(
+                    user_id=user_id, model=model, ok=False, in_flight=True, reserved_tokens=tokens, created_at=now
+                ).pk
+                if user_id is not None and connection.features.has_select_for_update:
+                    # FOR NO KEY UPDATE does not conflict with the key-share lock the insert took.
+                    list(User.objects.select_for_update(no_key=True).filter(pk=user_id).values_list("pk", flat=True))
+                check_budget(tenant, now, tokens, exclude=reservation)
+                return reservation
+        except DatabaseError:
+            if attempt == attempts:
+                logger.exception("Could not reserve AI budget for %s", model)
+                raise BudgetExceeded("AI budget is busy; try again shortly", retry_after=5)
+            time.sleep(0.05 * attempt)
+
+
+def record(
+    tenant: Any, model: str, usage: Usage, latency: float, ok: bool = True, now=None, reservation: Optional[int] = None
+) -> None:
+    """Store one call and add it to the day's rollup. ``latency`` is in seconds.
+
+    With ``reservation`` the row created by :func:`reserve` is completed and
+    its hold released; otherwise a new row is stored. Metering must never
+    break the AI call it measures, so database errors are logged and
+    swallowed.
+    """
+    now = now or timezone.now()
+    user_id = _user_id(tenant)
+    latency_ms = max(int(round(latency * 1000)), 0)
+    try:
+        with transaction.atomic():
+            fields = dict(
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                latency_ms=latency_ms,
+                ok=ok,
+                in_flight=False,
+                reserved_tokens=0,
+            )
+            if reservation is None or not AIUsage.objects.filter(pk=reservation).update(**fields):
+                AIUsage.objects.create(user_id=user_id, model=model, created_at=now, **fields)
+            DailyAIUsage.objects.bulk_create(
+                [DailyAIUsage(user_id=user_id, day=now.date(), model=model)], ignore_conflicts=True
+            )
+            DailyAIUsage.objects.filter(user_id=user_id, day=now.date(), model=model).update(
+                calls=F("calls") + 1,
+                errors=F("errors") + (0 if ok else 1),
+                prompt_tokens=F("prompt_tokens") + usage.prompt_tokens,
+                completion_tokens=F("completion_tokens") + usage.completion_tokens,
+                latency_ms=F("latency_ms") + latency_ms,
+            )
+    except Exception:
+        logger.exception("Could not record AI usage for %s", model)
+
+
+def _percentile(ordered: List[int], fraction: float) -> int:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def latency_percentiles(since=None, until=None) -> Dict[str, Dict[str, int]]:
+    """p50/p95 latency in milliseconds per model over ``[since, until)``, by default the last 24 hours."""
+    until = until or timezone.now()
+    since = since or until - timedelta(days=1)
+    latencies: Dict[str, List[int]] = {}
+    rows = (
+        AIUsage.objects.filter(created_at__gte=since, created_at__lt=until, ok=True, in_flight=False)
+        .order_by("model", "latency_ms")
+        .values_list("model", "latency_ms")
+    )
+    for model, latency_ms in rows.iterator():
+        latencies.setdefault(model, []).append(latency_ms)
+    return {
+        model: {"calls": len(values), "p50": _percentile(values, 0.5), "p95": _percentile(values, 0.95)}
+        for model, values in latencies.items()
+    }
+
+
+def daily_totals(days: int = 7, now=None) -> List[Dict[str, Any]]:
+    """Calls, errors and tokens per day and model for the last ``days`` days, newest first."""
+    now = now or timezone.now()
+    start = now.date() - timedelta(days=days - 1)
+    return list(
+        DailyAIUsage.objects.filter(day__gte=start)
+        .values("day", "model")
+        .annotate(
+            total_calls=Sum("calls"),
+            total_errors=Sum("errors"),
+            total_prompt_tokens=Sum("prompt_tokens"),
+            total_completion_tokens=Sum("completion_tokens"),
+        )
+        .order_by("-day", "model")
+    )
+
+
+def prune(now=None) -> int:
+    """Delete raw usage rows older than ``AI_USAGE_RETENTION_DAYS``; the daily rollups are kept."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=getattr(settings, "AI_USAGE_RETENTION_DAYS", 30))
+    deleted, _ = AIUsage.objects.filter(created_at__lt=cutoff).delete()
+    if deleted:
+        logger.info("Pruned %d AI usage rows older than %s", deleted, cutoff)
+    return deleted
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0007_userprofile_stripe_customer_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="special",
+            name="signup_opens",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0008_special_signup_opens"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySpecialStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("bucket", models.DateTimeField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("clicks", models.PositiveIntegerField(default=0)),
+                ("shares", models.PositiveIntegerField(default=0)),
+                ("email_signups", models.PositiveIntegerField(default=0)),
+                ("signup_opens", models.PositiveIntegerField(default=0)),
+                ("special", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="%(class)s", to="app.special")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "abstract": False,
+                "indexes": [models.Index(fields=["user", "bucket"], name="dailyspecialstats_user_bucket")],
+                "constraints": [models.UniqueConstraint(fields=("special", "bucket"), name="dailyspecialstats_special_bucket")],
+            },
+        ),
+        migrations.CreateModel(
+            name="HourlySpecialStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("bucket", models.DateTimeField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("clicks", models.PositiveIntegerField(default=0)),
+                ("shares", models.PositiveIntegerField(default=0)),
+                ("email_signups", models.PositiveIntegerField(default=0)),
+                ("signup_opens", models.PositiveIntegerField(default=0)),
+                ("special", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="%(class)s", to="app.special")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "abstract": False,
+                "indexes": [models.Index(fields=["user", "bucket"], name="hourlyspecialstats_user_bucket")],
+                "constraints": [models.UniqueConstraint(fields=("special", "bucket"), name="hourlyspecialstats_special_bucket")],
+            },
+        ),
+    ]
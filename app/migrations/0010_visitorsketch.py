@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0009_special_stats_rollups"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VisitorSketch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField(blank=True, null=True)),
+                ("registers", models.BinaryField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("special", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="visitor_sketches", to="app.special")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="visitor_sketches", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(condition=models.Q(("special__isnull", False)), fields=("special",), name="visitorsketch_unique_special"), models.UniqueConstraint(condition=models.Q(("special__isnull", True)), fields=("user", "day"), name="visitorsketch_unique_user_day")],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0011_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Campaign",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("status", models.CharField(choices=[("sending", "Sending"), ("done", "Done"), ("cancelled", "Cancelled")], default="sending", max_length=10)),
+                ("cursor", models.UUIDField(blank=True, help_text="Last EmailSignup id whose recipients were recorded", null=True)),
+                ("sent_count", models.PositiveIntegerField(default=0)),
+                ("failed_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("special", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="campaigns", to="app.special")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CampaignRecipient",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("email", models.EmailField(max_length=254)),
+                ("status", models.CharField(choices=[("pending", "Pending"), ("sent", "Sent"), ("failed", "Failed"), ("skipped", "Skipped")], default="pending", max_length=10)),
+                ("error", models.TextField(blank=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                ("campaign", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="recipients", to="app.campaign")),
+                ("signup", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="app.emailsignup")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["campaign", "status"], name="campaignrecipient_status")],
+                "constraints": [models.UniqueConstraint(fields=("campaign", "signup"), name="campaignrecipient_unique")],
+            },
+        ),
+    ]
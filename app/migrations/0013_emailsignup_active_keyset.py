@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0012_campaigns"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="emailsignup",
+            index=models.Index(fields=["restaurant", "is_active", "id"], name="emailsignup_active_keyset"),
+        ),
+    ]
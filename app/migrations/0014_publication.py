@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0013_emailsignup_active_keyset"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Publication",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("status", models.CharField(choices=[("pending", "Pending"), ("published", "Published"), ("removing", "Removing"), ("removed", "Removed"), ("failed", "Failed")], default="pending", max_length=10)),
+                ("external_id", models.CharField(blank=True, help_text="Id of the post on the channel, e.g. google_post_name", max_length=255)),
+                ("last_error", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("connection", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="publications", to="app.connection")),
+                ("special", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="publications", to="app.special")),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("special", "connection"), name="publication_unique")],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0014_publication"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleWatermark",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("position", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="special",
+            index=models.Index(fields=["status", "end_date"], name="special_status_end"),
+        ),
+        migrations.AddIndex(
+            model_name="special",
+            index=models.Index(fields=["status", "start_date"], name="special_status_start"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0015_scheduler"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="special",
+            index=models.Index(fields=["user", "status", "start_date"], name="special_user_status_start"),
+        ),
+        migrations.AddIndex(
+            model_name="special",
+            index=models.Index(fields=["user", "status", "-created_at"], name="special_user_status_created"),
+        ),
+        migrations.AddIndex(
+            model_name="special",
+            index=models.Index(fields=["user", "-created_at"], name="special_user_created"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0018_ai_usage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaign",
+            name="claimed_by",
+            field=models.CharField(blank=True, help_text="Token of the run currently sending", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="campaign",
+            name="claimed_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0019_campaign_claim"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="emailsignup",
+            name="emailsignup_active_keyset",
+        ),
+        migrations.AddField(
+            model_name="campaign",
+            name="cursor_signed_up_at",
+            field=models.DateTimeField(blank=True, help_text="signed_up_at of the cursor signup", null=True),
+        ),
+        migrations.AddIndex(
+            model_name="emailsignup",
+            index=models.Index(fields=["restaurant", "signed_up_at", "id"], name="emailsignup_signup_keyset"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0020_signup_order_keyset"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aiusage",
+            name="in_flight",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="aiusage",
+            name="reserved_tokens",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
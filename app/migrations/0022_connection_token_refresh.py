@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0021_aiusage_reservation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="connection",
+            name="token_refresh_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
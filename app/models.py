@@ -57,6 +57,7 @@ class Special(models.Model):
     clicks = models.PositiveIntegerField(default=0)
     shares = models.PositiveIntegerField(default=0)
     email_signups = models.PositiveIntegerField(default=0)
+    signup_opens = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -65,6 +66,207 @@ class Special(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Widget: the current special and the next start (app.widget_cache).
+            models.Index(fields=['user', 'status', 'start_date'], name='special_user_status_start'),
+            # Dashboard: a restaurant's active specials, newest first.
+            models.Index(fields=['user', 'status', '-created_at'], name='special_user_status_created'),
+            # Specials list: all of a restaurant's specials, newest first.
+            models.Index(fields=['user', '-created_at'], name='special_user_created'),
+            # Upcoming and overdue start/end boundaries (app.scheduler, app.cron).
+            models.Index(fields=['status', 'end_date'], name='special_status_end'),
+            models.Index(fields=['status', 'start_date'], name='special_status_start'),
+        ]
+
+class SpecialStats(models.Model):
+    """Engagement counts for one special within one time bucket."""
+
+    special = models.ForeignKey(Special, on_delete=models.CASCADE, related_name='%(class)s')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    bucket = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+    shares = models.PositiveIntegerField(default=0)
+    email_signups = models.PositiveIntegerField(default=0)
+    signup_opens = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        constraints = [
+            models.UniqueConstraint(fields=['special', 'bucket'], name='%(class)s_special_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'bucket'], name='%(class)s_user_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.special_id} @ {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class HourlySpecialStats(SpecialStats):
+    """Per-hour rollup of a special's counters."""
+
+    class Meta(SpecialStats.Meta):
+        pass
+
+
+class DailySpecialStats(SpecialStats):
+    """Per-day (UTC) rollup of a special's counters."""
+
+    class Meta(SpecialStats.Meta):
+        pass
+
+
+class VisitorSketch(models.Model):
+    """HyperLogLog sketch (see ``app.hll``) of distinct widget visitors.
+
+    A row covers either one special over its lifetime (``special`` set) or a
+    whole restaurant for one day (``day`` set).
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='visitor_sketches')
+    special = models.ForeignKey(Special, on_delete=models.CASCADE, null=True, blank=True, related_name='visitor_sketches')
+    day = models.DateField(null=True, blank=True)
+    registers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['special'], condition=models.Q(special__isnull=False), name='visitorsketch_unique_special'
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'day'], condition=models.Q(special__isnull=True), name='visitorsketch_unique_user_day'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.special_id or self.day}"
+
+
+class Job(models.Model):
+    """A unit of background work in the database-backed outbox (see ``app.jobs``)."""
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=255, help_text="Dotted path of the function to call")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
+
+
+class ScheduleWatermark(models.Model):
+    """A named point in time kept by ``app.scheduler``.
+
+    Covers how far special start/end boundaries have been processed, and when
+    the scheduler was last re-armed.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    position = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position:%Y-%m-%d %H:%M:%S}"
+
+
+class LLMCacheEntry(models.Model):
+    """A cached model response, keyed by a hash of the normalized request (see ``app.llm_cache``)."""
+
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    response = models.TextField()
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='llmcache_expires'),
+            models.Index(fields=['last_used_at'], name='llmcache_last_used'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.key[:12]} ({self.hits} hits)"
+
+
+class AIUsage(models.Model):
+    """One call to the AI API, recorded by ``app.metering``; pruned after a retention window."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='ai_usage')
+    model = models.CharField(max_length=100)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    latency_ms = models.PositiveIntegerField(default=0)
+    ok = models.BooleanField(default=True)
+    # Set from just before the request is sent until it is recorded; the
+    # estimate is held against the daily budget meanwhile.
+    in_flight = models.BooleanField(default=False)
+    reserved_tokens = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='aiusage_user_created'),
+            models.Index(fields=['model', 'created_at'], name='aiusage_model_created'),
+            models.Index(fields=['created_at'], name='aiusage_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.prompt_tokens}+{self.completion_tokens} tokens in {self.latency_ms} ms"
+
+
+class DailyAIUsage(models.Model):
+    """Per-day (UTC) rollup of AI calls for one user and model; ``user`` is empty for system calls."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_ai_usage')
+    day = models.DateField()
+    model = models.CharField(max_length=100)
+    calls = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    latency_ms = models.PositiveBigIntegerField(default=0, help_text="Total latency of all calls")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'day', 'model'], condition=models.Q(user__isnull=False), name='dailyaiusage_unique_user'
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'model'], condition=models.Q(user__isnull=True), name='dailyaiusage_unique_system'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'model'], name='dailyaiusage_day_model'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id or 'system'} {self.model} @ {self.day}"
+
 
 class Connection(models.Model):
     PLATFORM_CHOICES = [
@@ -79,6 +281,8 @@ class Connection(models.Model):
     platform = models.CharField(max_length=20, choices=PLATFORM_CHOICES)
     is_connected = models.BooleanField(default=False)
     settings = models.JSONField(blank=True, null=True)
+    # Set by the one worker refreshing the access token (app.integrations.google).
+    token_refresh_until = models.DateTimeField(blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -89,6 +293,33 @@ class Connection(models.Model):
         unique_together = ['user', 'platform']
 
 
+class Publication(models.Model):
+    """State of one special on one connected channel (see ``app.distribution``)."""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('published', 'Published'),
+        ('removing', 'Removing'),
+        ('removed', 'Removed'),
+        ('failed', 'Failed'),
+    ]
+
+    special = models.ForeignKey(Special, on_delete=models.CASCADE, related_name='publications')
+    connection = models.ForeignKey(Connection, on_delete=models.CASCADE, related_name='publications')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    external_id = models.CharField(max_length=255, blank=True, help_text="Id of the post on the channel, e.g. google_post_name")
+    last_error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['special', 'connection'], name='publication_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.special_id} on {self.connection.platform} ({self.status})"
+
+
 class Integration(models.Model):
     """Minimal stub model for test compatibility."""
     name = models.CharField(max_length=50)
@@ -151,6 +382,10 @@ class EmailSignup(models.Model):
 
     class Meta:
         unique_together = ['restaurant', 'email']
+        indexes = [
+            # Keyset pagination in signup order (app.subscribers): active subscribers and the export.
+            models.Index(fields=['restaurant', 'signed_up_at', 'id'], name='emailsignup_signup_keyset'),
+        ]
 
     def __str__(self):
         return f"{self.email} - {self.restaurant.username}"
@@ -188,3 +423,56 @@ class Article(models.Model):
     def get_absolute_url(self):
         return reverse("article_detail", args=[self.slug])
 
+
+class Campaign(models.Model):
+    """One notification send for a special, with a resumable cursor (see ``app.campaigns``)."""
+
+    STATUS_CHOICES = [
+        ('sending', 'Sending'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    special = models.ForeignKey(Special, on_delete=models.CASCADE, related_name='campaigns')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='sending')
+    cursor = models.UUIDField(blank=True, null=True, help_text="Last EmailSignup id whose recipients were recorded")
+    cursor_signed_up_at = models.DateTimeField(blank=True, null=True, help_text="signed_up_at of the cursor signup")
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    claimed_by = models.CharField(max_length=64, blank=True, help_text="Token of the run currently sending")
+    claimed_until = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.special_id} ({self.status})"
+
+
+class CampaignRecipient(models.Model):
+    """Delivery status of one subscriber within a campaign."""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='recipients')
+    signup = models.ForeignKey(EmailSignup, on_delete=models.CASCADE, related_name='+')
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'signup'], name='campaignrecipient_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['campaign', 'status'], name='campaignrecipient_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} ({self.status})"
+
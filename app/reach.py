@@ -0,0 +1,176 @@
+"""Approximate unique-visitor reach built from HyperLogLog sketches.
+
+Each worker keeps one sketch per special and per restaurant-day in memory
+and merges them into ``VisitorSketch`` rows on the same schedule as the
+counters in ``app.counters``, background thread included.  Sketches only
+ever grow by register-wise maximum, so merging is order-independent and the
+same visitor seen by several workers or on several days is counted once.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import hmac
+import logging
+import time
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from app.counters import FlushingBuffer
+from app.hll import HyperLogLog
+from app.models import Special, VisitorSketch
+
+
+logger = logging.getLogger(__name__)
+
+# (user_id, special_id, day); exactly one of special_id/day is set.
+Scope = Tuple[int, Optional[str], Optional[date]]
+
+
+def visitor_key(request, client_id: Optional[str] = None) -> str:
+    """Return a keyed hash identifying the visitor behind ``request``.
+
+    The widget sends a random per-browser ``client_id``; without one the
+    client address and user agent are used instead.  Only the HMAC is ever
+    stored, and only inside a sketch.
+    """
+    if client_id:
+        source = f"id:{client_id[:64]}"
+    else:
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        address = forwarded.split(",")[0].strip() or request.META.get("REMOTE_ADDR", "")
+        source = f"ip:{address}|{request.META.get('HTTP_USER_AGENT', '')}"
+    return hmac.new(settings.SECRET_KEY.encode(), source.encode(), hashlib.sha256).hexdigest()
+
+
+class SketchBuffer(FlushingBuffer):
+    """Collect visitor keys in per-scope sketches and merge them in batches."""
+
+    thread_name = "reach-flush"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._sketches: Dict[Scope, HyperLogLog] = {}
+
+    def record(self, user_id: int, special_id, visitor: str) -> None:
+        """Add ``visitor`` to the special's sketch and to today's restaurant sketch."""
+        self._ensure_started()
+        today = timezone.now().date()
+        with self._lock:
+            for scope in ((user_id, str(special_id), None), (user_id, None, today)):
+                sketch = self._sketches.get(scope)
+                if sketch is None:
+                    sketch = self._sketches[scope] = HyperLogLog()
+                sketch.add(visitor)
+            self._pending += 1
+            due = self._due()
+        if due:
+            self.flush()
+
+    def pending(self) -> int:
+        """Return the number of visits waiting to be merged."""
+        with self._lock:
+            return self._pending
+
+    def flush(self) -> int:
+        """Merge buffered sketches into the database and return how many rows were written."""
+        with self._lock:
+            sketches, self._sketches = self._sketches, {}
+            total, self._pending = self._pending, 0
+            self._last_flush = time.monotonic()
+        if not sketches:
+            return 0
+        try:
+            with transaction.atomic():
+                live = _live_scopes(sketches)
+                for scope, sketch in sketches.items():
+                    if scope in live:
+                        _merge(scope, sketch)
+        except Exception:
+            logger.exception("Failed to flush %d visitor sketches; will retry", len(sketches))
+            self._restore(sketches, total)
+            return 0
+        logger.debug("Flushed %d visitor sketches covering %d visits", len(sketches), total)
+        return len(sketches)
+
+    def _restore(self, sketches: Dict[Scope, HyperLogLog], total: int) -> None:
+        with self._lock:
+            for scope, sketch in sketches.items():
+                if scope in self._sketches:
+                    self._sketches[scope].merge(sketch)
+                else:
+                    self._sketches[scope] = sketch
+            self._pending += total
+
+
+def _live_scopes(sketches: Dict[Scope, HyperLogLog]) -> set:
+    """Drop scopes whose special or restaurant was deleted since it was buffered."""
+    user_ids = {user_id for user_id, _, _ in sketches}
+    special_ids = {special_id for _, special_id, _ in sketches if special_id}
+    users = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+    specials = {str(pk) for pk in Special.objects.filter(pk__in=special_ids).values_list("pk", flat=True)}
+    return {
+        scope for scope in sketches
+        if scope[0] in users and (scope[1] is None or scope[1] in specials)
+    }
+
+
+def _merge(scope: Scope, sketch: HyperLogLog) -> None:
+    user_id, special_id, day = scope
+    lookup = {"special_id": special_id} if special_id else {"user_id": user_id, "special__isnull": True, "day": day}
+    row = VisitorSketch.objects.select_for_update().filter(**lookup).first()
+    if row is None:
+        try:
+            with transaction.atomic():
+                VisitorSketch.objects.create(
+                    user_id=user_id, special_id=special_id, day=day, registers=sketch.to_bytes()
+                )
+            return
+        except IntegrityError:
+            # Another worker created the row first; merge into theirs.
+            row = VisitorSketch.objects.select_for_update().get(**lookup)
+    stored = HyperLogLog.from_bytes(row.registers)
+    stored.merge(sketch)
+    row.registers = stored.to_bytes()
+    row.save(update_fields=["registers", "updated_at"])
+
+
+def _union(rows) -> HyperLogLog:
+    sketch = HyperLogLog()
+    for registers in rows:
+        sketch.merge(HyperLogLog.from_bytes(registers))
+    return sketch
+
+
+def special_reach(special) -> int:
+    """Return the estimated number of distinct visitors who saw ``special``."""
+    return _union(VisitorSketch.objects.filter(special=special).values_list("registers", flat=True)).count()
+
+
+def restaurant_reach(user, start: date, end: date) -> int:
+    """Return distinct visitors across all of ``user``'s widgets between two days, inclusive."""
+    rows = VisitorSketch.objects.filter(
+        user=user, special__isnull=True, day__gte=start, day__lte=end
+    ).values_list("registers", flat=True)
+    return _union(rows).count()
+
+
+buffer = SketchBuffer()
+
+
+def record(user_id: int, special_id, visitor: str) -> None:
+    """Record a visit on the shared process-wide buffer."""
+    buffer.record(user_id, special_id, visitor)
+
+
+def flush() -> int:
+    """Flush the shared buffer."""
+    return buffer.flush()
+
+
+atexit.register(flush)
@@ -0,0 +1,148 @@
+"""Run special start/end transitions when they happen instead of polling hourly.
+
+``manage.py run_scheduler`` keeps a min-heap of the upcoming ``start_date`` and
+``end_date`` boundaries of active specials (those within ``SCHEDULER_HORIZON``
+seconds) and sleeps until the earliest one. At each boundary it runs
+:func:`catch_up`. That expires specials past their end
+(``app.cron.unpublish_expired_specials``), activates specials whose start
+falls between the persisted watermark and now, and advances the watermark,
+so after a restart it catches up on anything it missed.
+
+Saving or deleting a special calls :func:`rearm` (``app.signals``), as does
+``app.ai.enhance_specials`` after its ``bulk_update``. This stamps a row in
+the database, so a scheduler on any host notices within ``SCHEDULER_POLL``
+seconds and reloads its heap. The hourly cron job also
+runs :func:`catch_up`, so transitions still happen, at most an hour late,
+when no scheduler is running.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from app import cron, distribution, widget_cache
+from app.models import ScheduleWatermark, Special
+
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = "special-boundaries"
+REARM = "rearm"
+
+
+def _position(name: str) -> Optional[datetime]:
+    return ScheduleWatermark.objects.filter(name=name).values_list("position", flat=True).first()
+
+
+def rearm() -> None:
+    """Tell running schedulers, on any host, that special dates or statuses changed."""
+    ScheduleWatermark.objects.update_or_create(name=REARM, defaults={"position": timezone.now()})
+
+
+def watermark() -> Optional[datetime]:
+    return _position(WATERMARK)
+
+
+def _advance_watermark(position: datetime) -> None:
+    ScheduleWatermark.objects.update_or_create(name=WATERMARK, defaults={"position": position})
+
+
+def activate_started(after: datetime, until: datetime) -> int:
+    """Activate specials whose start falls in ``(after, until]``; return how many.
+
+    Their widget snapshots are dropped and, unless they were already published
+    when they were created, they are queued for publishing to connected channels.
+    """
+    started = list(
+        Special.objects.filter(status="active", start_date__gt=after, start_date__lte=until).only("id", "user_id")
+    )
+    if not started:
+        return 0
+    widget_cache.invalidate_many({s.user_id for s in started})
+    unpublished = set(
+        Special.objects.filter(pk__in=[s.pk for s in started], publications__isnull=True).values_list("pk", flat=True)
+    )
+    for special in started:
+        if special.pk in unpublished:
+            distribution.publish(special)
+    logger.info("Activated %d specials that started after %s", len(started), after.isoformat())
+    return len(started)
+
+
+@dataclass
+class TickReport:
+    """What one scheduler wake-up did."""
+
+    expired: int = 0
+    activated: int = 0
+
+
+def catch_up(now: Optional[datetime] = None) -> TickReport:
+    """Expire overdue specials and activate those started since the watermark, then advance it.
+
+    Run by the scheduler at each boundary and hourly by cron as a backstop.
+    """
+    now = now or timezone.now()
+    since = watermark() or now
+    report = TickReport(
+        expired=cron.unpublish_expired_specials(now=now).expired,
+        activated=activate_started(since, now),
+    )
+    _advance_watermark(now)
+    return report
+
+
+class Scheduler:
+    """Min-heap of upcoming boundaries, reloaded when re-armed or past its horizon."""
+
+    def __init__(self, horizon: Optional[float] = None, poll: Optional[float] = None) -> None:
+        self.horizon = horizon if horizon is not None else getattr(settings, "SCHEDULER_HORIZON", 3600)
+        self.poll = poll if poll is not None else getattr(settings, "SCHEDULER_POLL", 5)
+        self._heap: List[datetime] = []
+        self._loaded_until: Optional[datetime] = None
+        self._armed = None
+
+    def load(self, now: Optional[datetime] = None) -> int:
+        """Rebuild the heap from the database; return how many boundaries it holds."""
+        now = now or timezone.now()
+        self._armed = _position(REARM)
+        self._loaded_until = now + timedelta(seconds=self.horizon)
+        since = watermark()
+        if since is None:
+            since = now
+            _advance_watermark(now)
+        active = Special.objects.filter(status="active").order_by()
+        boundaries = set(active.filter(end_date__lte=self._loaded_until).values_list("end_date", flat=True))
+        boundaries.update(
+            active.filter(start_date__gt=since, start_date__lte=self._loaded_until).values_list("start_date", flat=True)
+        )
+        self._heap = list(boundaries)
+        heapq.heapify(self._heap)
+        return len(self._heap)
+
+    def next_boundary(self) -> Optional[datetime]:
+        return self._heap[0] if self._heap else None
+
+    def seconds_until_next(self, now: Optional[datetime] = None) -> float:
+        """How long to sleep before the next :meth:`tick`, capped at the poll interval."""
+        now = now or timezone.now()
+        wake = min(d for d in (self.next_boundary(), self._loaded_until) if d is not None)
+        # Boundaries fire once strictly passed, matching ``end_date < now`` in the expiry query.
+        return max(0.0, min(self.poll, (wake - now).total_seconds() + 0.01))
+
+    def tick(self, now: Optional[datetime] = None) -> Optional[TickReport]:
+        """Fire transitions whose boundary has passed and reload the heap if needed."""
+        now = now or timezone.now()
+        if self._loaded_until is None or now >= self._loaded_until or _position(REARM) != self._armed:
+            self.load(now)
+        if not self._heap or self._heap[0] >= now:
+            return None
+        while self._heap and self._heap[0] < now:
+            heapq.heappop(self._heap)
+        return catch_up(now)
@@ -0,0 +1,38 @@
+"""Model signal receivers, connected in ``AppConfig.ready``."""
+from __future__ import annotations
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app import scheduler, widget_cache
+from app.models import Special
+
+
+def _invalidate_widget(user_id) -> None:
+    # Drop now for this request and again after commit, in case a widget read
+    # re-cached the old rows before the transaction finished.
+    widget_cache.invalidate(user_id)
+    transaction.on_commit(lambda: widget_cache.invalidate(user_id))
+
+
+# Saves limited to other fields cannot move a start or end boundary.
+SCHEDULE_FIELDS = {"start_date", "end_date", "status"}
+
+
+@receiver(post_save, sender=Special, dispatch_uid="widget_special_saved")
+@receiver(post_delete, sender=Special, dispatch_uid="widget_special_deleted")
+def special_changed(sender, instance, **kwargs):
+    _invalidate_widget(instance.user_id)
+    update_fields = kwargs.get("update_fields")
+    if update_fields is None or SCHEDULE_FIELDS & set(update_fields):
+        # After commit, so a scheduler that reloads at once sees the new dates.
+        transaction.on_commit(scheduler.rearm)
+
+
+@receiver(post_save, sender=User, dispatch_uid="widget_user_saved")
+def user_changed(sender, instance, created, **kwargs):
+    # The widget shows the username as the restaurant name.
+    if not created:
+        _invalidate_widget(instance.pk)
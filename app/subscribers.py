@@ -0,0 +1,226 @@
+"""Bulk import and export of a restaurant's email subscribers as CSV.
+
+Both directions stream: imports are validated and inserted in chunks, and
+exports are generated row by row from a server-side iterator, so list size
+never dictates memory use.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from app.models import EmailSignup
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_HEADER = ("email", "special", "signed_up_at", "is_active")
+# Spreadsheet apps evaluate cells starting with these as formulas.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+MAX_REPORTED_ERRORS = 20
+
+
+@dataclass
+class ImportReport:
+    """Running totals for one import."""
+
+    rows: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+        }
+
+
+def normalize_email(email: str) -> str:
+    """Canonical form used for storage and duplicate checks: trimmed and lowercased."""
+    return email.strip().lower()
+
+
+def _chunk_size(name: str, default: int) -> int:
+    return getattr(settings, name, default)
+
+
+def _email_column(header: List[str]) -> Optional[int]:
+    for index, cell in enumerate(header):
+        if cell.strip().lower() in ("email", "e-mail", "email address"):
+            return index
+    return None
+
+
+def import_csv(
+    user,
+    lines: Iterable[str],
+    chunk_size: Optional[int] = None,
+    progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """Import subscribers for ``user`` from CSV text ``lines``.
+
+    The email is read from an ``email`` column when the first row is a
+    header, otherwise from the first column. Addresses are validated and
+    de-duplicated within the file, then inserted lowercased ``chunk_size`` at
+    a time; addresses already subscribed in any letter case are skipped.
+    ``progress`` is called with the running report after every chunk.
+    """
+    chunk_size = chunk_size or _chunk_size("SUBSCRIBER_IMPORT_CHUNK_SIZE", 1000)
+    report = ImportReport()
+    reader = csv.reader(lines)
+    column = 0
+    seen = set()
+    chunk: List[str] = []
+
+    for line_no, row in enumerate(reader, start=1):
+        if line_no == 1:
+            header_column = _email_column(row)
+            if header_column is not None:
+                column = header_column
+                continue
+        if not any(cell.strip() for cell in row):
+            continue
+        report.rows += 1
+        email = row[column].strip() if column < len(row) else ""
+        try:
+            validate_email(email)
+        except ValidationError:
+            report.invalid += 1
+            if len(report.errors) < MAX_REPORTED_ERRORS:
+                report.errors.append((line_no, email))
+            continue
+        email = normalize_email(email)
+        if email in seen:
+            report.duplicates += 1
+            continue
+        seen.add(email)
+        chunk.append(email)
+        if len(chunk) >= chunk_size:
+            _insert_chunk(user, chunk, report)
+            chunk = []
+            if progress:
+                progress(report)
+
+    if chunk:
+        _insert_chunk(user, chunk, report)
+    if progress:
+        progress(report)
+    logger.info(
+        "Imported %d of %d subscriber rows for %s (%d duplicates, %d invalid)",
+        report.created, report.rows, user, report.duplicates, report.invalid,
+    )
+    return report
+
+
+def _insert_chunk(user, emails: List[str], report: ImportReport) -> None:
+    """Insert the normalized ``emails`` that ``user`` does not have yet.
+
+    Older rows may be stored in mixed case, so existing rows are matched on
+    their lowercased address. ``ignore_conflicts`` skips rows inserted
+    concurrently since the lookup, so the new rows are counted afterwards by
+    their client-generated primary keys.
+    """
+    existing = set(
+        EmailSignup.objects.filter(restaurant=user)
+        .annotate(key=Lower("email"))
+        .filter(key__in=emails)
+        .values_list("key", flat=True)
+    )
+    new = [EmailSignup(restaurant=user, email=email) for email in emails if email not in existing]
+    EmailSignup.objects.bulk_create(new, ignore_conflicts=True)
+    created = EmailSignup.objects.filter(pk__in=[signup.pk for signup in new]).count() if new else 0
+    report.created += created
+    report.duplicates += len(emails) - created
+
+
+def keyset_pages(queryset, *fields: str, chunk_size: int = 1000, after=None) -> Iterator[List[tuple]]:
+    """Yield ``(signed_up_at, pk, *fields)`` rows of ``queryset`` in signup order, one page per query.
+
+    Each page is fetched with ``(signed_up_at, pk) > last ... LIMIT
+    chunk_size``, so the cost of a page does not grow with its position and
+    nothing is cached between pages. Rows added while paging sort after the
+    current position and are still reached. Start after a known
+    ``(signed_up_at, pk)`` with ``after``.
+    """
+    last = after
+    while True:
+        page_qs = queryset
+        if last is not None:
+            signed_up_at, pk = last
+            page_qs = queryset.filter(Q(signed_up_at__gt=signed_up_at) | Q(signed_up_at=signed_up_at, pk__gt=pk))
+        page = list(page_qs.order_by("signed_up_at", "pk").values_list("signed_up_at", "pk", *fields)[:chunk_size])
+        if not page:
+            return
+        yield page
+        if len(page) < chunk_size:
+            return
+        last = page[-1][:2]
+
+
+def active_pages(restaurant, chunk_size: Optional[int] = None, after=None) -> Iterator[List[Tuple]]:
+    """Yield pages of ``(signed_up_at, id, email)`` for ``restaurant``'s active subscribers.
+
+    ``restaurant`` is a user or user id. Served by the
+    ``(restaurant, signed_up_at, id)`` index.
+    """
+    queryset = EmailSignup.objects.filter(restaurant=restaurant, is_active=True)
+    return keyset_pages(
+        queryset, "email", chunk_size=chunk_size or _chunk_size("SUBSCRIBER_PAGE_SIZE", 1000), after=after
+    )
+
+
+def iter_active(restaurant, chunk_size: Optional[int] = None) -> Iterator[Tuple]:
+    """Yield ``(signed_up_at, id, email)`` for each of ``restaurant``'s active subscribers."""
+    for page in active_pages(restaurant, chunk_size):
+        yield from page
+
+
+def _cell(value: str) -> str:
+    """Quote ``value`` so spreadsheets show it as text rather than run it as a formula."""
+    return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the formatted line back."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(user) -> Iterator[str]:
+    """Yield ``user``'s subscribers as CSV lines, header first."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    pages = keyset_pages(
+        EmailSignup.objects.filter(restaurant=user),
+        "email", "special__title", "is_active",
+        chunk_size=_chunk_size("SUBSCRIBER_EXPORT_CHUNK_SIZE", 2000),
+    )
+    for page in pages:
+        for signed_up_at, _, email, special, is_active in page:
+            yield writer.writerow(
+                [_cell(email), _cell(special or ""), signed_up_at.isoformat(), "yes" if is_active else "no"]
+            )
+
+
+def export_response(user) -> StreamingHttpResponse:
+    """Return a streaming CSV download of ``user``'s subscribers."""
+    response = StreamingHttpResponse(export_rows(user), content_type="text/csv")
+    filename = f"subscribers-{timezone.now():%Y-%m-%d}.csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
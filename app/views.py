@@ -3,17 +3,24 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse, HttpResponseRedirect
+from django.http import JsonResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.core.exceptions import ValidationError
 from django.core.mail import send_mail
+from django.core.validators import validate_email
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count, F
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from django.urls import reverse
+import io
 import json
-import openai
 import os
+import uuid
+from collections import Counter
+from datetime import timedelta
 
 import requests
 import stripe
@@ -33,6 +40,8 @@ from .models import (
     Transaction,
 )
 from .forms import SpecialForm
+from app import ai, ai_gateway, analytics, bundles, counters, distribution, emails, llm_cache, metering, reach, subscribers, widget_cache
+from app.emails import send_special_notification
 from app.integrations.google import *
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
@@ -41,6 +50,8 @@ from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods, require_POST
+from django.utils.cache import get_conditional_response, patch_cache_control, set_response_etag
+from django.utils.http import http_date
 
 logger = logging.getLogger(__name__)
 
@@ -137,6 +148,7 @@ def dashboard(request):
     active_specials = Special.objects.filter(user=request.user, status='active')
 
     total_email_signups = EmailSignup.objects.filter(restaurant=request.user).count()
+    today = timezone.now().date()
     total_email_signups_from_specials = sum(special.email_signups for special in active_specials)
 
     stats = {
@@ -144,11 +156,13 @@ def dashboard(request):
         'views': sum(special.views for special in active_specials),
         'clicks': sum(special.clicks for special in active_specials),
         'email_signups': total_email_signups,
+        'unique_visitors': reach.restaurant_reach(request.user, today - timedelta(days=29), today),
     }
 
     context = {
         'specials': active_specials[:3],  # Latest 3 active specials
         'stats': stats,
+        'views_chart': analytics.chart(analytics.recent_days(request.user), 'views'),
         'show_location_modal': show_location_modal,
         'google_locations': locations,
     }
@@ -461,61 +475,165 @@ def create_special(request):
             image=image,
             status='active'
         )
-        # Send email notifications to subscribers
+        # Queue email notifications to subscribers (delivered by run_jobs)
         send_special_notification(special)
-        # Publish to Google if connected
-        publish_special(special)
+        # Queue publishing to connected channels (Google, ...); run_jobs does the API calls.
+        # Specials that start later are published by the scheduler when they start.
+        special.refresh_from_db(fields=["start_date"])
+        if special.start_date <= timezone.now():
+            distribution.publish(special)
         
         messages.success(request, 'Special created successfully!')
         return redirect('specials_list')
     
     return render(request, 'app/create.html')
 
+
+ENHANCE_MODEL = "gpt-4o"
+ENHANCE_PARAMS = {"max_tokens": 200, "temperature": 0.7}
+
+
+def _enhance_messages(title, description, price):
+    return [
+        {
+            "role": "system",
+            "content": "You are a restaurant marketing expert. Enhance the description of daily specials to be more appetizing and compelling while keeping them concise. Focus on sensory details, cooking methods, and what makes the dish special. Return only the enhanced description."
+        },
+        {
+            "role": "user",
+            "content": f"""Enhance this restaurant special description:
+                        
+Title: {title}
+Current Description: {description}
+Price: ${price}
+
+Make it more appealing and mouth-watering while keeping it under 150 characters. Focus on ingredients, preparation, and what makes it special."""
+        }
+    ]
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_enhancement(messages, tenant=None):
+    """Yield server-sent events: ``delta`` per model token chunk, then ``done`` (or ``error``)."""
+    cached = llm_cache.lookup(ENHANCE_MODEL, messages, **ENHANCE_PARAMS)
+    if cached is not None:
+        yield _sse("delta", {"text": cached.text})
+        yield _sse("done", {"description": cached.text, "cached": True})
+        return
+    parts = []
+    usage = None
+    try:
+        stream = ai_gateway.stream_chat(ENHANCE_MODEL, messages, tenant=tenant, **ENHANCE_PARAMS)
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                parts.append(text)
+                yield _sse("delta", {"text": text})
+    except metering.BudgetExceeded as e:
+        yield _sse("error", {"error": str(e), "retry_after": e.retry_after})
+        return
+    except Exception as e:
+        yield _sse("error", {"error": str(e)})
+        return
+    description = "".join(parts).strip()
+    llm_cache.store(
+        ENHANCE_MODEL,
+        messages,
+        llm_cache.CachedResponse(
+            description,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        ),
+        **ENHANCE_PARAMS,
+    )
+    yield _sse("done", {"description": description, "cached": False})
+
+
+def _budget_exceeded(error):
+    response = JsonResponse({'error': str(error), 'retry_after': error.retry_after}, status=429)
+    response['Retry-After'] = str(error.retry_after)
+    return response
+
+
 @login_required
 @csrf_exempt
 def enhance_description(request):
-    """Enhance description using OpenAI"""
+    """Enhance description using OpenAI.
+
+    With ``"stream": true`` in the body the reply is a ``text/event-stream``
+    that forwards the model's tokens as they are generated.
+    """
     if request.method == 'POST':
         data = json.loads(request.body)
         title = data.get('title')
         description = data.get('description')
         price = data.get('price')
         
-        if not os.getenv("OPENAI_API_KEY"):
+        if not ai_gateway.is_configured():
             return JsonResponse({'error': 'OpenAI API key not configured'})
         
-        try:
-            client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a restaurant marketing expert. Enhance the description of daily specials to be more appetizing and compelling while keeping them concise. Focus on sensory details, cooking methods, and what makes the dish special. Return only the enhanced description."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""Enhance this restaurant special description:
-                        
-Title: {title}
-Current Description: {description}
-Price: ${price}
-
-Make it more appealing and mouth-watering while keeping it under 150 characters. Focus on ingredients, preparation, and what makes it special."""
-                    }
-                ],
-                max_tokens=200,
-                temperature=0.7,
+        messages = _enhance_messages(title, description, price)
+
+        if data.get('stream'):
+            response = StreamingHttpResponse(_stream_enhancement(messages, request.user), content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'  # let nginx pass events through unbuffered
+            return response
+
+        def complete():
+            response = ai_gateway.chat(ENHANCE_MODEL, messages, tenant=request.user, **ENHANCE_PARAMS)
+            usage = getattr(response, "usage", None)
+            return llm_cache.CachedResponse(
+                response.choices[0].message.content.strip(),
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
             )
-            
-            enhanced_description = response.choices[0].message.content.strip()
-            return JsonResponse({'description': enhanced_description})
-            
+
+        try:
+            # Identical title/description/price requests are answered from the cache.
+            result = llm_cache.get_or_compute(ENHANCE_MODEL, messages, complete, **ENHANCE_PARAMS)
+            return JsonResponse({'description': result.text, 'cached': result.cached})
+        except metering.BudgetExceeded as e:
+            return _budget_exceeded(e)
         except Exception as e:
             return JsonResponse({'error': str(e)})
     
     return JsonResponse({'error': 'Invalid request method'})
 
+@login_required
+@require_POST
+def enhance_specials(request):
+    """Enhance several of the owner's specials with batched AI requests."""
+    try:
+        special_ids = [str(uuid.UUID(str(pk))) for pk in json.loads(request.body).get('special_ids', [])]
+    except (ValueError, AttributeError, TypeError):
+        return JsonResponse({'error': 'Invalid special ids'}, status=400)
+    if not ai_gateway.is_configured():
+        return JsonResponse({'error': 'OpenAI API key not configured'})
+    specials = Special.objects.filter(user=request.user, pk__in=special_ids)
+    try:
+        metering.check_budget(request.user)
+        updated = ai.enhance_specials(specials)
+    except metering.BudgetExceeded as e:
+        return _budget_exceeded(e)
+    return JsonResponse({'updated': [
+        {
+            'id': str(special.id),
+            'title': special.title,
+            'description': special.description,
+            'price': str(special.price),
+            'start_date': special.start_date.isoformat(),
+            'end_date': special.end_date.isoformat(),
+        }
+        for special in updated
+    ]})
+
 @login_required
 def connections(request):
     """Manage platform connections"""
@@ -610,314 +728,214 @@ def logout_view(request):
     return redirect('home')
 
 # Widget System Views
+def _conditional_response(request, response, max_age, last_modified=None):
+    """Add caching headers to ``response`` and answer 304 when the client is current.
+
+    The response must already carry an ``ETag``.
+    """
+    patch_cache_control(response, public=True, max_age=max_age)
+    timestamp = None
+    if last_modified:
+        timestamp = int(last_modified.timestamp())
+        response.headers['Last-Modified'] = http_date(timestamp)
+    return get_conditional_response(
+        request, etag=response.headers['ETag'], last_modified=timestamp, response=response
+    )
+
+
 def widget_special(request, user_id):
-    """API endpoint for widget to get today's special"""
+    """API endpoint for widget to get today's special.
+
+    Responses are cacheable; impressions are recorded separately through
+    ``widget_events``.
+    """
     try:
-        user = get_object_or_404(User, id=user_id)
-        # Get today's active special
-        from django.utils import timezone
-        now = timezone.now()
-        special = Special.objects.filter(
-            user=user,
-            status='active',
-            start_date__lte=now,
-            end_date__gte=now
-        ).first()
-        
+        snapshot = widget_cache.get_snapshot(user_id)
+        if snapshot is None:
+            return JsonResponse({'error': 'Restaurant not found'}, status=404)
+
+        special = snapshot['special']
         if special:
-            # Increment view count
-            special.views += 1
-            special.save()
-            
-            data = {
-                'id': str(special.id),
-                'title': special.title,
-                'description': special.description,
-                'price': str(special.price),
-                'image': request.build_absolute_uri(special.image.url) if special.image else None,
-                'cta_type': special.cta_type,
-                'cta_url': special.cta_url,
-                'cta_phone': special.cta_phone,
-                'restaurant_name': user.username,
-            }
-            return JsonResponse({'special': data})
+            data = dict(special)
+            if data['image']:
+                data['image'] = request.build_absolute_uri(data['image'])
+            response = JsonResponse({'special': data, 'restaurant_name': snapshot['restaurant_name']})
         else:
-            return JsonResponse({'special': None})
+            response = JsonResponse({'special': None, 'restaurant_name': snapshot['restaurant_name']})
+
+        max_age = getattr(settings, 'WIDGET_SPECIAL_MAX_AGE', 60)
+        if snapshot['expires_at']:
+            remaining = (snapshot['expires_at'] - timezone.now()).total_seconds()
+            max_age = max(0, min(max_age, int(remaining)))
+        response.headers['ETag'] = f'"{snapshot["etag"]}"'
+        return _conditional_response(request, response, max_age, snapshot['last_modified'])
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+
+# Widget event type -> Special counter it increments.
+WIDGET_EVENT_FIELDS = {
+    'view': 'views',
+    'click': 'clicks',
+    'share': 'shares',
+    'signup_open': 'signup_opens',
+}
+MAX_WIDGET_EVENTS = 100
+
+
+@csrf_exempt
+@require_POST
+def widget_events(request, user_id):
+    """Ingest a batch of widget events sent with ``fetch`` or ``sendBeacon``.
+
+    Expects ``{"visitor": "...", "events": [{"type": "view", "special_id": "..."}, ...]}``.
+    Events are validated against the restaurant's specials, coalesced, and
+    added to the counter buffer; nothing is written per event.  Views also
+    feed the unique-reach sketches in ``app.reach``.
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+        events = payload.get('events')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(events, list) or len(events) > MAX_WIDGET_EVENTS:
+        return JsonResponse({'error': f'events must be a list of at most {MAX_WIDGET_EVENTS} items'}, status=400)
+
+    snapshot = widget_cache.get_snapshot(user_id)
+    if snapshot is None:
+        return JsonResponse({'error': 'Restaurant not found'}, status=404)
+
+    totals = Counter()
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        field = WIDGET_EVENT_FIELDS.get(event.get('type'))
+        special_id = event.get('special_id')
+        if not field or not isinstance(special_id, str):
+            continue
+        # Canonical form, so upper case or brace-wrapped ids match the snapshot.
+        try:
+            special_id = str(uuid.UUID(special_id))
+        except ValueError:
+            continue
+        totals[(special_id, field)] += 1
+
+    # The current special is known from the snapshot; anything else is
+    # checked against the database in a single query.
+    known = {snapshot['special']['id']} if snapshot['special'] else set()
+    unknown = {uuid.UUID(special_id) for special_id, _ in totals if special_id not in known}
+    if unknown:
+        known.update(
+            str(pk) for pk in Special.objects.filter(user_id=user_id, pk__in=unknown).values_list('pk', flat=True)
+        )
+
+    accepted = 0
+    visitor = None
+    for (special_id, field), count in totals.items():
+        if special_id in known:
+            counters.incr(special_id, field, count)
+            accepted += count
+            if field == 'views':
+                if visitor is None:
+                    client_id = payload.get('visitor')
+                    visitor = reach.visitor_key(request, client_id if isinstance(client_id, str) else None)
+                reach.record(user_id, special_id, visitor)
+    return JsonResponse({'accepted': accepted}, status=202)
+
+
 @csrf_exempt
 def widget_signup(request, user_id):
-    """Email signup endpoint for widget"""
-    if request.method == 'POST':
+    """Email signup endpoint for widget.
+
+    The insert and the counter bumps run in one transaction. Emails are
+    stored lowercased, so a duplicate ``(restaurant, email)`` is detected by
+    the unique constraint rather than a prior lookup, and counts only move
+    when a row was actually inserted.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    try:
+        data = json.loads(request.body)
+        email = subscribers.normalize_email(data.get('email') or '')
+        special_id = data.get('special_id')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not email:
+        return JsonResponse({'error': 'Email required'}, status=400)
+    try:
+        validate_email(email)
+    except ValidationError:
+        return JsonResponse({'error': 'Invalid email'}, status=400)
+
+    snapshot = widget_cache.get_snapshot(user_id)
+    if snapshot is None:
+        return JsonResponse({'error': 'Restaurant not found'}, status=404)
+    special_id = _owned_special_id(user_id, special_id, snapshot)
+
+    try:
+        created = _record_signup(user_id, email, special_id)
+    except DatabaseError:
+        logger.exception("Widget signup failed for restaurant %s", user_id)
+        return JsonResponse({'error': 'Signup failed, please try again'}, status=503)
+    return JsonResponse({'success': True, 'created': created})
+
+
+def _owned_special_id(user_id, special_id, snapshot):
+    """Return ``special_id`` as a string if it belongs to ``user_id``, else ``None``."""
+    if not isinstance(special_id, str) or not special_id:
+        return None
+    if snapshot['special'] and snapshot['special']['id'] == special_id:
+        return special_id
+    try:
+        pk = uuid.UUID(special_id)
+    except ValueError:
+        return None
+    return str(pk) if Special.objects.filter(pk=pk, user_id=user_id).exists() else None
+
+
+def _record_signup(user_id, email, special_id):
+    """Insert a signup unless one exists; return whether a row was inserted."""
+    with transaction.atomic():
+        # Write first so the transaction holds SQLite's write lock from its
+        # first statement instead of upgrading from a read lock.
         try:
-            data = json.loads(request.body)
-            email = data.get('email')
-            special_id = data.get('special_id')
-            
-            if not email:
-                return JsonResponse({'error': 'Email required'}, status=400)
-                
-            user = get_object_or_404(User, id=user_id)
-            special = None
-            if special_id:
-                special = Special.objects.filter(id=special_id, user=user).first()
-            
-            # Create or get email signup
-            signup, created = EmailSignup.objects.get_or_create(
-                restaurant=user,
-                email=email,
-                defaults={'special': special}
-            )
-            
-            if created and special:
-                # Increment email signup count on special
-                special.email_signups += 1
-                special.save()
-                
-            return JsonResponse({'success': True, 'created': created})
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    return JsonResponse({'error': 'POST required'}, status=405)
+            with transaction.atomic():
+                signup = EmailSignup.objects.create(restaurant_id=user_id, email=email, special_id=special_id)
+        except IntegrityError:
+            return False
+        # Rows stored before emails were lowercased are matched case-insensitively.
+        legacy = EmailSignup.objects.filter(restaurant_id=user_id, email__iexact=email).exclude(pk=signup.pk)
+        if legacy.exists():
+            transaction.set_rollback(True)
+            return False
+        if special_id:
+            Special.objects.filter(pk=special_id).update(email_signups=F('email_signups') + 1)
+            analytics.fold({(special_id, analytics.hour_bucket(timezone.now())): {'email_signups': 1}})
+    return True
+
+
+WIDGET_BOOTSTRAP = """(function(){var s=document.createElement('script');s.src=%(src)s;s.async=true;%(data)sdocument.head.appendChild(s);})();
+"""
+
+
+def _widget_bootstrap(request, **data):
+    """Return a tiny script that loads the shared widget bundle with ``data`` attributes."""
+    src = request.build_absolute_uri(bundles.bundle_url("widget/appertivo-widget.js"))
+    code = WIDGET_BOOTSTRAP % {
+        "src": json.dumps(src),
+        "data": "".join(f"s.dataset.{key}={json.dumps(value)};" for key, value in data.items()),
+    }
+    response = HttpResponse(code, content_type='application/javascript')
+    set_response_etag(response)
+    return _conditional_response(request, response, getattr(settings, 'WIDGET_JS_MAX_AGE', 3600))
+
 
 def widget_js(request, user_id):
-    """Generate JavaScript widget code"""
-    user = get_object_or_404(User, id=user_id)
-    restaurant_name = user.username
-
-    widget_code = f"""
-(function() {{
-    const WIDGET_API_URL = 'https://appertivo.com/widget/';
-    const USER_ID = '{user_id}';
-    const RESTAURANT_NAME = '{restaurant_name}';
-
-    function createWidget() {{
-        const widgetContainer = document.getElementById('appertivo-widget');
-        if (!widgetContainer) return;
-
-        // Widget styles
-        const style = document.createElement('style');
-        style.textContent = `
-            .appertivo-widget-button {{
-                position: fixed;
-                bottom: 20px;
-                right: 20px;
-                background: #3b82f6;
-                color: white;
-                border: none;
-                padding: 12px 20px;
-                border-radius: 9999px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                cursor: pointer;
-                z-index: 9999;
-            }}
-            .appertivo-widget-panel {{
-                position: fixed;
-                bottom: 80px;
-                right: 20px;
-                width: 320px;
-                background: white;
-                border-radius: 12px;
-                box-shadow: 0 10px 15px rgba(0, 0, 0, 0.1);
-                display: none;
-                z-index: 9999;
-            }}
-            .appertivo-widget {{
-                max-width: 400px;
-                background: white;
-                border-radius: 12px;
-                box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-                overflow: hidden;
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-            }}
-            .appertivo-header {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 16px;
-                text-align: center;
-            }}
-            .appertivo-content {{
-                padding: 20px;
-            }}
-            .appertivo-special {{
-                text-align: center;
-            }}
-            .appertivo-image {{
-                width: 100%;
-                height: 200px;
-                object-fit: cover;
-                border-radius: 8px;
-                margin-bottom: 12px;
-            }}
-            .appertivo-title {{
-                font-size: 20px;
-                font-weight: bold;
-                margin-bottom: 8px;
-                color: #1f2937;
-            }}
-            .appertivo-description {{
-                color: #6b7280;
-                margin-bottom: 12px;
-                line-height: 1.5;
-            }}
-            .appertivo-price {{
-                font-size: 24px;
-                font-weight: bold;
-                color: #059669;
-                margin-bottom: 16px;
-            }}
-            .appertivo-cta {{
-                display: inline-block;
-                background: #3b82f6;
-                color: white;
-                padding: 12px 24px;
-                border-radius: 8px;
-                text-decoration: none;
-                font-weight: 500;
-                margin-bottom: 16px;
-            }}
-            .appertivo-signup {{
-                border-top: 1px solid #e5e7eb;
-                padding-top: 16px;
-                margin-top: 16px;
-            }}
-            .appertivo-signup-form {{
-                display: flex;
-                gap: 8px;
-            }}
-            .appertivo-email {{
-                flex: 1;
-                padding: 10px;
-                border: 1px solid #d1d5db;
-                border-radius: 6px;
-                font-size: 14px;
-            }}
-            .appertivo-subscribe {{
-                background: #059669;
-                color: white;
-                border: none;
-                padding: 10px 16px;
-                border-radius: 6px;
-                cursor: pointer;
-                font-weight: 500;
-            }}
-            .appertivo-no-special {{
-                text-align: center;
-                padding: 40px 20px;
-                color: #6b7280;
-            }}
-        `;
-        document.head.appendChild(style);
-
-        widgetContainer.className = 'appertivo-widget-panel';
-        widgetContainer.style.display = 'none';
-        document.body.appendChild(widgetContainer);
-
-        const launcher = document.createElement('button');
-        launcher.className = 'appertivo-widget-button';
-        launcher.textContent = "Today's Special";
-        launcher.addEventListener('click', () => {{
-            widgetContainer.style.display = widgetContainer.style.display === 'none' || !widgetContainer.style.display ? 'block' : 'none';
-        }});
-        document.body.appendChild(launcher);
-
-        // Fetch today's special
-        fetch(WIDGET_API_URL + USER_ID + '/special/')
-            .then(response => response.json())
-            .then(data => {{
-                if (data.special) {{
-                    const special = data.special;
-                    widgetContainer.innerHTML = `
-                        <div class="appertivo-widget">
-                            <div class="appertivo-header">
-                                <h3>Today's Special at ${{special.restaurant_name}}</h3>
-                            </div>
-                            <div class="appertivo-content">
-                                <div class="appertivo-special">
-                                    ${{special.image ? `<img src="${{special.image}}" alt="${{special.title}}" class="appertivo-image">` : ''}}
-                                    <div class="appertivo-title">${{special.title}}</div>
-                                    <div class="appertivo-description">${{special.description}}</div>
-                                    <div class="appertivo-price">$${{special.price}}</div>
-                                    ${{special.cta_type === 'web' && special.cta_url ? 
-                                        `<a href="${{special.cta_url}}" class="appertivo-cta" target="_blank">Order Online</a>` :
-                                        special.cta_type === 'call' && special.cta_phone ? 
-                                        `<a href="tel:${{special.cta_phone}}" class="appertivo-cta">Call to Order</a>` : ''
-                                    }}
-                                </div>
-                                <div class="appertivo-signup">
-                                    <p style="margin-bottom: 8px; font-size: 14px; color: #6b7280;">
-                                        Get notified about future specials:
-                                    </p>
-                                    <form class="appertivo-signup-form" onsubmit="submitSignup(event, '${{special.id}}')">
-                                        <input type="email" class="appertivo-email" placeholder="Enter your email" required>
-                                        <button type="submit" class="appertivo-subscribe">Subscribe</button>
-                                    </form>
-                                </div>
-                            </div>
-                        </div>
-                    `;
-                }} else {{
-                    widgetContainer.innerHTML = `
-                        <div class="appertivo-widget">
-                            <div class="appertivo-header">
-                                <h3>${{RESTAURANT_NAME}}</h3>
-                            </div>
-                            <div class="appertivo-no-special">
-                                <p>No special available today.</p>
-                                <p>Check back soon!</p>
-                            </div>
-                        </div>
-                    `;
-                }}
-            }})
-            .catch(err => {{
-                console.error('Widget error:', err);
-                widgetContainer.innerHTML = '<p>Unable to load special</p>';
-            }});
-    }}
-    
-    window.submitSignup = function(event, specialId) {{
-        event.preventDefault();
-        const email = event.target.querySelector('.appertivo-email').value;
-        
-        fetch(WIDGET_API_URL + USER_ID + '/signup/', {{
-            method: 'POST',
-            headers: {{
-                'Content-Type': 'application/json',
-            }},
-            body: JSON.stringify({{
-                email: email,
-                special_id: specialId
-            }})
-        }})
-        .then(response => response.json())
-        .then(data => {{
-            if (data.success) {{
-                event.target.innerHTML = `
-                    <div style="text-align: center; color: #059669; font-weight: 500;">
-                        ✓ Successfully subscribed!
-                    </div>
-                `;
-            }} else {{
-                alert('Signup failed: ' + (data.error || 'Unknown error'));
-            }}
-        }})
-        .catch(err => {{
-            console.error('Signup error:', err);
-            alert('Signup failed');
-        }});
-    }};
-    
-    // Initialize when DOM is ready
-    if (document.readyState === 'loading') {{
-        document.addEventListener('DOMContentLoaded', createWidget);
-    }} else {{
-        createWidget();
-    }}
-}})();
-"""
-    return HttpResponse(widget_code, content_type='application/javascript')
+    """Bootstrap script that loads the widget bundle for one restaurant."""
+    if widget_cache.get_snapshot(user_id) is None:
+        return HttpResponse(status=404)
+    api = getattr(settings, 'WIDGET_API_URL', 'https://appertivo.com/widget/')
+    return _widget_bootstrap(request, restaurant=str(user_id), api=api)
 
 @login_required
 def widget_setup(request):
@@ -927,134 +945,73 @@ def widget_setup(request):
 
 from datetime import datetime
 
-def send_special_notification(special):
-    """Send email notifications to all subscribers when a new special is published"""
-    subscribers = EmailSignup.objects.filter(restaurant=special.user, is_active=True)
-    from django.utils.dateparse import parse_datetime, parse_date
-
-    start = parse_datetime(special.start_date) or parse_date(special.start_date)
-    end = parse_datetime(special.end_date) or parse_date(special.end_date)
-    if not subscribers.exists():
-        return
-    
-    restaurant_name = special.user.profile.restaurant_name if hasattr(special.user, 'profile') else special.user.username
-    
-    # Prepare email content
-    subject = f"🍽️ New Special at {restaurant_name}: {special.title}"
-    
-    # Create HTML email template
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <style>
-            body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 8px 8px 0 0; }}
-            .content {{ background: white; padding: 30px; border: 1px solid #e5e7eb; border-top: none; border-radius: 0 0 8px 8px; }}
-            .special-image {{ width: 100%; height: 200px; object-fit: cover; border-radius: 8px; margin-bottom: 20px; }}
-            .special-title {{ font-size: 24px; font-weight: bold; margin-bottom: 15px; color: #1f2937; }}
-            .special-description {{ margin-bottom: 20px; color: #6b7280; }}
-            .special-price {{ font-size: 28px; font-weight: bold; color: #059669; margin-bottom: 25px; }}
-            .cta-button {{ display: inline-block; background: #3b82f6; color: white; padding: 12px 30px; text-decoration: none; border-radius: 8px; font-weight: 500; }}
-            .footer {{ text-align: center; margin-top: 30px; padding: 20px; color: #6b7280; font-size: 14px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>New Special at {restaurant_name}!</h1>
-                <p>Check out what's delicious today</p>
-            </div>
-            <div class="content">
-                {f'<img src="{special.image.url}" alt="{special.title}" class="special-image">' if special.image else ''}
-                <div class="special-title">{special.title}</div>
-                <div class="special-description">{special.description}</div>
-                <div class="special-price">${special.price}</div>
-                
-                {f'<a href="{special.cta_url}" class="cta-button">Order Online</a>' if special.cta_type == 'web' and special.cta_url else ''}
-                {f'<a href="tel:{special.cta_phone}" class="cta-button">Call to Order</a>' if special.cta_type == 'call' and special.cta_phone else ''}
-                
-                <p style="margin-top: 30px; font-size: 14px; color: #6b7280;">
-                    Available from {start} until {end}
-                </p>
-            </div>
-            <div class="footer">
-                <p>You're receiving this because you subscribed to {restaurant_name}'s specials.</p>
-                <p style="font-size: 12px;">Powered by Appertivo</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    # Plain text version
-    text_content = f"""
-    New Special at {restaurant_name}!
-    
-    {special.title}
-    
-    {special.description}
-    
-    Price: ${special.price}
-    
-    {'Order online: ' + special.cta_url if special.cta_type == 'web' and special.cta_url else ''}
-    {'Call to order: ' + special.cta_phone if special.cta_type == 'call' and special.cta_phone else ''}
-    
-    Available from {start} until {end}
-    
-    ---
-    You're receiving this because you subscribed to {restaurant_name}'s specials.
-    Powered by Appertivo
-    """
-    
-    # Send emails to all subscribers
-    emails_sent = 0
-    for subscriber in subscribers:
-        try:
-            from django.core.mail import EmailMultiAlternatives
-            
-            msg = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@appertivo.com',
-                to=[subscriber.email]
-            )
-            msg.attach_alternative(html_content, "text/html")
-            msg.send()
-            emails_sent += 1
-        except Exception as e:
-            print(f"Failed to send email to {subscriber.email}: {e}")
-    
-    print(f"Sent {emails_sent} email notifications for special: {special.title}")
-
 @login_required
 def email_analytics(request):
     """Email analytics page"""
     signups = EmailSignup.objects.filter(restaurant=request.user)
     total_signups = signups.count()
-    
-    # Get signup stats per special
-    specials_stats = []
-    specials = Special.objects.filter(user=request.user).order_by('-created_at')
-    
-    for special in specials:
-        special_signups = signups.filter(special=special).count()
-        specials_stats.append({
+
+    # Signups per special in one grouped query
+    per_special = dict(
+        signups.filter(special__isnull=False).values('special').annotate(n=Count('pk')).values_list('special', 'n')
+    )
+    specials_stats = [
+        {
             'special': special,
-            'signups': special_signups,
-            'total_signups': special.email_signups
-        })
-    
+            'signups': per_special.get(special.pk, 0),
+            'total_signups': special.email_signups,
+        }
+        for special in Special.objects.filter(user=request.user).order_by('-created_at')
+    ]
+
     context = {
         'total_signups': total_signups,
+        'signups_chart': analytics.chart(analytics.recent_days(request.user), 'email_signups'),
         'recent_signups': signups.order_by('-signed_up_at')[:10],
         'specials_stats': specials_stats,
     }
     
     return render(request, 'app/email_analytics.html', context)
 
+@login_required
+def subscribers_export(request):
+    """Download all of the user's subscribers as a streamed CSV."""
+    return subscribers.export_response(request.user)
+
+
+@login_required
+@require_POST
+def subscribers_import(request):
+    """Import subscribers from an uploaded CSV file."""
+    upload = request.FILES.get('file')
+    if not upload:
+        messages.error(request, 'Choose a CSV file to import.')
+        return redirect('email_analytics')
+    lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', errors='replace', newline='')
+    report = subscribers.import_csv(request.user, lines)
+    messages.success(
+        request,
+        f'Imported {report.created} new subscribers '
+        f'({report.duplicates} already subscribed, {report.invalid} invalid).',
+    )
+    return redirect('email_analytics')
+
+@csrf_exempt
+def unsubscribe(request, token):
+    """Unsubscribe link from notification emails.
+
+    GET asks for confirmation so link scanners cannot unsubscribe anyone;
+    POST, including RFC 8058 one-click requests from mail clients, applies it.
+    """
+    signup = emails.signup_from_token(token)
+    if signup is None:
+        return render(request, 'app/unsubscribe.html', {}, status=404)
+    context = {'signup': signup, 'restaurant_name': signup.restaurant.username}
+    if request.method == 'POST':
+        EmailSignup.objects.filter(pk=signup.pk).update(is_active=False)
+        context['done'] = True
+    return render(request, 'app/unsubscribe.html', context)
+
 def demo_widget(request):
     """Demo widget endpoint for homepage visitors"""
     # Create a sample special for demo purposes
@@ -1091,195 +1048,10 @@ def demo_widget_signup(request):
     return JsonResponse({'error': 'POST required'}, status=405)
 
 def demo_widget_js(request):
-    """Generate JavaScript for demo widget"""
-    widget_code = f"""
-(function() {{
-    const WIDGET_API_URL = '{request.build_absolute_uri("/demo-widget/")}';
-    const RESTAURANT_NAME = 'Demo Restaurant';
-
-    function createDemoWidget() {{
-        const widgetContainer = document.getElementById('appertivo-demo-widget');
-        if (!widgetContainer) return;
-        
-        // Widget styles
-        const style = document.createElement('style');
-        style.textContent = `
-            .appertivo-widget {{
-                max-width: 400px;
-                background: white;
-                border-radius: 12px;
-                box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-                overflow: hidden;
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-                margin: 0 auto;
-            }}
-            .appertivo-header {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 16px;
-                text-align: center;
-            }}
-            .appertivo-content {{
-                padding: 20px;
-            }}
-            .appertivo-special {{
-                text-align: center;
-            }}
-            .appertivo-image {{
-                width: 100%;
-                height: 200px;
-                object-fit: cover;
-                border-radius: 8px;
-                margin-bottom: 12px;
-            }}
-            .appertivo-title {{
-                font-size: 20px;
-                font-weight: bold;
-                margin-bottom: 8px;
-                color: #1f2937;
-            }}
-            .appertivo-description {{
-                color: #6b7280;
-                margin-bottom: 12px;
-                line-height: 1.5;
-            }}
-            .appertivo-price {{
-                font-size: 24px;
-                font-weight: bold;
-                color: #059669;
-                margin-bottom: 16px;
-            }}
-            .appertivo-cta {{
-                display: inline-block;
-                background: #3b82f6;
-                color: white;
-                padding: 12px 24px;
-                border-radius: 8px;
-                text-decoration: none;
-                font-weight: 500;
-                margin-bottom: 16px;
-            }}
-            .appertivo-signup {{
-                border-top: 1px solid #e5e7eb;
-                padding-top: 16px;
-                margin-top: 16px;
-            }}
-            .appertivo-signup-form {{
-                display: flex;
-                gap: 8px;
-            }}
-            .appertivo-email {{
-                flex: 1;
-                padding: 10px;
-                border: 1px solid #d1d5db;
-                border-radius: 6px;
-                font-size: 14px;
-            }}
-            .appertivo-subscribe {{
-                background: #059669;
-                color: white;
-                border: none;
-                padding: 10px 16px;
-                border-radius: 6px;
-                cursor: pointer;
-                font-weight: 500;
-            }}
-            .appertivo-demo-badge {{
-                position: absolute;
-                top: 8px;
-                right: 8px;
-                background: #f59e0b;
-                color: white;
-                padding: 4px 8px;
-                border-radius: 4px;
-                font-size: 12px;
-                font-weight: 500;
-            }}
-        `;
-        document.head.appendChild(style);
-        
-        // Fetch demo special
-        fetch(WIDGET_API_URL + 'special/')
-            .then(response => response.json())
-            .then(data => {{
-                if (data.special) {{
-                    const special = data.special;
-                    widgetContainer.innerHTML = `
-                        <div class="appertivo-widget" style="position: relative;">
-                            <div class="appertivo-demo-badge">DEMO</div>
-                            <div class="appertivo-header">
-                                <h3>Today's Special at ${{special.restaurant_name}}</h3>
-                            </div>
-                            <div class="appertivo-content">
-                                <div class="appertivo-special">
-                                    ${{special.image ? `<img src="${{special.image}}" alt="${{special.title}}" class="appertivo-image">` : ''}}
-                                    <div class="appertivo-title">${{special.title}}</div>
-                                    <div class="appertivo-description">${{special.description}}</div>
-                                    <div class="appertivo-price">$${{special.price}}</div>
-                                    ${{special.cta_type === 'web' && special.cta_url ? 
-                                        `<a href="#" onclick="alert('This is a demo - button would normally link to ordering page'); return false;" class="appertivo-cta">Order Online</a>` :
-                                        special.cta_type === 'call' && special.cta_phone ? 
-                                        `<a href="#" onclick="alert('This is a demo - button would normally call restaurant'); return false;" class="appertivo-cta">Call to Order</a>` : ''
-                                    }}
-                                </div>
-                                <div class="appertivo-signup">
-                                    <p style="margin-bottom: 8px; font-size: 14px; color: #6b7280;">
-                                        Get notified about future specials:
-                                    </p>
-                                    <form class="appertivo-signup-form" onsubmit="submitDemoSignup(event, '${{special.id}}')">
-                                        <input type="email" class="appertivo-email" placeholder="Enter your email" required>
-                                        <button type="submit" class="appertivo-subscribe">Subscribe</button>
-                                    </form>
-                                </div>
-                            </div>
-                        </div>
-                    `;
-                }}
-            }})
-            .catch(err => {{
-                console.error('Demo widget error:', err);
-                widgetContainer.innerHTML = '<p>Unable to load demo widget</p>';
-            }});
-    }}
-    
-    window.submitDemoSignup = function(event, specialId) {{
-        event.preventDefault();
-        const email = event.target.querySelector('.appertivo-email').value;
-        
-        fetch(WIDGET_API_URL + 'signup/', {{
-            method: 'POST',
-            headers: {{
-                'Content-Type': 'application/json',
-            }},
-            body: JSON.stringify({{
-                email: email,
-                special_id: specialId
-            }})
-        }})
-        .then(response => response.json())
-        .then(data => {{
-            if (data.success) {{
-                event.target.innerHTML = `
-                    <div style="text-align: center; color: #059669; font-weight: 500;">
-                        ✓ Demo signup successful! (Not actually saved)
-                    </div>
-                `;
-            }} else {{
-                alert('Demo signup failed');
-            }}
-        }})
-        .catch(err => {{
-            console.error('Demo signup error:', err);
-            alert('Demo signup failed');
-        }});
-    }};
-    
-    // Initialize when DOM is ready
-    if (document.readyState === 'loading') {{
-        document.addEventListener('DOMContentLoaded', createDemoWidget);
-    }} else {{
-        createDemoWidget();
-    }}
-}})();
-"""
-    return HttpResponse(widget_code, content_type='application/javascript')
+    """Bootstrap script that loads the widget bundle in demo mode"""
+    return _widget_bootstrap(
+        request,
+        demo="true",
+        api=request.build_absolute_uri("/demo-widget/"),
+        container="appertivo-demo-widget",
+    )
@@ -0,0 +1,119 @@
+"""Cached widget payloads for each restaurant's current special.
+
+Snapshots live in the ``widget`` cache. ``app.signals`` drops a restaurant's
+snapshot whenever one of its specials is saved or deleted; code that changes
+specials without ``save()`` (``update()``, ``bulk_update()``) calls
+:func:`invalidate_many` itself.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.utils import timezone
+
+from app.models import Special
+
+
+MISSING_USER_TTL = 60  # seconds
+# Bump when the snapshot layout changes so stale entries are ignored.
+SNAPSHOT_VERSION = 3
+CACHE_ALIAS = "widget"
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(user_id) -> str:
+    return f"widget:snapshot:v{SNAPSHOT_VERSION}:{user_id}"
+
+
+def serialize_special(special: Special, restaurant_name: str) -> Dict[str, Any]:
+    """Return the widget representation of ``special``.
+
+    ``image`` is left as the storage URL; callers make it absolute for the
+    requesting host.
+    """
+    return {
+        "id": str(special.id),
+        "title": special.title,
+        "description": special.description,
+        "price": str(special.price),
+        "image": special.image.url if special.image else None,
+        "cta_type": special.cta_type,
+        "cta_url": special.cta_url,
+        "cta_phone": special.cta_phone,
+        "restaurant_name": restaurant_name,
+    }
+
+
+def build_snapshot(user_id) -> Optional[Dict[str, Any]]:
+    """Query the current special for ``user_id`` and the next time it can change.
+
+    Returns ``None`` when the user does not exist.
+    """
+    user = User.objects.filter(pk=user_id).only("id", "username").first()
+    if user is None:
+        return None
+    now = timezone.now()
+    active = Special.objects.filter(user=user, status="active")
+    special = active.filter(start_date__lte=now, end_date__gte=now).first()
+    next_start = (
+        active.filter(start_date__gt=now)
+        .order_by("start_date")
+        .values_list("start_date", flat=True)
+        .first()
+    )
+    boundaries = [d for d in (special.end_date if special else None, next_start) if d]
+    return {
+        "special": serialize_special(special, user.username) if special else None,
+        "restaurant_name": user.username,
+        "etag": _etag(special, user.username),
+        "last_modified": special.updated_at if special else None,
+        "expires_at": min(boundaries) if boundaries else None,
+    }
+
+
+def _etag(special: Optional[Special], restaurant_name: str) -> str:
+    if special is None:
+        source = f"none:{restaurant_name}"
+    else:
+        source = f"{special.id}:{special.updated_at.isoformat()}:{restaurant_name}"
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+def _timeout(snapshot: Optional[Dict[str, Any]]) -> int:
+    max_age = getattr(settings, "WIDGET_SNAPSHOT_MAX_AGE", 24 * 60 * 60)
+    if snapshot is None:
+        return MISSING_USER_TTL
+    expires_at = snapshot["expires_at"]
+    if expires_at is None:
+        return max_age
+    remaining = math.ceil((expires_at - timezone.now()).total_seconds())
+    return max(1, min(max_age, remaining))
+
+
+def get_snapshot(user_id) -> Optional[Dict[str, Any]]:
+    """Return the cached snapshot for ``user_id``, building it on a miss."""
+    key = _key(user_id)
+    cached = _cache().get(key)
+    if cached is not None:
+        return cached.get("snapshot")
+    snapshot = build_snapshot(user_id)
+    _cache().set(key, {"snapshot": snapshot}, _timeout(snapshot))
+    return snapshot
+
+
+def invalidate(user_id) -> None:
+    """Drop the cached snapshot so the next widget read rebuilds it."""
+    _cache().delete(_key(user_id))
+
+
+def invalidate_many(user_ids) -> None:
+    """Drop the cached snapshots of several users at once."""
+    _cache().delete_many([_key(user_id) for user_id in user_ids])
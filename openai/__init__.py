@@ -1,8 +1,65 @@
-"""Minimal OpenAI stub to satisfy imports in tests."""
+"""Minimal OpenAI stub to satisfy imports in tests.
+
+The client also works as a local stand-in backend (see ``app.ai_gateway``):
+it answers chat completions and Responses API calls offline with
+deterministic text, in the same shape as the real SDK.
+"""
+import json
+from types import SimpleNamespace
+
+
+def _usage(prompt, completion):
+    prompt_tokens = len(str(prompt).split())
+    completion_tokens = len(completion.split())
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+        input_tokens=prompt_tokens,
+        output_tokens=completion_tokens,
+    )
+
+
+def _last_user_message(messages):
+    for message in reversed(messages or []):
+        if message.get("role") == "user":
+            return str(message.get("content", ""))
+    return ""
+
+
+class _Completions:
+    def create(self, model=None, messages=None, stream=False, **kwargs):
+        text = "Enhanced: " + " ".join(_last_user_message(messages).split())[:140]
+        usage = _usage(messages, text)
+        if stream:
+            return self._stream(text, usage)
+        message = SimpleNamespace(role="assistant", content=text)
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message)], usage=usage)
+
+    @staticmethod
+    def _stream(text, usage):
+        for word in text.split(" "):
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+class _Responses:
+    def create(self, model=None, input=None, **kwargs):
+        structured = kwargs.get("text", {}).get("format", {}).get("type") in ("json_object", "json_schema")
+        text = json.dumps({}) if structured else "OK"
+        content = SimpleNamespace(type="output_text", text=text)
+        return SimpleNamespace(
+            model=model,
+            output=[SimpleNamespace(content=[content])],
+            output_text=text,
+            usage=_usage(input, text),
+        )
 
 
 class OpenAI:
     """Stub class representing OpenAI client."""
 
     def __init__(self, *args, **kwargs) -> None:
-        pass
+        self.chat = SimpleNamespace(completions=_Completions())
+        self.responses = _Responses()
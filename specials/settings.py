@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 try:
     from dotenv import load_dotenv, find_dotenv
 except ModuleNotFoundError:
@@ -140,6 +141,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # In-memory by default; set TEST_DATABASE_NAME to a file path to run the
+        # concurrent load tests, which need real SQLite locking.
+        'TEST': {'NAME': os.getenv('TEST_DATABASE_NAME')},
     }
 }
 
@@ -188,11 +192,65 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # For collectstatic
+# Hashed bundles written by `manage.py build_bundles`; collected like any other
+# static file and served with far-future cache headers.
+BUNDLE_DIR = BASE_DIR / 'static' / 'dist'
+WHITENOISE_IMMUTABLE_FILE_TEST = r'^.+\.[0-9a-f]{12}\..+$'
 
 # MEDIA FILES
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Set while `manage.py test` runs.
+TESTING = sys.argv[1:2] == ['test']
+
+# CACHE
+# Widget snapshots have their own cache because invalidations must reach every
+# worker: a file cache shared by the workers of one host by default, or a
+# shared store such as Redis (WIDGET_CACHE_URL) when the app runs on several
+# hosts. Tests get a private in-memory cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'widget': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR', BASE_DIR / '.cache'),
+    },
+}
+if os.getenv('WIDGET_CACHE_URL'):
+    CACHES['widget'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('WIDGET_CACHE_URL'),
+    }
+if TESTING:
+    CACHES['widget'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'widget',
+    }
+WIDGET_SNAPSHOT_MAX_AGE = 24 * 60 * 60  # seconds
+WIDGET_API_URL = 'https://appertivo.com/widget/'
+# Absolute base for links in outgoing email.
+SITE_URL = os.getenv('SITE_URL', 'https://appertivo.com')
+# AI calls all go through app.ai_gateway (one shared client per process).
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+AI_TIMEOUT = 30  # seconds per request
+AI_MAX_RETRIES = 2
+# Per-tier AI allowances enforced by app.metering (None = unlimited).
+AI_BUDGETS = {
+    'free': {'daily_tokens': 20_000, 'requests_per_minute': 10},
+    'pro': {'daily_tokens': 500_000, 'requests_per_minute': 60},
+    'enterprise': {'daily_tokens': None, 'requests_per_minute': 300},
+}
+AI_USAGE_RETENTION_DAYS = 30  # raw per-call rows; daily rollups are kept
+# Calls in flight hold their prompt estimate plus this many output tokens
+# (unless they set a max) against the daily allowance until they finish.
+AI_RESERVED_COMPLETION_TOKENS = 500
+AI_RESERVATION_TIMEOUT = 10 * 60  # seconds before an unfinished call stops counting
+# Browser/CDN lifetimes for the public widget endpoints.
+WIDGET_SPECIAL_MAX_AGE = 60  # seconds
+WIDGET_JS_MAX_AGE = 60 * 60  # seconds
+
 # DEFAULT PRIMARY KEY
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Default primary key field type
@@ -234,7 +292,20 @@ EMAIL_BACKEND = 'anymail.backends.brevo.EmailBackend'
 ANYMAIL = {'BREVO_API_KEY': BREVO_API_KEY}
 
 
-CRONJOBS = [("0 * * * *", "app.cron.unpublish_expired_specials")]
+# Specials are expired/activated on time by `manage.py run_scheduler` when it
+# runs; the hourly catch-up keeps them at most an hour late without it.
+CRONJOBS = [
+    ("0 * * * *", "app.scheduler.catch_up"),
+    ("45 3 * * *", "app.metering.prune"),
+    ("15 * * * *", "app.llm_cache.evict"),
+]
+
+# Widget counters and reach sketches are buffered per worker and written in
+# batches, at the latest every COUNTER_FLUSH_INTERVAL by a background thread.
+# A worker that is killed hard (SIGKILL, OOM) loses what it had not flushed yet.
+COUNTER_FLUSH_INTERVAL = 30  # seconds
+COUNTER_FLUSH_THRESHOLD = 1000  # pending increments
+COUNTER_BACKGROUND_FLUSH = not TESTING
 
 for _app in ['django_extensions', 'corsheaders', 'anymail', 'cloudinary', 'django_crontab']:
     try:
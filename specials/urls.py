@@ -32,13 +32,18 @@ urlpatterns = [
     path('connections/google/callback/', views.google_callback, name='google_callback'),
     path('connections/google/select-location/', views.select_google_location, name='select_google_location'),
     path('api/enhance-description/', views.enhance_description, name='enhance_description'),
+    path('api/enhance-specials/', views.enhance_specials, name='enhance_specials'),
     
     # Widget endpoints
     path('widget/<int:user_id>/special/', views.widget_special, name='widget_special'),
     path('widget/<int:user_id>/signup/', views.widget_signup, name='widget_signup'),
+    path('widget/<int:user_id>/events/', views.widget_events, name='widget_events'),
     path('widget/<int:user_id>/js/', views.widget_js, name='widget_js'),
     path('widget/', views.widget_setup, name='widget_setup'),
     path('analytics/email/', views.email_analytics, name='email_analytics'),
+    path('analytics/email/import/', views.subscribers_import, name='subscribers_import'),
+    path('analytics/email/export/', views.subscribers_export, name='subscribers_export'),
+    path('unsubscribe/<str:token>/', views.unsubscribe, name='unsubscribe'),
     
     
 
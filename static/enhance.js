@@ -0,0 +1,104 @@
+/* ================================
+   /static/enhance.js
+   "Enhance with AI" buttons on the create and edit forms.
+
+   A button with data-enhance-url posts the special to that endpoint with
+   stream: true and writes the model's tokens into the description field as
+   the server-sent events arrive. The button names its fields by id:
+   - data-title, data-description, data-price
+   ================================ */
+(function(){
+  'use strict';
+
+  function csrfToken(){
+    const input = document.querySelector('[name=csrfmiddlewaretoken]');
+    return input ? input.value : '';
+  }
+
+  function parseEvent(raw){
+    let type = 'message';
+    let data = '';
+    raw.split('\n').forEach(line => {
+      if (line.startsWith('event:')) type = line.slice(6).trim();
+      else if (line.startsWith('data:')) data += line.slice(5).trim();
+    });
+    return { type: type, data: data ? JSON.parse(data) : {} };
+  }
+
+  async function enhance(btn){
+    const field = (name) => document.getElementById(btn.dataset[name]);
+    const target = field('description');
+    const title = field('title').value;
+    const description = target.value;
+    const price = field('price').value;
+
+    if (!title || !description) {
+      alert('Please fill in the title and description first.');
+      return;
+    }
+
+    const originalText = btn.innerHTML;
+    btn.innerHTML = '⏳ Enhancing...';
+    btn.disabled = true;
+
+    try {
+      const response = await fetch(btn.dataset.enhanceUrl, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Accept': 'text/event-stream',
+          'X-CSRFToken': csrfToken(),
+        },
+        body: JSON.stringify({ title, description, price, stream: true })
+      });
+
+      // Configuration errors come back as plain JSON.
+      if (!(response.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+        const data = await response.json();
+        if (data.description) {
+          target.value = data.description;
+        } else if (data.error) {
+          alert('Enhancement failed: ' + data.error);
+        }
+        return;
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let text = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let end;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+          const event = parseEvent(buffer.slice(0, end));
+          buffer = buffer.slice(end + 2);
+          if (event.type === 'delta') {
+            text += event.data.text;
+            target.value = text;
+          } else if (event.type === 'done') {
+            target.value = event.data.description;
+          } else if (event.type === 'error') {
+            target.value = description;
+            alert('Enhancement failed: ' + event.data.error);
+          }
+        }
+      }
+    } catch (error) {
+      target.value = description;
+      alert('Enhancement failed: ' + error.message);
+    } finally {
+      btn.innerHTML = originalText;
+      btn.disabled = false;
+    }
+  }
+
+  document.addEventListener('click', (event) => {
+    const btn = event.target.closest('[data-enhance-url]');
+    if (!btn) return;
+    event.preventDefault();
+    enhance(btn);
+  });
+})();
@@ -0,0 +1,377 @@
+/* ================================
+   /static/widget/appertivo-widget.js
+   Embeddable "Today's Special" widget.
+
+   One build is shared by every restaurant; per-site settings come from
+   data- attributes on the loading <script> tag or on the container:
+   - data-restaurant  restaurant (user) id
+   - data-api         widget API base URL, e.g. https://appertivo.com/widget/
+   - data-container   container element id (default: appertivo-widget)
+   - data-demo        render the homepage demo instead of a live widget
+   ================================ */
+(function(){
+  'use strict';
+
+  const script = document.currentScript;
+
+  function option(name, container){
+    if (script && script.dataset[name] !== undefined) return script.dataset[name];
+    if (container && container.dataset[name] !== undefined) return container.dataset[name];
+    return undefined;
+  }
+
+  const esc = (value) => String(value == null ? '' : value).replace(/[&<>"']/g, (c) => ({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+  })[c]);
+
+  const STYLES = `
+    .appertivo-widget-button {
+        position: fixed;
+        bottom: 20px;
+        right: 20px;
+        background: #3b82f6;
+        color: white;
+        border: none;
+        padding: 12px 20px;
+        border-radius: 9999px;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        cursor: pointer;
+        z-index: 9999;
+    }
+    .appertivo-widget-panel {
+        position: fixed;
+        bottom: 80px;
+        right: 20px;
+        width: 320px;
+        background: white;
+        border-radius: 12px;
+        box-shadow: 0 10px 15px rgba(0, 0, 0, 0.1);
+        display: none;
+        z-index: 9999;
+    }
+    .appertivo-widget {
+        max-width: 400px;
+        background: white;
+        border-radius: 12px;
+        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
+        overflow: hidden;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+    }
+    .appertivo-widget-demo {
+        margin: 0 auto;
+        position: relative;
+    }
+    .appertivo-header {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 16px;
+        text-align: center;
+    }
+    .appertivo-content {
+        padding: 20px;
+    }
+    .appertivo-special {
+        text-align: center;
+    }
+    .appertivo-image {
+        width: 100%;
+        height: 200px;
+        object-fit: cover;
+        border-radius: 8px;
+        margin-bottom: 12px;
+    }
+    .appertivo-title {
+        font-size: 20px;
+        font-weight: bold;
+        margin-bottom: 8px;
+        color: #1f2937;
+    }
+    .appertivo-description {
+        color: #6b7280;
+        margin-bottom: 12px;
+        line-height: 1.5;
+    }
+    .appertivo-price {
+        font-size: 24px;
+        font-weight: bold;
+        color: #059669;
+        margin-bottom: 16px;
+    }
+    .appertivo-cta {
+        display: inline-block;
+        background: #3b82f6;
+        color: white;
+        padding: 12px 24px;
+        border-radius: 8px;
+        text-decoration: none;
+        font-weight: 500;
+        margin-bottom: 16px;
+    }
+    .appertivo-share {
+        display: block;
+        margin: 0 auto;
+        background: none;
+        border: none;
+        color: #3b82f6;
+        cursor: pointer;
+        font-size: 14px;
+    }
+    .appertivo-signup {
+        border-top: 1px solid #e5e7eb;
+        padding-top: 16px;
+        margin-top: 16px;
+    }
+    .appertivo-signup-form {
+        display: flex;
+        gap: 8px;
+    }
+    .appertivo-email {
+        flex: 1;
+        padding: 10px;
+        border: 1px solid #d1d5db;
+        border-radius: 6px;
+        font-size: 14px;
+    }
+    .appertivo-subscribe {
+        background: #059669;
+        color: white;
+        border: none;
+        padding: 10px 16px;
+        border-radius: 6px;
+        cursor: pointer;
+        font-weight: 500;
+    }
+    .appertivo-no-special {
+        text-align: center;
+        padding: 40px 20px;
+        color: #6b7280;
+    }
+    .appertivo-demo-badge {
+        position: absolute;
+        top: 8px;
+        right: 8px;
+        background: #f59e0b;
+        color: white;
+        padding: 4px 8px;
+        border-radius: 4px;
+        font-size: 12px;
+        font-weight: 500;
+    }
+  `;
+
+  function init(){
+    const containerId = option('container') || 'appertivo-widget';
+    const container = document.getElementById(containerId);
+    if (!container) return;
+
+    const demo = option('demo', container) !== undefined;
+    const restaurantId = option('restaurant', container);
+    let apiBase = option('api', container) || 'https://appertivo.com/widget/';
+    if (!apiBase.endsWith('/')) apiBase += '/';
+    if (!demo) {
+      if (!restaurantId) {
+        console.warn('Appertivo Widget: No restaurant ID specified.');
+        return;
+      }
+      apiBase += restaurantId + '/';
+    }
+
+    const style = document.createElement('style');
+    style.textContent = STYLES;
+    document.head.appendChild(style);
+
+    if (!demo) {
+      container.className = 'appertivo-widget-panel';
+      container.style.display = 'none';
+      document.body.appendChild(container);
+
+      const launcher = document.createElement('button');
+      launcher.className = 'appertivo-widget-button';
+      launcher.textContent = "Today's Special";
+      launcher.addEventListener('click', () => {
+        container.style.display = container.style.display === 'none' || !container.style.display ? 'block' : 'none';
+      });
+      document.body.appendChild(launcher);
+    }
+
+    fetch(apiBase + 'special/')
+      .then(response => response.json())
+      .then(data => {
+        if (data.special) {
+          renderSpecial(container, data.special, demo);
+          bindSignup(container, apiBase, data.special.id, demo);
+          if (!demo) bindTracking(container, apiBase, data.special);
+        } else if (!demo) {
+          container.innerHTML = `
+            <div class="appertivo-widget">
+              <div class="appertivo-header">
+                <h3>${esc(data.restaurant_name)}</h3>
+              </div>
+              <div class="appertivo-no-special">
+                <p>No special available today.</p>
+                <p>Check back soon!</p>
+              </div>
+            </div>
+          `;
+        }
+      })
+      .catch(err => {
+        console.error('Widget error:', err);
+        container.innerHTML = demo ? '<p>Unable to load demo widget</p>' : '<p>Unable to load special</p>';
+      });
+  }
+
+  function renderSpecial(container, special, demo){
+    let cta = '';
+    if (special.cta_type === 'web' && special.cta_url) {
+      cta = demo
+        ? `<a href="#" data-demo-alert="This is a demo - button would normally link to ordering page" class="appertivo-cta">Order Online</a>`
+        : `<a href="${esc(special.cta_url)}" class="appertivo-cta" target="_blank">Order Online</a>`;
+    } else if (special.cta_type === 'call' && special.cta_phone) {
+      cta = demo
+        ? `<a href="#" data-demo-alert="This is a demo - button would normally call restaurant" class="appertivo-cta">Call to Order</a>`
+        : `<a href="tel:${esc(special.cta_phone)}" class="appertivo-cta">Call to Order</a>`;
+    }
+    container.innerHTML = `
+      <div class="appertivo-widget${demo ? ' appertivo-widget-demo' : ''}">
+        ${demo ? '<div class="appertivo-demo-badge">DEMO</div>' : ''}
+        <div class="appertivo-header">
+          <h3>Today's Special at ${esc(special.restaurant_name)}</h3>
+        </div>
+        <div class="appertivo-content">
+          <div class="appertivo-special">
+            ${special.image ? `<img src="${esc(special.image)}" alt="${esc(special.title)}" class="appertivo-image">` : ''}
+            <div class="appertivo-title">${esc(special.title)}</div>
+            <div class="appertivo-description">${esc(special.description)}</div>
+            <div class="appertivo-price">$${esc(special.price)}</div>
+            ${cta}
+            ${!demo && (navigator.share || navigator.clipboard) ? '<button type="button" class="appertivo-share">Share</button>' : ''}
+          </div>
+          <div class="appertivo-signup">
+            <p style="margin-bottom: 8px; font-size: 14px; color: #6b7280;">
+              Get notified about future specials:
+            </p>
+            <form class="appertivo-signup-form">
+              <input type="email" class="appertivo-email" placeholder="Enter your email" required>
+              <button type="submit" class="appertivo-subscribe">Subscribe</button>
+            </form>
+          </div>
+        </div>
+      </div>
+    `;
+    container.querySelectorAll('[data-demo-alert]').forEach(link => {
+      link.addEventListener('click', (event) => {
+        event.preventDefault();
+        alert(link.dataset.demoAlert);
+      });
+    });
+  }
+
+  function bindSignup(container, apiBase, specialId, demo){
+    const form = container.querySelector('.appertivo-signup-form');
+    if (!form) return;
+    form.addEventListener('submit', (event) => {
+      event.preventDefault();
+      const email = form.querySelector('.appertivo-email').value;
+
+      fetch(apiBase + 'signup/', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          email: email,
+          special_id: specialId
+        })
+      })
+      .then(response => response.json())
+      .then(data => {
+        if (data.success) {
+          form.innerHTML = `
+            <div style="text-align: center; color: #059669; font-weight: 500;">
+              ${demo ? '✓ Demo signup successful! (Not actually saved)' : '✓ Successfully subscribed!'}
+            </div>
+          `;
+        } else {
+          alert(demo ? 'Demo signup failed' : 'Signup failed: ' + (data.error || 'Unknown error'));
+        }
+      })
+      .catch(err => {
+        console.error('Signup error:', err);
+        alert(demo ? 'Demo signup failed' : 'Signup failed');
+      });
+    });
+  }
+
+  // -------------------------------
+  // Event tracking: queued and sent in batches
+  // -------------------------------
+  const FLUSH_DELAY = 2000;
+  let queue = [];
+  let flushTimer = null;
+  let eventsUrl = null;
+
+  // Random per-browser id so the server can estimate unique visitors; it is
+  // only ever stored hashed inside a HyperLogLog sketch.
+  function visitorId(){
+    try {
+      let id = localStorage.getItem('appertivo_vid');
+      if (!id) {
+        id = window.crypto && crypto.randomUUID ? crypto.randomUUID() : Math.random().toString(36).slice(2) + Date.now().toString(36);
+        localStorage.setItem('appertivo_vid', id);
+      }
+      return id;
+    } catch (e) {
+      return undefined;
+    }
+  }
+
+  function track(type, specialId){
+    queue.push({ type: type, special_id: specialId });
+    if (!flushTimer) flushTimer = setTimeout(flushEvents, FLUSH_DELAY);
+  }
+
+  function flushEvents(){
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    if (!queue.length || !eventsUrl) return;
+    const body = JSON.stringify({ visitor: visitorId(), events: queue });
+    queue = [];
+    if (navigator.sendBeacon && navigator.sendBeacon(eventsUrl, body)) return;
+    fetch(eventsUrl, { method: 'POST', body: body, keepalive: true }).catch(() => {});
+  }
+
+  function bindTracking(container, apiBase, special){
+    eventsUrl = apiBase + 'events/';
+    track('view', special.id);
+
+    const cta = container.querySelector('.appertivo-cta');
+    if (cta) cta.addEventListener('click', () => track('click', special.id));
+
+    const email = container.querySelector('.appertivo-email');
+    if (email) email.addEventListener('focus', () => track('signup_open', special.id), { once: true });
+
+    const share = container.querySelector('.appertivo-share');
+    if (share) share.addEventListener('click', () => {
+      track('share', special.id);
+      const data = { title: special.title, text: special.description, url: window.location.href };
+      if (navigator.share) {
+        navigator.share(data).catch(() => {});
+      } else {
+        navigator.clipboard.writeText(data.url).then(() => { share.textContent = 'Link copied!'; });
+      }
+    });
+
+    document.addEventListener('visibilitychange', () => {
+      if (document.visibilityState === 'hidden') flushEvents();
+    });
+    window.addEventListener('pagehide', flushEvents);
+  }
+
+  // Initialize when DOM is ready
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', init);
+  } else {
+    init();
+  }
+})();
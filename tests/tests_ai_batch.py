@@ -0,0 +1,165 @@
+import datetime
+import json
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app import ai, metering
+from app.models import Special
+
+
+def reply(items):
+    return Mock(output=[Mock(content=[Mock(text=json.dumps({"specials": items}))])])
+
+
+def enhanced(special, **overrides):
+    item = {
+        "id": str(special.pk),
+        "title": f"Better {special.title}",
+        "description": "Even tastier",
+        "price": "12.50",
+        "start_date": "2030-06-01",
+        "end_date": "2030-06-02T21:00:00+00:00",
+    }
+    item.update(overrides)
+    return item
+
+
+@override_settings(OPENAI_API_KEY="sk-test")
+class BatchEnhanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.start = timezone.make_aware(datetime.datetime(2030, 5, 1, 17, 30))
+
+    def make_specials(self, count, user=None):
+        return [
+            Special.objects.create(
+                user=user or self.user, title=f"Dish {i}", description="Tasty", price=10,
+                start_date=self.start, end_date=self.start + datetime.timedelta(days=1),
+            )
+            for i in range(count)
+        ]
+
+    @patch("app.ai_gateway.respond")
+    def test_menu_is_enhanced_in_one_request_and_one_update(self, respond):
+        specials = self.make_specials(20)
+        respond.side_effect = lambda model, prompt, **kw: reply([enhanced(s) for s in specials])
+
+        with CaptureQueriesContext(connection) as ctx:
+            updated = ai.enhance_specials(specials)
+
+        self.assertEqual(respond.call_count, 1)
+        self.assertEqual(len(updated), 20)
+        self.assertEqual([q["sql"].split()[0] for q in ctx.captured_queries].count("UPDATE"), 1)
+        self.assertEqual(respond.call_args.kwargs["text"]["format"]["type"], "json_schema")
+
+        special = Special.objects.get(pk=specials[3].pk)
+        self.assertEqual((special.title, special.price), ("Better Dish 3", Decimal("12.50")))
+        # A bare date keeps the special's time of day; both are aware datetimes.
+        self.assertEqual(special.start_date, timezone.make_aware(datetime.datetime(2030, 6, 1, 17, 30)))
+        self.assertEqual(special.end_date, datetime.datetime(2030, 6, 2, 21, tzinfo=datetime.timezone.utc))
+
+    @override_settings(AI_BATCH_CONCURRENCY=3)
+    @patch("app.ai_gateway.respond")
+    def test_large_menus_are_split_into_parallel_batches(self, respond):
+        specials = self.make_specials(12)
+        by_id = {str(s.pk): s for s in specials}
+
+        def answer(model, prompt, **kw):
+            items = json.loads(prompt.split("\n", 1)[1])["specials"]
+            return reply([enhanced(by_id[item["id"]]) for item in items])
+
+        respond.side_effect = answer
+        self.assertEqual(len(ai.enhance_specials(specials, batch_size=5)), 12)
+        self.assertEqual(respond.call_count, 3)
+
+    @patch("app.ai_gateway.respond")
+    def test_changed_dates_rearm_the_scheduler(self, respond):
+        special, = self.make_specials(1)
+        respond.return_value = reply([enhanced(special)])
+        with patch("app.scheduler.rearm") as rearm:
+            ai.enhance_specials([special])
+        rearm.assert_called_once_with()
+
+    @patch("app.ai_gateway.respond")
+    def test_text_only_changes_do_not_rearm_the_scheduler(self, respond):
+        special, = self.make_specials(1)
+        respond.return_value = reply([{"id": str(special.pk), "title": "Better"}])
+        with patch("app.scheduler.rearm") as rearm:
+            ai.enhance_specials([special])
+        rearm.assert_not_called()
+
+    @patch("app.ai_gateway.respond")
+    def test_invalid_items_and_fields_are_ignored(self, respond):
+        good, bad_price, bad_dates = self.make_specials(3)
+        respond.return_value = reply([
+            enhanced(good),
+            enhanced(bad_price, price="free", title="Renamed"),
+            enhanced(bad_dates, start_date="2030-07-02", end_date="2030-07-01"),
+            {"id": "not-one-of-ours", "title": "Intruder"},
+            "garbage",
+        ])
+
+        updated = ai.enhance_specials([good, bad_price, bad_dates])
+
+        self.assertEqual(len(updated), 3)
+        bad_price.refresh_from_db()
+        self.assertEqual((bad_price.title, bad_price.price), ("Renamed", Decimal("10.00")))
+        bad_dates.refresh_from_db()
+        self.assertEqual(bad_dates.start_date, self.start)
+
+    @patch("app.ai_gateway.respond", side_effect=RuntimeError("timeout"))
+    def test_failed_request_changes_nothing(self, respond):
+        specials = self.make_specials(2)
+        with self.assertLogs("app.ai", level="ERROR"):
+            self.assertEqual(ai.enhance_specials(specials), [])
+
+    @patch("app.ai_gateway.respond", side_effect=metering.BudgetExceeded("Daily AI budget used up", retry_after=60))
+    def test_endpoint_returns_429_when_the_budget_refuses_every_batch(self, respond):
+        specials = self.make_specials(2)
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("enhance_specials"),
+            json.dumps({"special_ids": [str(s.pk) for s in specials]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "60")
+
+    @override_settings(AI_BATCH_SIZE=2, AI_BATCH_CONCURRENCY=1)
+    @patch("app.ai_gateway.respond")
+    def test_batches_refused_by_the_budget_are_skipped(self, respond):
+        specials = self.make_specials(4)
+        respond.side_effect = [
+            reply([enhanced(s) for s in specials[:2]]),
+            metering.BudgetExceeded("Daily AI budget used up", retry_after=60),
+        ]
+
+        updated = ai.enhance_specials(specials)
+
+        self.assertEqual(len(updated), 2)
+
+    @patch("app.ai_gateway.respond")
+    def test_endpoint_enhances_only_the_owners_specials(self, respond):
+        mine = self.make_specials(2)
+        other = self.make_specials(1, user=User.objects.create_user(username="other", password="pw"))
+        respond.side_effect = lambda model, prompt, **kw: reply([enhanced(s) for s in mine + other])
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("enhance_specials"),
+            json.dumps({"special_ids": [str(s.pk) for s in mine + other]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(sorted(item["id"] for item in response.json()["updated"]), sorted(str(s.pk) for s in mine))
+        other[0].refresh_from_db()
+        self.assertEqual(other[0].title, "Dish 0")
@@ -0,0 +1,83 @@
+import json
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app import ai, ai_gateway, llm_cache
+from app.models import Special
+
+
+class FakeClient:
+    instances = []
+
+    def __init__(self, **options):
+        self.options = options
+        FakeClient.instances.append(self)
+
+
+@override_settings(OPENAI_API_KEY="sk-test", AI_TIMEOUT=7, AI_MAX_RETRIES=4)
+class GatewayClientTests(TestCase):
+    def setUp(self):
+        FakeClient.instances = []
+        ai_gateway.reset_client()
+        self.addCleanup(ai_gateway.reset_client)
+
+    @override_settings(AI_CLIENT_FACTORY=f"{__name__}.FakeClient")
+    def test_client_is_created_once_with_configured_options(self):
+        self.assertIs(ai_gateway.get_client(), ai_gateway.get_client())
+        self.assertEqual(len(FakeClient.instances), 1)
+        options = FakeClient.instances[0].options
+        self.assertEqual((options["api_key"], options["timeout"], options["max_retries"]), ("sk-test", 7, 4))
+
+        ai_gateway.reset_client()
+        ai_gateway.get_client()
+        self.assertEqual(len(FakeClient.instances), 2)
+
+    @override_settings(OPENAI_API_KEY=None)
+    @patch.dict("os.environ", {}, clear=True)
+    def test_missing_key_is_reported(self):
+        self.assertFalse(ai_gateway.is_configured())
+        with self.assertRaises(ai_gateway.NotConfigured):
+            ai_gateway.get_client()
+
+    def test_stand_in_backend_answers_offline(self):
+        response = ai_gateway.chat("gpt-4o", [{"role": "user", "content": "Tacos"}])
+        self.assertEqual(response.choices[0].message.content, "Enhanced: Tacos")
+        chunks = list(ai_gateway.stream_chat("gpt-4o", [{"role": "user", "content": "Tacos"}]))
+        self.assertEqual("".join(c.choices[0].delta.content for c in chunks if c.choices).strip(), "Enhanced: Tacos")
+        self.assertGreater(chunks[-1].usage.completion_tokens, 0)
+
+
+@override_settings(OPENAI_API_KEY="sk-test")
+class GatewayEntryPointTests(TestCase):
+    def setUp(self):
+        ai_gateway.reset_client()
+        self.addCleanup(ai_gateway.reset_client)
+        llm_cache.responses.clear()
+        self.addCleanup(llm_cache.responses.clear)
+        self.user = User.objects.create_user(username="owner", password="pw")
+
+    def test_enhance_description_streams_from_stand_in(self):
+        self.client.force_login(self.user)
+        body = json.dumps({"title": "Tacos", "description": "Good", "price": "9", "stream": True})
+        response = self.client.post(reverse("enhance_description"), body, content_type="application/json")
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("event: delta", content)
+        self.assertIn("event: done", content)
+
+    @patch("app.ai_gateway.respond")
+    def test_special_enhancement_goes_through_gateway(self, respond):
+        now = timezone.now()
+        special = Special.objects.create(
+            user=self.user, title="Tacos", description="Good", price=9, start_date=now, end_date=now + timedelta(days=1)
+        )
+        reply = {"specials": [{"id": str(special.pk), "title": "Better tacos"}]}
+        respond.return_value = Mock(output=[Mock(content=[Mock(text=json.dumps(reply))])])
+        ai.enhance_special_content(special)
+        special.refresh_from_db()
+        self.assertEqual(special.title, "Better tacos")
+        self.assertEqual(respond.call_args.args[0], "gpt-4.1-mini")
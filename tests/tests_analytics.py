@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app import analytics, counters
+from app.models import DailySpecialStats, EmailSignup, HourlySpecialStats, Special
+
+
+class AnalyticsRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.special = self._create_special()
+        self.other = self._create_special(title="Other")
+
+    def _create_special(self, **kwargs):
+        now = timezone.now()
+        defaults = dict(
+            user=self.user,
+            title="Deal",
+            description="Desc",
+            price=10,
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+            status="active",
+        )
+        defaults.update(kwargs)
+        return Special.objects.create(**defaults)
+
+    def test_fold_creates_and_accumulates_buckets(self):
+        ten = datetime(2025, 3, 1, 10, tzinfo=dt_timezone.utc)
+        eleven = ten + timedelta(hours=1)
+        sid = str(self.special.id)
+        analytics.fold({(sid, ten): {"views": 3}, (sid, eleven): {"views": 2, "clicks": 1}})
+        analytics.fold({(sid, ten): {"views": 1}})
+
+        hourly = {row.bucket: row for row in HourlySpecialStats.objects.filter(special=self.special)}
+        self.assertEqual(hourly[ten].views, 4)
+        self.assertEqual(hourly[eleven].clicks, 1)
+        daily = DailySpecialStats.objects.get(special=self.special)
+        self.assertEqual(daily.bucket, analytics.day_bucket(ten))
+        self.assertEqual((daily.views, daily.clicks), (6, 1))
+        self.assertEqual(daily.user, self.user)
+
+    def test_fold_ignores_deleted_specials(self):
+        analytics.fold({("00000000-0000-0000-0000-000000000000", timezone.now()): {"views": 1}})
+        self.assertFalse(HourlySpecialStats.objects.exists())
+
+    def test_series_are_zero_filled_and_summed_per_restaurant(self):
+        day = datetime(2025, 3, 1, tzinfo=dt_timezone.utc)
+        analytics.fold(
+            {
+                (str(self.special.id), day + timedelta(hours=9)): {"views": 2},
+                (str(self.other.id), day + timedelta(hours=9)): {"views": 5},
+                (str(self.special.id), day + timedelta(days=2)): {"views": 1},
+            }
+        )
+        series = analytics.restaurant_series(self.user, day, day + timedelta(days=3))
+        self.assertEqual([row["views"] for row in series], [7, 0, 1])
+        self.assertEqual([row["bucket"] for row in series], [day + timedelta(days=i) for i in range(3)])
+
+        hourly = analytics.special_series(self.special, day + timedelta(hours=8), day + timedelta(hours=11), "hour")
+        self.assertEqual([row["views"] for row in hourly], [0, 2, 0])
+
+    def test_restaurant_series_is_one_query(self):
+        day = datetime(2025, 3, 1, tzinfo=dt_timezone.utc)
+        with self.assertNumQueries(1):
+            analytics.restaurant_series(self.user, day, day + timedelta(days=30))
+
+    def test_counter_flush_feeds_rollups(self):
+        buffer = counters.CounterBuffer(flush_interval=3600, flush_threshold=100)
+        buffer.incr(self.special.id, "views", 4)
+        buffer.flush()
+        today = analytics.day_bucket(timezone.now())
+        self.assertEqual(DailySpecialStats.objects.get(special=self.special, bucket=today).views, 4)
+
+    def test_dashboard_and_email_analytics_show_trend(self):
+        analytics.fold({(str(self.special.id), timezone.now()): {"views": 3, "email_signups": 1}})
+        self.client.login(username="owner", password="pw")
+
+        response = self.client.get(reverse("dashboard"))
+        self.assertContains(response, 'data-testid="trend-views"')
+        self.assertEqual(len(response.context["views_chart"]), 14)
+        self.assertEqual(response.context["views_chart"][-1]["value"], 3)
+
+        response = self.client.get(reverse("email_analytics"))
+        self.assertContains(response, 'data-testid="trend-signups"')
+        self.assertEqual(response.context["signups_chart"][-1]["height"], 100)
+
+    def test_email_analytics_query_count_does_not_grow_with_specials(self):
+        for i in range(3):
+            EmailSignup.objects.create(restaurant=self.user, email=f"e{i}@example.com", special=self.special)
+        self.client.login(username="owner", password="pw")
+        self.client.get(reverse("email_analytics"))
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("email_analytics"))
+        for i in range(5):
+            self._create_special(title=f"Extra {i}")
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse("email_analytics"))
+
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+        stats = {row["special"].title: row["signups"] for row in response.context["specials_stats"]}
+        self.assertEqual(stats["Deal"], 3)
+        self.assertEqual(stats["Extra 0"], 0)
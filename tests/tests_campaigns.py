@@ -0,0 +1,166 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from app import campaigns, jobs
+from app.models import Campaign, CampaignRecipient, EmailSignup, Job, Special
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_limits_sustained_rate(self):
+        clock = FakeClock()
+        bucket = campaigns.TokenBucket(rate=5, clock=clock, sleep=clock.sleep)
+        for _ in range(25):
+            bucket.acquire()
+        # The initial burst of 5 is free; the other 20 take 4 seconds.
+        self.assertAlmostEqual(clock.now, 4.0)
+
+    def test_refills_while_idle(self):
+        clock = FakeClock()
+        bucket = campaigns.TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        bucket.acquire()
+        clock.now += 10
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(clock.slept, [])
+
+
+@override_settings(CAMPAIGN_PAGE_SIZE=4, CAMPAIGN_SENDS_PER_SECOND=10000, MAIL_RETRY_DELAY=0)
+class CampaignTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        now = timezone.now()
+        self.special = Special.objects.create(
+            user=self.user, title="Deal", description="Desc", price=5,
+            start_date=now, end_date=now + timedelta(days=1), status="active",
+        )
+        self.signups = [
+            EmailSignup.objects.create(restaurant=self.user, email=f"s{i:02d}@example.com") for i in range(10)
+        ]
+
+    def _sent_to(self):
+        return sorted(m.to[0] for m in mail.outbox)
+
+    def test_campaign_sends_to_everyone_once(self):
+        campaign = campaigns.start(self.special)
+        jobs.drain()
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, "done")
+        self.assertEqual((campaign.sent_count, campaign.failed_count), (10, 0))
+        self.assertEqual(campaign.cursor, self.signups[-1].pk)
+        self.assertEqual(self._sent_to(), sorted(s.email for s in self.signups))
+        self.assertEqual(CampaignRecipient.objects.filter(status="sent").count(), 10)
+
+    def test_resumes_after_crash_without_duplicates_or_gaps(self):
+        campaign = campaigns.start(self.special)
+        original = mail.backends.locmem.EmailBackend.send_messages
+        calls = []
+
+        def crash_on_sixth(backend, messages):
+            calls.append(1)
+            if len(calls) == 6:
+                raise KeyboardInterrupt("worker killed")  # not caught by the mailer
+            return original(backend, messages)
+
+        with mock.patch.object(mail.backends.locmem.EmailBackend, "send_messages", crash_on_sixth):
+            with self.assertRaises(KeyboardInterrupt):
+                campaigns.run(campaign.pk)
+        self.assertEqual(len(mail.outbox), 5)
+
+        campaigns.run(campaign.pk)
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, "done")
+        self.assertEqual(self._sent_to(), sorted(s.email for s in self.signups))
+
+    def test_second_run_does_not_send_while_campaign_is_claimed(self):
+        campaign = campaigns.start(self.special)
+        Campaign.objects.filter(pk=campaign.pk).update(
+            claimed_by="other-worker", claimed_until=timezone.now() + timedelta(minutes=5)
+        )
+        Job.objects.all().delete()
+        campaigns.run(campaign.pk)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(CampaignRecipient.objects.exists())
+        self.assertGreater(Job.objects.get().run_at, timezone.now() + timedelta(minutes=4))
+
+        # Once the other worker's lease expires the campaign can be taken over.
+        Campaign.objects.filter(pk=campaign.pk).update(claimed_until=timezone.now() - timedelta(seconds=1))
+        campaigns.run(campaign.pk)
+        self.assertEqual(self._sent_to(), sorted(s.email for s in self.signups))
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.claimed_by, "")
+
+    @override_settings(CAMPAIGN_LEASE_SECONDS=0)  # renew (and check) before every message
+    def test_run_stops_sending_when_its_claim_is_taken_over(self):
+        campaign = campaigns.start(self.special)
+        original = mail.backends.locmem.EmailBackend.send_messages
+
+        def taken_over_after_two(backend, messages):
+            sent = original(backend, messages)
+            if len(mail.outbox) == 2:
+                Campaign.objects.filter(pk=campaign.pk).update(claimed_by="other-worker")
+            return sent
+
+        with mock.patch.object(mail.backends.locmem.EmailBackend, "send_messages", taken_over_after_two):
+            campaigns.run(campaign.pk)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(CampaignRecipient.objects.filter(status="sent").count(), 2)
+        self.assertEqual(Campaign.objects.get(pk=campaign.pk).claimed_by, "other-worker")
+
+    def test_run_yields_when_slice_expires(self):
+        campaign = campaigns.start(self.special)
+        Job.objects.all().delete()
+        with override_settings(CAMPAIGN_SLICE_SECONDS=0):
+            campaigns.run(campaign.pk)
+        self.assertEqual(Job.objects.get().payload, {"campaign_id": campaign.pk})
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, "sending")
+
+    def test_refused_and_unsubscribed_recipients_are_recorded(self):
+        campaign = campaigns.start(self.special)
+        original = mail.backends.locmem.EmailBackend.send_messages
+
+        def refuse(backend, messages):
+            if messages[0].to == [self.signups[3].email]:
+                raise smtplib.SMTPRecipientsRefused({self.signups[3].email: (550, b"no")})
+            return original(backend, messages)
+
+        # Record everyone before the unsubscribe lands.
+        campaigns._record_page(campaign, 100)
+        EmailSignup.objects.filter(pk=self.signups[2].pk).update(is_active=False)
+        with mock.patch.object(mail.backends.locmem.EmailBackend, "send_messages", refuse):
+            campaigns.run(campaign.pk)
+
+        status = dict(CampaignRecipient.objects.values_list("email", "status"))
+        self.assertEqual(status[self.signups[2].email], "skipped")
+        self.assertEqual(status[self.signups[3].email], "failed")
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.sent_count, campaign.failed_count), (8, 1))
+
+    def test_deleted_special_stops_campaign(self):
+        campaign = campaigns.start(self.special)
+        self.special.delete()
+        jobs.drain()
+        self.assertFalse(Campaign.objects.filter(pk=campaign.pk).exists())
+        self.assertEqual(len(mail.outbox), 0)
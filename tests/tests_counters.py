@@ -0,0 +1,107 @@
+import json
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app import counters
+from app.counters import CounterBuffer
+from app.models import Special
+
+
+class CounterBufferTests(TestCase):
+    def setUp(self):
+        caches["widget"].clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        now = timezone.now()
+        self.special = Special.objects.create(
+            user=self.user,
+            title="Deal",
+            description="Desc",
+            price=10,
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+            status="active",
+        )
+
+    def tearDown(self):
+        counters.flush()
+
+    def test_increments_are_buffered_until_flush(self):
+        buffer = CounterBuffer(flush_interval=3600, flush_threshold=100)
+        for _ in range(5):
+            buffer.incr(self.special.id, "views")
+        buffer.incr(self.special.id, "clicks", 2)
+
+        self.assertEqual(buffer.pending(), 7)
+        self.special.refresh_from_db()
+        self.assertEqual(self.special.views, 0)
+
+        self.assertEqual(buffer.flush(), 7)
+        self.assertEqual(buffer.pending(), 0)
+        self.special.refresh_from_db()
+        self.assertEqual(self.special.views, 5)
+        self.assertEqual(self.special.clicks, 2)
+
+    def test_flush_adds_to_existing_totals_without_touching_updated_at(self):
+        Special.objects.filter(pk=self.special.pk).update(views=10)
+        self.special.refresh_from_db()
+        updated_at = self.special.updated_at
+
+        first = CounterBuffer(flush_interval=3600, flush_threshold=100)
+        second = CounterBuffer(flush_interval=3600, flush_threshold=100)
+        first.incr(self.special.id, "views", 3)
+        second.incr(self.special.id, "views", 4)
+        first.flush()
+        second.flush()
+
+        self.special.refresh_from_db()
+        self.assertEqual(self.special.views, 17)
+        self.assertEqual(self.special.updated_at, updated_at)
+
+    def test_threshold_triggers_flush(self):
+        buffer = CounterBuffer(flush_interval=3600, flush_threshold=3)
+        buffer.incr(self.special.id, "shares")
+        buffer.incr(self.special.id, "shares")
+        self.assertEqual(buffer.pending(), 2)
+        buffer.incr(self.special.id, "shares")
+        self.assertEqual(buffer.pending(), 0)
+        self.special.refresh_from_db()
+        self.assertEqual(self.special.shares, 3)
+
+    def test_idle_buffer_is_flushed_in_the_background(self):
+        buffer = CounterBuffer(flush_interval=0.01, flush_threshold=100, background=True)
+        flushed = threading.Event()
+        self.addCleanup(buffer.stop)
+        with patch.object(buffer, "flush", side_effect=lambda: flushed.set()):
+            buffer.incr(self.special.id, "views")
+            self.assertTrue(flushed.wait(5))
+
+    def test_no_background_thread_when_disabled(self):
+        buffer = CounterBuffer(flush_interval=3600, flush_threshold=100, background=False)
+        buffer.incr(self.special.id, "views")
+        self.assertIsNone(buffer._thread)
+
+    def test_unknown_field_rejected(self):
+        buffer = CounterBuffer()
+        with self.assertRaises(ValueError):
+            buffer.incr(self.special.id, "title")
+
+    def test_widget_events_beacon_buffers_view(self):
+        before = counters.pending()
+        response = self.client.post(
+            reverse("widget_events", args=[self.user.id]),
+            data=json.dumps({"events": [{"type": "view", "special_id": str(self.special.id)}]}),
+            content_type="text/plain",
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(counters.pending(), before + 1)
+
+        counters.flush()
+        self.special.refresh_from_db()
+        self.assertEqual(self.special.views, 1)
@@ -0,0 +1,144 @@
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from app import distribution, jobs
+from app.models import Connection, Job, Publication, Special
+
+
+class DistributionTestMixin:
+    def make_special(self, **kwargs):
+        now = timezone.now()
+        defaults = dict(
+            user=self.user, title="Deal", description="Desc", price=5,
+            start_date=now, end_date=now + timedelta(days=1), status="active",
+        )
+        defaults.update(kwargs)
+        return Special.objects.create(**defaults)
+
+    def connect(self, platform):
+        return Connection.objects.create(
+            user=self.user, platform=platform, is_connected=True, settings={"access_token": "tok"}
+        )
+
+
+class DistributionTests(DistributionTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.publish_to = Mock(return_value="posts/1")
+        self.remove_from = Mock()
+        patcher = patch.dict(distribution.CHANNELS, {"pos": (self.publish_to, self.remove_from)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.connection = self.connect("pos")
+
+    def test_publish_only_queues_jobs(self):
+        self.connect("website")  # not a distribution channel
+        Connection.objects.create(user=self.user, platform="delivery", is_connected=False)
+        special = self.make_special()
+
+        publications = distribution.publish(special)
+
+        self.assertEqual([p.connection for p in publications], [self.connection])
+        self.assertEqual(Job.objects.get().task, distribution.TASK)
+        self.publish_to.assert_not_called()
+
+    def test_publish_then_remove_records_channel_state(self):
+        special = self.make_special()
+        distribution.publish(special)
+        jobs.drain()
+
+        publication = Publication.objects.get()
+        self.assertEqual((publication.status, publication.external_id), ("published", "posts/1"))
+        self.publish_to.assert_called_once_with(special, self.connection)
+
+        distribution.remove_special_from_distributions(special)
+        jobs.drain()
+        publication.refresh_from_db()
+        self.assertEqual(publication.status, "removed")
+        self.remove_from.assert_called_once_with(special, self.connection, "posts/1")
+
+    def test_channel_refusal_is_recorded_without_retry(self):
+        self.publish_to.side_effect = distribution.ChannelError("rejected")
+        distribution.publish(self.make_special())
+        with self.assertLogs("app.distribution", level="WARNING"):
+            jobs.drain()
+
+        publication = Publication.objects.get()
+        self.assertEqual((publication.status, publication.last_error), ("failed", "rejected"))
+        self.assertEqual(Job.objects.get().status, "done")
+
+    def test_unexpected_error_is_retried(self):
+        self.publish_to.side_effect = RuntimeError("timeout")
+        distribution.publish(self.make_special())
+        with self.assertLogs("app.jobs", level="WARNING"):
+            jobs.drain()
+
+        publication = Publication.objects.get()
+        self.assertEqual(publication.status, "pending")
+        self.assertIn("timeout", publication.last_error)
+        self.assertEqual(Job.objects.get().status, "queued")
+
+    def test_removal_before_publish_posts_nothing(self):
+        special = self.make_special()
+        distribution.publish(special)
+        distribution.remove_special_from_distributions(special)
+        jobs.drain()
+
+        self.publish_to.assert_not_called()
+        self.remove_from.assert_not_called()
+        self.assertEqual(Publication.objects.get().status, "removed")
+
+    def test_publish_finishing_after_removal_undoes_itself(self):
+        special = self.make_special()
+        distribution.publish(special)
+
+        def publish_during_removal(special, connection):
+            distribution.remove_special_from_distributions(special)
+            distribution.run_publication(Publication.objects.get().pk, "remove")
+            return "posts/late"
+
+        self.publish_to.side_effect = publish_during_removal
+        jobs.drain()
+
+        self.remove_from.assert_called_once_with(special, self.connection, "posts/late")
+        self.assertEqual(Publication.objects.get().status, "removed")
+
+    def test_deleted_special_is_skipped(self):
+        special = self.make_special()
+        distribution.publish(special)
+        special.delete()
+        jobs.drain()
+        self.publish_to.assert_not_called()
+
+
+class ParallelDistributionTests(DistributionTestMixin, TransactionTestCase):
+    def test_channels_publish_concurrently(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.connect("pos")
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_publish(special, connection):
+            with lock:
+                active.append(special.pk)
+                peak.append(len(active))
+            time.sleep(0.2)
+            with lock:
+                active.remove(special.pk)
+            return f"posts/{special.pk}"
+
+        with patch.dict(distribution.CHANNELS, {"pos": (slow_publish, Mock())}):
+            for _ in range(4):
+                distribution.publish(self.make_special())
+            jobs.drain(batch_size=4, concurrency=4)
+
+        self.assertGreater(max(peak), 1)
+        self.assertEqual(Publication.objects.filter(status="published").count(), 4)
+        self.assertEqual(Job.objects.filter(status="done").count(), 4)
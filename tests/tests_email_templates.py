@@ -0,0 +1,91 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app import emails
+from app.models import EmailSignup, Special
+
+
+class NotificationRenderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="Bistro", password="pw")
+        now = timezone.now()
+        self.special = Special.objects.create(
+            user=self.user,
+            title="Fish & <Chips>",
+            description="Crispy",
+            price=12,
+            start_date=now,
+            end_date=now + timedelta(days=1),
+            cta_type="web",
+            cta_url="https://example.com/order",
+            status="active",
+        )
+        self.signups = [
+            EmailSignup.objects.create(restaurant=self.user, email=f"s{i}@example.com") for i in range(3)
+        ]
+
+    def _recipients(self):
+        return [(s.id, s.email) for s in self.signups]
+
+    def test_special_is_rendered_once_for_many_recipients(self):
+        with mock.patch("app.emails.render_to_string", wraps=emails.render_to_string) as render:
+            messages = list(emails.build_special_messages(self.special, self._recipients()))
+            list(emails.build_special_messages(self.special, self._recipients()))
+        self.assertEqual(render.call_count, 2)  # one text and one html render, then cached
+        self.assertEqual(len(messages), 3)
+
+    def test_edit_invalidates_cached_render(self):
+        first = emails.render_special_notification(self.special)
+        self.special.title = "Updated"
+        self.special.save()
+        second = emails.render_special_notification(self.special)
+        self.assertNotEqual(first["subject"], second["subject"])
+        self.assertIn("Updated", second["html"])
+
+    def test_messages_are_personalized_and_escaped(self):
+        messages = list(emails.build_special_messages(self.special, self._recipients()))
+        urls = {emails.unsubscribe_url(s.id) for s in self.signups}
+        self.assertEqual({m.extra_headers["List-Unsubscribe"][1:-1] for m in messages}, urls)
+        for message, signup in zip(messages, self.signups):
+            url = emails.unsubscribe_url(signup.id)
+            html = message.alternatives[0][0]
+            self.assertEqual(message.to, [signup.email])
+            self.assertIn(f"Unsubscribe: {url}", message.body)
+            self.assertIn(f'href="{url}"', html)
+            self.assertNotIn("%%", message.body + html)
+            self.assertIn("Fish &amp; &lt;Chips&gt;", html)
+            self.assertIn("Fish & <Chips>", message.body)
+
+    def test_personalize_fills_placeholders(self):
+        parts = emails.compile_template("a %%x%% b %%y%%")
+        self.assertEqual(emails.personalize(parts, {"x": "1", "y": "2"}), "a 1 b 2")
+
+
+class UnsubscribeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="Bistro", password="pw")
+        self.signup = EmailSignup.objects.create(restaurant=self.user, email="guest@example.com")
+        self.url = emails.unsubscribe_url(self.signup.id).replace("https://appertivo.com", "")
+
+    def test_get_asks_for_confirmation(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "Stop emailing guest@example.com")
+        self.signup.refresh_from_db()
+        self.assertTrue(self.signup.is_active)
+
+    def test_post_unsubscribes(self):
+        response = self.client.post(self.url, {"List-Unsubscribe": "One-Click"})
+        self.assertContains(response, "will no longer receive")
+        self.signup.refresh_from_db()
+        self.assertFalse(self.signup.is_active)
+
+    def test_tampered_token_is_rejected(self):
+        response = self.client.get(reverse("unsubscribe", args=["bogus"]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,86 @@
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from app import llm_cache
+from app.models import LLMCacheEntry
+
+
+def chunk(text=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=text))] if text is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def events(response):
+    parsed = []
+    for raw in b"".join(response.streaming_content).decode().strip().split("\n\n"):
+        event, data = raw.split("\n")
+        parsed.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return parsed
+
+
+@patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"})
+class EnhanceStreamTests(TestCase):
+    def setUp(self):
+        llm_cache.responses.clear()
+        self.addCleanup(llm_cache.responses.clear)
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.client.force_login(self.user)
+        self.body = json.dumps({"title": "Tacos", "description": "Good tacos", "price": "9", "stream": True})
+
+    def post(self):
+        return self.client.post(reverse("enhance_description"), self.body, content_type="application/json")
+
+    @patch("app.ai_gateway.get_client")
+    def test_tokens_are_forwarded_as_they_arrive(self, get_client):
+        progress = []
+
+        def model_stream():
+            for text in ("Sizzling", " street", " tacos"):
+                progress.append(text)
+                yield chunk(text)
+            yield chunk(usage=SimpleNamespace(prompt_tokens=80, completion_tokens=3))
+
+        create = get_client.return_value.chat.completions.create
+        create.return_value = model_stream()
+        response = self.post()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        stream = iter(response.streaming_content)
+        self.assertEqual(next(stream), b'event: delta\ndata: {"text": "Sizzling"}\n\n')
+        self.assertEqual(progress, ["Sizzling"])  # first word sent before the model finished
+
+        rest = b"".join(stream).decode()
+        self.assertIn('event: done\ndata: {"description": "Sizzling street tacos", "cached": false}', rest)
+        self.assertTrue(create.call_args.kwargs["stream"])
+        entry = LLMCacheEntry.objects.get()
+        self.assertEqual((entry.response, entry.prompt_tokens, entry.completion_tokens), ("Sizzling street tacos", 80, 3))
+
+    @patch("app.ai_gateway.get_client")
+    def test_cached_reply_is_streamed_in_one_event(self, get_client):
+        get_client.return_value.chat.completions.create.return_value = iter([chunk("Sizzling tacos")])
+        events(self.post())
+
+        self.assertEqual(
+            events(self.post()),
+            [("delta", {"text": "Sizzling tacos"}), ("done", {"description": "Sizzling tacos", "cached": True})],
+        )
+        get_client.return_value.chat.completions.create.assert_called_once()
+
+    @patch("app.ai_gateway.get_client")
+    def test_model_failure_ends_stream_with_error(self, get_client):
+        def broken():
+            yield chunk("Sizz")
+            raise RuntimeError("connection reset")
+
+        get_client.return_value.chat.completions.create.return_value = broken()
+
+        self.assertEqual(
+            events(self.post()), [("delta", {"text": "Sizz"}), ("error", {"error": "connection reset"})]
+        )
+        self.assertFalse(LLMCacheEntry.objects.exists())
@@ -0,0 +1,122 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from app.integrations.google import GoogleBusinessClient
+
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    """Replays ``server.script`` statuses in order, then answers 200."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+
+    def _reply(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path, self.client_address[1]))
+            status, headers = server.script.pop(0) if server.script else (200, {})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        body = json.dumps({"status": status}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_DELETE = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeGoogle(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, script=()):
+        super().__init__(("127.0.0.1", 0), FakeGoogleHandler)
+        self.lock = threading.Lock()
+        self.script = list(script)
+        self.requests = []
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class GoogleBusinessClientTests(SimpleTestCase):
+    def setUp(self):
+        self.sleeps = []
+        self.client_ = GoogleBusinessClient(max_retries=3, backoff=0.01, sleep=self.sleeps.append)
+
+    def tearDown(self):
+        self.client_.session.close()
+
+    def test_connections_are_reused(self):
+        with FakeGoogle() as server:
+            for _ in range(5):
+                self.assertEqual(self.client_.get(f"{server.url}/v1/accounts").status_code, 200)
+        ports = {port for _, _, port in server.requests}
+        self.assertEqual(len(server.requests), 5)
+        self.assertEqual(len(ports), 1)
+
+    def test_transient_errors_are_retried_honouring_retry_after(self):
+        with FakeGoogle([(503, {"Retry-After": "2"}), (500, {})]) as server:
+            response = self.client_.get(f"{server.url}/v1/accounts")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertGreaterEqual(self.sleeps[0], 2)
+        self.assertLessEqual(self.sleeps[1], 0.02)
+
+    def test_gives_up_after_max_retries(self):
+        with FakeGoogle([(503, {})] * 10) as server:
+            response = self.client_.get(f"{server.url}/v1/accounts")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(server.requests), 4)
+
+    def test_post_is_only_retried_when_not_processed(self):
+        with FakeGoogle([(500, {}), (429, {})]) as server:
+            response = self.client_.post(f"{server.url}/v4/localPosts", json={})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(server.requests), 1)
+
+        with FakeGoogle([(429, {}), (503, {})]) as server:
+            response = self.client_.post(f"{server.url}/v4/localPosts", json={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        with FakeGoogle([(404, {})]) as server:
+            self.assertEqual(self.client_.delete(f"{server.url}/v4/post").status_code, 404)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_connection_errors_are_retried_for_idempotent_calls(self):
+        ok = mock.Mock(status_code=200, headers={})
+        with mock.patch.object(
+            self.client_.session, "request", side_effect=[requests.ConnectionError("reset"), ok]
+        ) as send:
+            self.assertIs(self.client_.get("https://example.invalid/"), ok)
+            self.assertEqual(send.call_count, 2)
+            send.side_effect = requests.ConnectionError("reset")
+            with self.assertRaises(requests.ConnectionError):
+                self.client_.post("https://example.invalid/")
+
+    def test_retry_after_accepts_http_dates_and_is_capped(self):
+        client = GoogleBusinessClient(max_backoff=5)
+        response = mock.Mock(headers={"Retry-After": "Wed, 21 Oct 2099 07:28:00 GMT"})
+        self.assertEqual(client._retry_after(response), 5)
+        response.headers = {"Retry-After": "garbage"}
+        self.assertEqual(client._retry_after(response), 0)
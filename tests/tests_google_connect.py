@@ -1,7 +1,8 @@
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
-from app.models import Connection
+from app import jobs
+from app.models import Connection, Publication
 from unittest.mock import patch, Mock
 from app.integrations.google import complete_google_auth
 
@@ -22,8 +23,8 @@ class GoogleConnectionFlowTests(TestCase):
         GOOGLE_CLIENT_SECRET="sec",
         GOOGLE_REDIRECT_URI="https://redir",
     )
-    @patch("app.integrations.google.requests.get")
-    @patch("app.integrations.google.requests.post")
+    @patch("app.integrations.google.GoogleBusinessClient.get")
+    @patch("app.integrations.google.GoogleBusinessClient.post")
     def test_callback_stores_tokens_and_locations(self, mock_post, mock_get):
         mock_post.return_value.json.return_value = {
             "access_token": "tok",
@@ -136,7 +137,7 @@ class GoogleConnectionFlowTests(TestCase):
         self.assertContains(response, "Loc A")
         self.assertNotContains(response, 'name="location_id"')
     @override_settings(GOOGLE_API_KEY="key")
-    @patch("app.integrations.google.requests.post")
+    @patch("app.integrations.google.GoogleBusinessClient.post")
     @patch("app.views.send_special_notification")
     def test_creating_special_posts_to_google(self, mock_notify, mock_post):
         self.client.force_login(self.user)
@@ -153,6 +154,12 @@ class GoogleConnectionFlowTests(TestCase):
             "cta_type": "web",
             "cta_url": "https://example.com",
         }
+        mock_post.return_value = Mock(status_code=200, json=lambda: {"name": "accounts/acc/localPosts/1"})
         response = self.client.post(reverse("create_special"), data)
         self.assertEqual(response.status_code, 302)
+        self.assertFalse(mock_post.called)  # queued, not posted during the request
+
+        jobs.drain()
         self.assertTrue(mock_post.called)
+        publication = Publication.objects.get()
+        self.assertEqual((publication.status, publication.external_id), ("published", "accounts/acc/localPosts/1"))
@@ -10,7 +10,7 @@ class GoogleLoggingTests(TestCase):
     """Tests for logging output during Google special publication."""
 
     @override_settings(GOOGLE_API_KEY="key")
-    @patch("app.integrations.google.requests.post")
+    @patch("app.integrations.google.GoogleBusinessClient.post")
     def test_publish_special_emits_logs(self, mock_post):
         user = User.objects.create_user(username="owner", password="pw")
         Connection.objects.create(
@@ -0,0 +1,173 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import skipIf
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from app.integrations import google
+from app.models import Connection
+
+
+def _response(status, body=None):
+    return Mock(status_code=status, text="", headers={}, json=lambda: body or {})
+
+
+class GoogleTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.conn = Connection.objects.create(
+            user=self.user,
+            platform="google_business",
+            is_connected=True,
+            settings={
+                "access_token": "old",
+                "refresh_token": "ref",
+                "token_expires_at": time.time() + 3600,
+                "account_id": "acc",
+                "location_id": "loc",
+            },
+        )
+
+    def _expire(self, seconds_left=30):
+        self.conn.settings["token_expires_at"] = time.time() + seconds_left
+        self.conn.save()
+
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    def test_fresh_token_is_used_without_refresh(self, post):
+        self.assertEqual(google.get_access_token(self.conn), "old")
+        post.assert_not_called()
+
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    def test_refreshes_shortly_before_expiry(self, post):
+        self._expire()
+        post.return_value = _response(200, {"access_token": "new", "expires_in": 3599, "refresh_token": "ref2"})
+        self.assertEqual(google.get_access_token(self.conn), "new")
+        self.assertEqual(google.get_access_token(self.conn), "new")
+        self.assertEqual(post.call_count, 1)
+
+        self.conn.refresh_from_db()
+        self.assertEqual(self.conn.settings["access_token"], "new")
+        self.assertEqual(self.conn.settings["refresh_token"], "ref2")
+        self.assertGreater(self.conn.settings["token_expires_at"], time.time() + 3500)
+
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    def test_worker_reuses_token_refreshed_by_another(self, post):
+        self._expire()
+        stale_copy = Connection.objects.get(pk=self.conn.pk)
+        settings = dict(self.conn.settings, access_token="other", token_expires_at=time.time() + 3600)
+        Connection.objects.filter(pk=self.conn.pk).update(settings=settings)
+
+        self.assertEqual(google.get_access_token(stale_copy), "other")
+        self.assertEqual(google.get_access_token(stale_copy, stale_token="old"), "other")
+        post.assert_not_called()
+
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    def test_refresh_runs_outside_a_transaction_and_keeps_a_concurrent_result(self, post):
+        self._expire()
+        depth = len(connection.atomic_blocks)
+
+        def refresh(*args, **kwargs):
+            self.assertEqual(len(connection.atomic_blocks), depth)  # no transaction held over HTTP
+            # Another worker stores its token while this request is in flight.
+            settings = dict(self.conn.settings, access_token="other", token_expires_at=time.time() + 3600)
+            Connection.objects.filter(pk=self.conn.pk).update(settings=settings)
+            return _response(200, {"access_token": "mine", "expires_in": 3599})
+
+        post.side_effect = refresh
+        self.assertEqual(google.get_access_token(self.conn), "other")
+        self.conn.refresh_from_db()
+        self.assertEqual(self.conn.settings["access_token"], "other")
+
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    def test_waits_for_the_worker_holding_the_refresh(self, post):
+        self._expire()
+        Connection.objects.filter(pk=self.conn.pk).update(token_refresh_until=timezone.now() + timedelta(seconds=30))
+
+        def other_worker_finishes(_seconds):
+            settings = dict(self.conn.settings, access_token="other", token_expires_at=time.time() + 3600)
+            Connection.objects.filter(pk=self.conn.pk).update(settings=settings, token_refresh_until=None)
+
+        with patch("app.integrations.google.time.sleep", side_effect=other_worker_finishes):
+            self.assertEqual(google.get_access_token(self.conn), "other")
+        post.assert_not_called()
+
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    def test_refresh_mark_is_released_when_refresh_fails(self, post):
+        self._expire()
+        post.return_value = _response(400, {"error": "invalid_grant"})
+        self.assertEqual(google.get_access_token(self.conn), "old")
+        self.conn.refresh_from_db()
+        self.assertIsNone(self.conn.token_refresh_until)
+
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    @patch("app.integrations.google.GoogleBusinessClient.delete")
+    def test_remove_retries_once_after_401(self, delete, post):
+        delete.side_effect = [_response(401), _response(200)]
+        post.return_value = _response(200, {"access_token": "new", "expires_in": 3599})
+        google.remove_special(SimpleNamespace(user=self.user, google_post_name="accounts/acc/localPosts/1"))
+
+        self.assertEqual(delete.call_count, 2)
+        self.assertEqual(delete.call_args_list[0].kwargs["headers"]["Authorization"], "Bearer old")
+        self.assertEqual(delete.call_args_list[1].kwargs["headers"]["Authorization"], "Bearer new")
+        self.assertEqual(post.call_count, 1)
+
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    def test_publish_gives_up_after_second_401(self, post):
+        post.side_effect = [_response(401), _response(400, {"error": "invalid_grant"})]
+        special = SimpleNamespace(
+            user=self.user, title="Deal", description="Desc", cta_url="", start_date=None, end_date=None
+        )
+        with self.assertLogs("app.integrations.google", level="ERROR"):
+            google.publish_special(special)
+        self.assertEqual(post.call_count, 2)  # the publish and the failed refresh
+
+    @patch("app.integrations.google.get_accounts_and_locations", return_value=("acc", "Acc", [], {}))
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    def test_connect_records_expiry(self, post, _accounts):
+        post.return_value = _response(200, {"access_token": "tok", "refresh_token": "ref", "expires_in": 3599})
+        conn = google.complete_google_auth(self.user, "code")
+        self.assertAlmostEqual(conn.settings["token_expires_at"], time.time() + 3599, delta=5)
+
+
+@skipIf(connection.vendor == "sqlite" and not os.getenv("TEST_DATABASE_NAME"),
+        "needs a file database (set TEST_DATABASE_NAME); in-memory SQLite fails concurrent writers outright")
+class ConcurrentRefreshTests(TransactionTestCase):
+    """Workers finding the same expired token must refresh it only once."""
+
+    WORKERS = 6
+
+    def setUp(self):
+        user = User.objects.create_user(username="owner", password="pw")
+        self.conn = Connection.objects.create(
+            user=user,
+            platform="google_business",
+            is_connected=True,
+            settings={"access_token": "old", "refresh_token": "ref", "token_expires_at": time.time() + 30},
+        )
+
+    def _token(self, _worker):
+        try:
+            return google.get_access_token(Connection.objects.get(pk=self.conn.pk))
+        finally:
+            connection.close()
+
+    @patch("app.integrations.google.GoogleBusinessClient.post")
+    def test_parallel_callers_make_one_refresh_request(self, post):
+        def refresh(*args, **kwargs):
+            time.sleep(0.3)
+            return _response(200, {"access_token": "new", "expires_in": 3599})
+
+        post.side_effect = refresh
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            tokens = list(pool.map(self._token, range(self.WORKERS)))
+
+        self.assertEqual(tokens, ["new"] * self.WORKERS)
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(post.call_args.args[0], google.TOKEN_ENDPOINT)
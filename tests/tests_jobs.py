@@ -0,0 +1,160 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app import jobs
+from app.models import EmailSignup, Job, Special
+
+calls = []
+
+
+def record(**payload):
+    calls.append(payload)
+
+
+def explode(**payload):
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claimed_job_runs_once(self):
+        job = jobs.enqueue(f"{__name__}.record", value=1)
+        self.assertEqual(jobs.drain(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(calls, [{"value": 1}])
+        self.assertEqual(jobs.drain(), 0)
+
+    def test_future_jobs_wait(self):
+        jobs.enqueue(f"{__name__}.record", run_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(jobs.work(), 0)
+
+    @override_settings(JOB_RETRY_DELAY=10)
+    def test_failures_back_off_then_give_up(self):
+        job = jobs.enqueue(f"{__name__}.explode", max_attempts=2)
+        jobs.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "queued")
+        self.assertIn("RuntimeError: boom", job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(JOB_LEASE_SECONDS=60)
+    def test_job_from_dead_worker_is_reclaimed(self):
+        job = jobs.enqueue(f"{__name__}.record")
+        self.assertEqual(len(jobs.claim(worker="dead")), 1)
+        # Still leased: nobody else may take it.
+        self.assertEqual(jobs.claim(worker="live"), [])
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(jobs.drain(worker="live"), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("done", 2))
+        self.assertTrue(job.locked_by.startswith("live/"))
+
+    def test_run_jobs_command_drains_queue(self):
+        jobs.enqueue(f"{__name__}.record", value=2)
+        call_command("run_jobs", "--once", stdout=mock.Mock())
+        self.assertEqual(calls, [{"value": 2}])
+
+    @mock.patch("app.management.commands.run_jobs.time.sleep")
+    def test_run_jobs_survives_a_locked_database(self, sleep):
+        jobs.enqueue(f"{__name__}.record", value=3)
+        real_work = jobs.work
+        errors = [OperationalError("database is locked")]
+
+        def flaky(*args):
+            if errors:
+                raise errors.pop()
+            return real_work(*args)
+
+        with mock.patch("app.jobs.work", side_effect=flaky), self.assertLogs("app.management.commands.run_jobs", "ERROR"):
+            call_command("run_jobs", "--once", stdout=mock.Mock())
+        self.assertEqual(calls, [{"value": 3}])
+        sleep.assert_called_once_with(4.0)
+
+
+@skipIf(connection.vendor == "sqlite" and not os.getenv("TEST_DATABASE_NAME"),
+        "needs a file database (set TEST_DATABASE_NAME); in-memory SQLite fails concurrent writers outright")
+class ConcurrentClaimTests(TransactionTestCase):
+    """Workers claiming at the same time must neither fail nor share jobs."""
+
+    WORKERS = 4
+
+    def _claim(self, worker):
+        try:
+            return [job.pk for job in jobs.claim(5, worker=f"w{worker}")]
+        finally:
+            connection.close()
+
+    def test_parallel_workers_claim_disjoint_batches(self):
+        jobs.enqueue_many(f"{__name__}.record", [{"value": i} for i in range(20)])
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            batches = list(pool.map(self._claim, range(self.WORKERS)))
+
+        claimed = [pk for batch in batches for pk in batch]
+        self.assertEqual([len(batch) for batch in batches], [5] * self.WORKERS)
+        self.assertEqual(len(set(claimed)), 20)
+        self.assertEqual(Job.objects.filter(status="running").count(), 20)
+
+
+@override_settings(CAMPAIGN_PAGE_SIZE=2, CAMPAIGN_SENDS_PER_SECOND=1000)
+class SpecialNotificationQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        for i in range(5):
+            EmailSignup.objects.create(restaurant=self.user, email=f"s{i}@example.com")
+        EmailSignup.objects.create(restaurant=self.user, email="gone@example.com", is_active=False)
+        self.client.force_login(self.user)
+
+    @mock.patch("app.views.publish_special")
+    def test_create_special_queues_instead_of_sending(self, _publish):
+        response = self.client.post(reverse("create_special"), {
+            "title": "Deal",
+            "description": "Desc",
+            "price": "5.00",
+            "start_date": "2024-01-01T00:00",
+            "end_date": "2024-01-02T00:00",
+            "cta_type": "web",
+            "cta_url": "https://example.com",
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().task, "app.campaigns.run")
+
+        jobs.drain()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f"s{i}@example.com" for i in range(5)])
+        self.assertIn("Jan. 1, 2024", mail.outbox[0].body)
+        self.assertEqual(Job.objects.exclude(status="done").count(), 0)
+
+    def test_deleted_special_sends_nothing(self):
+        now = timezone.now()
+        special = Special.objects.create(
+            user=self.user, title="T", description="D", price=1, start_date=now, end_date=now, status="active"
+        )
+        from app.emails import send_special_notification
+
+        send_special_notification(special)
+        special.delete()
+        jobs.drain()
+        self.assertEqual(len(mail.outbox), 0)
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app import llm_cache
+from app.models import LLMCacheEntry
+
+
+MESSAGES = [{"role": "user", "content": "Enhance:\n  Title: Tacos"}]
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.cache = llm_cache.ResponseCache()
+        self.compute = Mock(return_value=llm_cache.CachedResponse("Crispy tacos", 40, 10))
+
+    def test_key_ignores_whitespace_but_not_parameters(self):
+        key = llm_cache.cache_key("gpt-4o", MESSAGES, temperature=0.7)
+        spaced = [{"role": "user", "content": " Enhance: Title:   Tacos "}]
+        self.assertEqual(llm_cache.cache_key("gpt-4o", spaced, temperature=0.7), key)
+        self.assertNotEqual(llm_cache.cache_key("gpt-4o", MESSAGES, temperature=0.2), key)
+        self.assertNotEqual(llm_cache.cache_key("gpt-4o-mini", MESSAGES, temperature=0.7), key)
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.cache.get_or_compute("gpt-4o", MESSAGES, self.compute, temperature=0.7)
+        with self.assertNumQueries(0):  # served from memory; the hit count is buffered
+            second = self.cache.get_or_compute("gpt-4o", MESSAGES, self.compute, temperature=0.7)
+
+        self.compute.assert_called_once()
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.text, "Crispy tacos")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_other_workers_share_entries_through_the_table(self):
+        self.cache.get_or_compute("gpt-4o", MESSAGES, self.compute)
+        other = llm_cache.ResponseCache()
+        self.assertTrue(other.get_or_compute("gpt-4o", MESSAGES, self.compute).cached)
+        self.assertTrue(other.get_or_compute("gpt-4o", MESSAGES, self.compute).cached)
+        self.compute.assert_called_once()
+
+        other.flush_hits()
+        self.assertEqual(
+            llm_cache.stats(), {"entries": 1, "hits": 2, "hit_rate": 2 / 3, "tokens_saved": 100}
+        )
+
+    def test_expired_entries_are_recomputed(self):
+        self.cache.get_or_compute("gpt-4o", MESSAGES, self.compute)
+        LLMCacheEntry.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.cache.clear()
+
+        self.assertFalse(self.cache.get_or_compute("gpt-4o", MESSAGES, self.compute).cached)
+        self.assertEqual(self.compute.call_count, 2)
+        self.assertEqual(LLMCacheEntry.objects.count(), 1)
+
+    def test_memory_is_bounded_lru(self):
+        cache = llm_cache.ResponseCache(max_entries=2)
+        for word in ("a", "b", "c"):
+            cache.get_or_compute("gpt-4o", [word], self.compute)
+        self.assertEqual(len(cache._entries), 2)
+        self.assertNotIn(llm_cache.cache_key("gpt-4o", ["a"]), cache._entries)
+
+    @override_settings(LLM_CACHE_HIT_FLUSH_THRESHOLD=3)
+    def test_hits_are_written_in_batches(self):
+        self.cache.get_or_compute("gpt-4o", MESSAGES, self.compute)
+        self.cache.lookup("gpt-4o", MESSAGES)
+        self.cache.lookup("gpt-4o", MESSAGES)
+        self.assertEqual(LLMCacheEntry.objects.get().hits, 0)
+
+        with self.assertNumQueries(3):  # the third hit flushes: one UPDATE in a transaction
+            self.cache.lookup("gpt-4o", MESSAGES)
+        self.assertEqual(LLMCacheEntry.objects.get().hits, 3)
+
+    @override_settings(LLM_CACHE_HIT_FLUSH_THRESHOLD=10_000)
+    def test_counters_are_exact_across_threads(self):
+        self.cache.get_or_compute("gpt-4o", MESSAGES, self.compute)
+
+        def read():
+            for _ in range(500):
+                self.cache.lookup("gpt-4o", MESSAGES)
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((self.cache.hits, self.cache.misses), (4000, 1))
+        self.assertEqual(self.cache.flush_hits(), 4000)
+
+    @override_settings(LLM_CACHE_MAX_ROWS=2, LLM_CACHE_EVICT_INTERVAL=3600)
+    def test_eviction_is_not_run_on_every_insert(self):
+        for word in ("a", "b", "c"):
+            self.cache.get_or_compute("gpt-4o", [word], self.compute)
+        self.assertEqual(LLMCacheEntry.objects.count(), 3)
+        self.assertEqual(llm_cache.evict(), 1)
+        self.assertEqual(LLMCacheEntry.objects.count(), 2)
+
+    @override_settings(LLM_CACHE_MAX_ROWS=2, LLM_CACHE_EVICT_INTERVAL=0)
+    def test_table_is_trimmed_to_most_recently_used(self):
+        for word in ("a", "b", "c"):
+            self.cache.get_or_compute("gpt-4o", [word], self.compute)
+        self.assertEqual(LLMCacheEntry.objects.count(), 2)
+        self.assertFalse(LLMCacheEntry.objects.filter(key=llm_cache.cache_key("gpt-4o", ["a"])).exists())
+
+
+@patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"})
+class EnhanceDescriptionCacheTests(TestCase):
+    def setUp(self):
+        llm_cache.responses.clear()
+        self.addCleanup(llm_cache.responses.clear)
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.client.force_login(self.user)
+
+    @patch("app.ai_gateway.get_client")
+    def test_repeat_enhancement_skips_the_model(self, get_client):
+        completion = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=" Sizzling tacos "))],
+            usage=SimpleNamespace(prompt_tokens=80, completion_tokens=12),
+        )
+        get_client.return_value.chat.completions.create.return_value = completion
+        body = json.dumps({"title": "Tacos", "description": "Good tacos", "price": "9"})
+
+        first = self.client.post(reverse("enhance_description"), body, content_type="application/json").json()
+        second = self.client.post(reverse("enhance_description"), body, content_type="application/json").json()
+
+        self.assertEqual(first, {"description": "Sizzling tacos", "cached": False})
+        self.assertEqual(second, {"description": "Sizzling tacos", "cached": True})
+        get_client.return_value.chat.completions.create.assert_called_once()
+        self.assertEqual(llm_cache.stats()["tokens_saved"], 92)
@@ -0,0 +1,165 @@
+import os
+import smtplib
+import socketserver
+import threading
+import time
+import unittest
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.test import SimpleTestCase, override_settings
+
+from app import mailer
+
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail and refuse addresses containing 'refused'."""
+
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b"220 sink\r\n")
+        in_data = False
+        for line in self.rfile:
+            if in_data:
+                if line == b".\r\n":
+                    in_data = False
+                    self.server.messages += 1
+                    self.wfile.write(b"250 queued\r\n")
+                continue
+            command = line[:4].upper()
+            if command == b"DATA":
+                in_data = True
+                self.wfile.write(b"354 go ahead\r\n")
+            elif command == b"RCPT" and b"refused" in line:
+                self.wfile.write(b"550 no such user\r\n")
+            elif command == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SinkHandler)
+        self.connections = 0
+        self.messages = 0
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def _messages(count, refused=()):
+    for i in range(count):
+        to = f"refused{i}@example.com" if i in refused else f"guest{i}@example.com"
+        yield EmailMultiAlternatives("Hi", "text", "from@example.com", [to], alternatives=[("<p>html</p>", "text/html")])
+
+
+class _FlakyConnection:
+    """Connection that drops after delivering ``fail_after`` messages."""
+
+    def __init__(self, fail_after):
+        self.fail_after = fail_after
+        self.sent = []
+
+    def open(self):
+        return True
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        if len(self.sent) >= self.fail_after:
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        self.sent.extend(messages)
+        return len(messages)
+
+
+class _CountingConnection(_FlakyConnection):
+    """Connection that records how often it is opened and closed."""
+
+    def __init__(self):
+        super().__init__(fail_after=float("inf"))
+        self.opened = 0
+        self.closed = 0
+
+    def open(self):
+        self.opened += 1
+        return True
+
+    def close(self):
+        self.closed += 1
+
+
+@override_settings(MAIL_RETRY_DELAY=0)
+class DeliveryTests(SimpleTestCase):
+    def test_batch_reuses_one_connection(self):
+        connection = _CountingConnection()
+        with mock.patch("app.mailer.get_connection", return_value=connection) as get_connection:
+            report = mailer.deliver(_messages(1000), batch_size=1000)
+        self.assertEqual(report.delivered, 1000)
+        self.assertEqual(len(connection.sent), 1000)
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual((connection.opened, connection.closed), (1, 1))
+
+    def test_one_connection_per_batch(self):
+        with SMTPSink() as sink, self.settings(EMAIL_HOST="127.0.0.1", EMAIL_PORT=sink.server_address[1]):
+            report = mailer.deliver(_messages(250), batch_size=100, backend=SMTP_BACKEND)
+        self.assertEqual((report.delivered, report.failed, report.batches), (250, 0, 3))
+        self.assertEqual(sink.messages, 250)
+        self.assertEqual(sink.connections, 3)
+
+    def test_refused_recipients_are_reported_not_retried(self):
+        with SMTPSink() as sink, self.settings(EMAIL_HOST="127.0.0.1", EMAIL_PORT=sink.server_address[1]):
+            report = mailer.deliver(_messages(10, refused={3, 7}), batch_size=5, backend=SMTP_BACKEND)
+        self.assertEqual((report.delivered, report.failed), (8, 2))
+        self.assertEqual(report.failed_recipients, ["refused3@example.com", "refused7@example.com"])
+        self.assertEqual(sink.connections, 2)
+
+    def test_dropped_connection_resends_only_the_rest(self):
+        connections = [_FlakyConnection(fail_after=3), _FlakyConnection(fail_after=100)]
+        with mock.patch("app.mailer.get_connection", side_effect=connections):
+            report = mailer.deliver(_messages(8), batch_size=8)
+        self.assertEqual((report.delivered, report.failed), (8, 0))
+        sent = [m.to[0] for c in connections for m in c.sent]
+        self.assertEqual(sent, [f"guest{i}@example.com" for i in range(8)])
+
+    def test_gives_up_after_retries(self):
+        connections = [_FlakyConnection(fail_after=0) for _ in range(3)]
+        with mock.patch("app.mailer.get_connection", side_effect=connections):
+            report = mailer.deliver(_messages(4), batch_size=10, retries=2)
+        self.assertEqual((report.delivered, report.failed), (0, 4))
+
+    def test_default_backend_is_used(self):
+        report = mailer.deliver(_messages(3))
+        self.assertEqual(report.delivered, 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @unittest.skipUnless(os.getenv("RUN_SMTP_BENCHMARK"), "set RUN_SMTP_BENCHMARK=1 to run")
+    def test_batched_throughput_at_10k_recipients(self):
+        count = 10_000
+        with SMTPSink() as sink, self.settings(EMAIL_HOST="127.0.0.1", EMAIL_PORT=sink.server_address[1]):
+            start = time.perf_counter()
+            for message in _messages(count):
+                message.connection = None
+                with self.settings(EMAIL_BACKEND=SMTP_BACKEND):
+                    message.send()
+            per_message = time.perf_counter() - start
+
+            start = time.perf_counter()
+            report = mailer.deliver(_messages(count), batch_size=500, backend=SMTP_BACKEND)
+            batched = time.perf_counter() - start
+        self.assertEqual(report.delivered, count)
+        self.assertEqual(sink.connections, count + count // 500)
+        self.assertLess(batched, per_message, f"per-message {per_message:.2f}s, batched {batched:.2f}s")
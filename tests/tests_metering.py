@@ -0,0 +1,217 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import skipIf
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app import ai_gateway, llm_cache, metering
+from app.models import AIUsage, DailyAIUsage, Special, UserProfile
+
+
+def completion(text="Sizzling tacos", prompt_tokens=120, completion_tokens=30):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens),
+    )
+
+
+BUDGETS = {
+    "free": {"daily_tokens": 1_000, "requests_per_minute": 3},
+    "pro": {"daily_tokens": 100_000, "requests_per_minute": 60},
+}
+
+
+@override_settings(OPENAI_API_KEY="sk-test", AI_BUDGETS=BUDGETS)
+@patch("app.ai_gateway.get_client")
+class MeteringTests(TestCase):
+    def setUp(self):
+        llm_cache.responses.clear()
+        self.addCleanup(llm_cache.responses.clear)
+        self.user = User.objects.create_user(username="owner", password="pw")
+
+    def use_tokens(self, tokens, user=None):
+        DailyAIUsage.objects.create(
+            user=user or self.user, day=timezone.now().date(), model="gpt-4o", calls=1, prompt_tokens=tokens
+        )
+
+    def test_calls_are_recorded_and_rolled_up_per_day(self, get_client):
+        get_client.return_value.chat.completions.create.return_value = completion()
+
+        ai_gateway.chat("gpt-4o", [], tenant=self.user)
+        ai_gateway.chat("gpt-4o", [], tenant=self.user)
+
+        self.assertEqual(AIUsage.objects.filter(user=self.user, model="gpt-4o", prompt_tokens=120).count(), 2)
+        rollup = DailyAIUsage.objects.get(user=self.user)
+        self.assertEqual((rollup.calls, rollup.prompt_tokens, rollup.completion_tokens), (2, 240, 60))
+        self.assertEqual(metering.tokens_today(self.user), 300)
+
+    def test_stream_is_recorded_once_consumed(self, get_client):
+        get_client.return_value.chat.completions.create.return_value = iter([
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Hi"))], usage=None),
+            SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=50, completion_tokens=1)),
+        ])
+
+        stream = ai_gateway.stream_chat("gpt-4o", [], tenant=self.user)
+        self.assertTrue(AIUsage.objects.get().in_flight)
+        list(stream)
+
+        usage = AIUsage.objects.get()
+        self.assertEqual((usage.prompt_tokens, usage.completion_tokens, usage.ok, usage.in_flight), (50, 1, True, False))
+
+    def test_failed_calls_count_as_errors(self, get_client):
+        get_client.return_value.responses.create.side_effect = RuntimeError("timeout")
+
+        with self.assertRaises(RuntimeError):
+            ai_gateway.respond("gpt-4.1-mini", "hi", tenant=self.user)
+
+        self.assertFalse(AIUsage.objects.get().ok)
+        self.assertEqual(DailyAIUsage.objects.get().errors, 1)
+
+    def test_exhausted_budget_blocks_the_request(self, get_client):
+        self.use_tokens(1_000)
+
+        with self.assertRaises(metering.BudgetExceeded) as raised:
+            ai_gateway.chat("gpt-4o", [], tenant=self.user)
+
+        get_client.return_value.chat.completions.create.assert_not_called()
+        self.assertGreater(raised.exception.retry_after, 0)
+
+    def test_budget_follows_subscription_tier(self, get_client):
+        get_client.return_value.chat.completions.create.return_value = completion()
+        UserProfile.objects.create(user=self.user, restaurant_name="Taqueria", subscription_tier="pro")
+        self.use_tokens(1_000)
+
+        ai_gateway.chat("gpt-4o", [], tenant=self.user)
+
+        self.assertEqual(AIUsage.objects.count(), 1)
+
+    def test_requests_per_minute_are_capped(self, get_client):
+        get_client.return_value.chat.completions.create.return_value = completion(prompt_tokens=1, completion_tokens=1)
+        for _ in range(3):
+            ai_gateway.chat("gpt-4o", [], tenant=self.user)
+
+        with self.assertRaises(metering.BudgetExceeded):
+            ai_gateway.chat("gpt-4o", [], tenant=self.user)
+        # Other tenants and system calls are unaffected.
+        ai_gateway.chat("gpt-4o", [], tenant=User.objects.create_user(username="other", password="pw"))
+        ai_gateway.chat("gpt-4o", [])
+        self.assertEqual(DailyAIUsage.objects.get(user=None).calls, 1)
+
+    def test_calls_in_flight_hold_their_estimate(self, get_client):
+        self.use_tokens(200)
+        first = metering.reserve(self.user, "gpt-4o", 400)
+        metering.reserve(self.user, "gpt-4o", 300)
+
+        self.assertEqual(metering.tokens_reserved(self.user), 700)
+        with self.assertRaises(metering.BudgetExceeded):
+            metering.reserve(self.user, "gpt-4o", 200)
+
+        metering.record(self.user, "gpt-4o", metering.Usage(50, 10), 0.2, reservation=first)
+        self.assertEqual(metering.tokens_reserved(self.user), 300)
+        self.assertEqual(metering.tokens_today(self.user), 260)
+        metering.reserve(self.user, "gpt-4o", 200)
+        self.assertEqual(AIUsage.objects.count(), 3)
+
+    def test_stale_reservations_stop_counting(self, get_client):
+        metering.reserve(self.user, "gpt-4o", 900, now=timezone.now() - timedelta(hours=1))
+        self.assertEqual(metering.tokens_reserved(self.user), 0)
+
+    def test_request_larger_than_the_remaining_budget_is_refused(self, get_client):
+        self.use_tokens(900)
+        with self.assertRaises(metering.BudgetExceeded):
+            ai_gateway.chat("gpt-4o", [], tenant=self.user, max_tokens=200)
+        get_client.return_value.chat.completions.create.assert_not_called()
+        self.assertFalse(AIUsage.objects.exists())
+
+    def test_enhance_specials_over_budget_returns_429(self, get_client):
+        special = Special.objects.create(
+            user=self.user, title="Tacos", description="Good", price=9,
+            start_date=timezone.now(), end_date=timezone.now() + timedelta(days=1),
+        )
+        metering.reserve(self.user, "gpt-4.1-mini", 1_000)
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("enhance_specials"), json.dumps({"special_ids": [str(special.pk)]}), content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        get_client.return_value.responses.create.assert_not_called()
+
+    def test_enhance_description_over_budget_returns_429(self, get_client):
+        self.use_tokens(5_000)
+        self.client.force_login(self.user)
+        body = json.dumps({"title": "Tacos", "description": "Good tacos", "price": "9"})
+
+        response = self.client.post(reverse("enhance_description"), body, content_type="application/json")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], str(response.json()["retry_after"]))
+        get_client.return_value.chat.completions.create.assert_not_called()
+
+
+@skipIf(connection.vendor == "sqlite" and not os.getenv("TEST_DATABASE_NAME"),
+        "needs a file database (set TEST_DATABASE_NAME); in-memory SQLite fails concurrent writers outright")
+@override_settings(AI_BUDGETS=BUDGETS)
+class ConcurrentReservationTests(TransactionTestCase):
+    """Parallel calls of one tenant must not all pass the same budget check."""
+
+    WORKERS = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+
+    def _reserve(self, _):
+        try:
+            metering.reserve(self.user, "gpt-4o", 400)
+            return True
+        except metering.BudgetExceeded:
+            return False
+        finally:
+            connection.close()
+
+    def test_parallel_reservations_stay_within_the_budget(self):
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            reserved = list(pool.map(self._reserve, range(self.WORKERS)))
+
+        self.assertEqual(reserved.count(True), 2)  # 2 x 400 of the 1000-token allowance
+        self.assertEqual(AIUsage.objects.filter(in_flight=True).count(), 2)
+        self.assertEqual(metering.tokens_reserved(self.user), 800)
+
+
+class LatencyReportTests(TestCase):
+    def test_percentiles_per_model(self):
+        now = timezone.now()
+        AIUsage.objects.bulk_create(
+            [AIUsage(model="gpt-4o", latency_ms=ms, created_at=now - timedelta(minutes=1)) for ms in range(100, 0, -1)]
+            + [AIUsage(model="gpt-4.1-mini", latency_ms=40, created_at=now - timedelta(minutes=1))]
+            + [AIUsage(model="gpt-4o", latency_ms=9_000, created_at=now - timedelta(days=2))]
+        )
+
+        self.assertEqual(
+            metering.latency_percentiles(until=now),
+            {
+                "gpt-4o": {"calls": 100, "p50": 50, "p95": 95},
+                "gpt-4.1-mini": {"calls": 1, "p50": 40, "p95": 40},
+            },
+        )
+
+    @override_settings(AI_USAGE_RETENTION_DAYS=30)
+    def test_prune_keeps_daily_rollups(self):
+        now = timezone.now()
+        AIUsage.objects.create(model="gpt-4o", created_at=now - timedelta(days=31))
+        AIUsage.objects.create(model="gpt-4o", created_at=now)
+        DailyAIUsage.objects.create(day=(now - timedelta(days=31)).date(), model="gpt-4o", calls=1)
+
+        self.assertEqual(metering.prune(now), 1)
+        self.assertEqual(AIUsage.objects.count(), 1)
+        self.assertEqual(DailyAIUsage.objects.count(), 1)
@@ -0,0 +1,75 @@
+"""Guard the hot ``Special`` queries against regressing to full table scans.
+
+Each test runs the real code path, captures the SQL it sends, and checks the
+SQLite ``EXPLAIN QUERY PLAN`` of every ``app_special`` query.
+"""
+import unittest
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app import cron, scheduler, widget_cache
+from app.models import Special
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite-specific")
+class SpecialQueryPlanTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        now = timezone.now()
+        for days in (-3, 0, 3):
+            Special.objects.create(
+                user=self.user, title="Deal", description="Desc", price=5, status="active",
+                start_date=now + timedelta(days=days), end_date=now + timedelta(days=days + 1),
+            )
+
+    def plans(self, func):
+        """Return the query plan lines of each ``app_special`` query ``func`` runs."""
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        plans = []
+        for query in ctx.captured_queries:
+            if 'FROM "app_special"' not in query["sql"]:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                plans.append([row[-1] for row in cursor.fetchall()])
+        self.assertTrue(plans, "no app_special queries were captured")
+        return plans
+
+    def assertIndexed(self, func, *indexes):
+        plans = self.plans(func)
+        for plan in plans:
+            scans = [line for line in plan if line.startswith("SCAN app_special")]
+            self.assertFalse(scans, f"full scan in query plan: {plan}")
+        used = " ".join(line for plan in plans for line in plan)
+        for index in indexes:
+            self.assertIn(f"INDEX {index} ", used)
+        return plans
+
+    def test_widget_snapshot(self):
+        self.assertIndexed(lambda: widget_cache.build_snapshot(self.user.id), "special_user_status_start")
+
+    def test_cron_expiry(self):
+        self.assertIndexed(cron.unpublish_expired_specials, "special_status_end")
+
+    def test_scheduler_boundaries(self):
+        plans = self.assertIndexed(
+            lambda: scheduler.Scheduler().load(), "special_status_end", "special_status_start"
+        )
+        self.assertFalse([line for plan in plans for line in plan if "TEMP B-TREE" in line])
+
+    def test_dashboard(self):
+        self.client.force_login(self.user)
+        plans = self.assertIndexed(lambda: self.client.get(reverse("dashboard")), "special_user_status_created")
+        self.assertFalse([line for plan in plans for line in plan if "TEMP B-TREE FOR ORDER BY" in line])
+
+    def test_specials_list(self):
+        self.client.force_login(self.user)
+        plans = self.assertIndexed(lambda: self.client.get(reverse("specials_list")), "special_user_created")
+        self.assertFalse([line for plan in plans for line in plan if "TEMP B-TREE FOR ORDER BY" in line])
@@ -0,0 +1,140 @@
+import json
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app import counters, reach
+from app.hll import HyperLogLog
+from app.models import Special, VisitorSketch
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_is_close_to_true_cardinality(self):
+        sketch = HyperLogLog()
+        for i in range(20000):
+            sketch.add(f"visitor-{i}")
+        self.assertAlmostEqual(sketch.count(), 20000, delta=20000 * 0.1)
+
+    def test_small_counts_are_exact_enough(self):
+        sketch = HyperLogLog()
+        for i in range(50):
+            sketch.add(f"v{i}")
+            sketch.add(f"v{i}")
+        self.assertAlmostEqual(sketch.count(), 50, delta=3)
+
+    def test_merge_is_a_union(self):
+        a, b = HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            a.add(str(i))
+        for i in range(2000, 5000):
+            b.add(str(i))
+        a.merge(b)
+        self.assertAlmostEqual(a.count(), 5000, delta=500)
+
+    def test_round_trips_through_bytes(self):
+        sketch = HyperLogLog()
+        sketch.add("x")
+        data = sketch.to_bytes()
+        self.assertEqual(len(data), 1 + 1024)
+        self.assertEqual(HyperLogLog.from_bytes(data).registers, sketch.registers)
+
+    def test_mismatched_precision_cannot_merge(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+
+class ReachTests(TestCase):
+    def setUp(self):
+        caches["widget"].clear()
+        counters.flush()
+        reach.flush()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        now = timezone.now()
+        self.special = Special.objects.create(
+            user=self.user,
+            title="Deal",
+            description="Desc",
+            price=10,
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+            status="active",
+        )
+
+    def tearDown(self):
+        counters.flush()
+        reach.flush()
+
+    def test_flushes_from_several_workers_merge(self):
+        first, second = reach.SketchBuffer(), reach.SketchBuffer()
+        for i in range(300):
+            first.record(self.user.id, self.special.id, f"v{i}")
+        for i in range(200, 500):
+            second.record(self.user.id, self.special.id, f"v{i}")
+        first.flush()
+        second.flush()
+
+        self.assertEqual(VisitorSketch.objects.filter(special=self.special).count(), 1)
+        self.assertEqual(VisitorSketch.objects.filter(user=self.user, special__isnull=True).count(), 1)
+        self.assertAlmostEqual(reach.special_reach(self.special), 500, delta=50)
+        today = timezone.now().date()
+        self.assertAlmostEqual(reach.restaurant_reach(self.user, today, today), 500, delta=50)
+
+    def test_idle_buffer_is_flushed_in_the_background(self):
+        buffer = reach.SketchBuffer(flush_interval=0.01, flush_threshold=100, background=True)
+        flushed = threading.Event()
+        self.addCleanup(buffer.stop)
+        with patch.object(buffer, "flush", side_effect=lambda: flushed.set()):
+            buffer.record(self.user.id, self.special.id, "v1")
+            self.assertTrue(flushed.wait(5))
+        self.assertEqual(buffer._thread.name, "reach-flush")
+
+    def test_restaurant_reach_unions_days(self):
+        today = timezone.now().date()
+        for offset, visitors in ((0, range(0, 100)), (1, range(50, 150))):
+            sketch = HyperLogLog()
+            for i in visitors:
+                sketch.add(str(i))
+            VisitorSketch.objects.create(
+                user=self.user, day=today - timedelta(days=offset), registers=sketch.to_bytes()
+            )
+        self.assertAlmostEqual(reach.restaurant_reach(self.user, today - timedelta(days=1), today), 150, delta=8)
+        self.assertAlmostEqual(reach.restaurant_reach(self.user, today, today), 100, delta=6)
+
+    def test_visitor_key_prefers_client_id_and_is_hashed(self):
+        factory = RequestFactory()
+        one = factory.post("/", REMOTE_ADDR="10.0.0.1", HTTP_USER_AGENT="A")
+        two = factory.post("/", REMOTE_ADDR="10.0.0.2", HTTP_USER_AGENT="B")
+        self.assertEqual(reach.visitor_key(one, "abc"), reach.visitor_key(two, "abc"))
+        self.assertNotEqual(reach.visitor_key(one), reach.visitor_key(two))
+        self.assertNotIn("abc", reach.visitor_key(one, "abc"))
+
+    def test_view_events_record_unique_visitors(self):
+        url = reverse("widget_events", args=[self.user.id])
+        event = {"type": "view", "special_id": str(self.special.id)}
+        for visitor in ("a", "b", "a", "c"):
+            self.client.post(url, data=json.dumps({"visitor": visitor, "events": [event]}), content_type="text/plain")
+        self.client.post(
+            url,
+            data=json.dumps({"visitor": "d", "events": [{"type": "click", "special_id": str(self.special.id)}]}),
+            content_type="text/plain",
+        )
+        reach.flush()
+        counters.flush()
+
+        self.special.refresh_from_db()
+        self.assertEqual(self.special.views, 4)
+        self.assertEqual(reach.special_reach(self.special), 3)
+
+    def test_dashboard_shows_unique_visitors(self):
+        reach.record(self.user.id, self.special.id, "someone")
+        reach.flush()
+        self.client.login(username="owner", password="pw")
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.context["stats"]["unique_visitors"], 1)
+        self.assertContains(response, "~1 unique visitors")
@@ -0,0 +1,177 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app import distribution, scheduler
+from app.models import Connection, Job, Publication, ScheduleWatermark, Special
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        caches["widget"].clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.now = timezone.now()
+        self.publish_to = Mock(return_value="posts/1")
+        patcher = patch.dict(distribution.CHANNELS, {"pos": (self.publish_to, Mock())})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        Connection.objects.create(user=self.user, platform="pos", is_connected=True)
+
+    def make_special(self, start, end, status="active"):
+        return Special.objects.create(
+            user=self.user, title="Deal", description="Desc", price=5,
+            start_date=self.now + timedelta(seconds=start), end_date=self.now + timedelta(seconds=end), status=status,
+        )
+
+    def test_load_keeps_boundaries_within_horizon(self):
+        ending = self.make_special(-60, 30)
+        starting = self.make_special(90, 7200)
+        self.make_special(-60, 45, status="draft")
+        self.make_special(7200, 9000)
+
+        s = scheduler.Scheduler(horizon=3600)
+        self.assertEqual(s.load(self.now), 2)
+        self.assertEqual(s.next_boundary(), ending.end_date)
+        self.assertAlmostEqual(s.seconds_until_next(self.now), 5, delta=0.1)  # capped at the poll interval
+        s.poll = 60
+        self.assertAlmostEqual(s.seconds_until_next(self.now), 30, delta=0.1)
+        self.assertIn(starting.start_date, s._heap)
+
+    def test_tick_expires_special_once_its_end_passes(self):
+        special = self.make_special(-60, 30)
+        s = scheduler.Scheduler()
+        s.load(self.now)
+
+        self.assertIsNone(s.tick(self.now + timedelta(seconds=29)))
+        report = s.tick(self.now + timedelta(seconds=31))
+
+        special.refresh_from_db()
+        self.assertEqual((special.status, report.expired), ("expired", 1))
+        self.assertIsNone(s.next_boundary())
+
+    def test_tick_activates_and_publishes_started_special(self):
+        s = scheduler.Scheduler()
+        s.load(self.now)
+        special = self.make_special(10, 3600)
+        scheduler.rearm()
+
+        self.assertIsNone(s.tick(self.now + timedelta(seconds=5)))
+        self.assertEqual(s.next_boundary(), special.start_date)
+        report = s.tick(self.now + timedelta(seconds=11))
+
+        self.assertEqual(report.activated, 1)
+        self.assertEqual(Publication.objects.get().special, special)
+        self.assertEqual(scheduler.watermark(), self.now + timedelta(seconds=11))
+        self.assertIsNone(s.tick(self.now + timedelta(seconds=12)))
+        self.assertEqual(Job.objects.filter(task=distribution.TASK).count(), 1)
+
+    def test_restart_catches_up_from_watermark(self):
+        ScheduleWatermark.objects.create(name=scheduler.WATERMARK, position=self.now - timedelta(minutes=10))
+        missed = self.make_special(-300, 3600)
+        self.make_special(-3600, 3600)  # started before the watermark
+
+        report = scheduler.Scheduler().tick(self.now)
+
+        self.assertEqual(report.activated, 1)
+        self.assertEqual(Publication.objects.get().special, missed)
+
+    def test_rearm_from_another_process_reloads_the_heap(self):
+        s = scheduler.Scheduler()
+        s.load(self.now)
+        special = self.make_special(10, 3600)
+        # Another host's view re-arms; nothing is shared in memory or cache.
+        ScheduleWatermark.objects.create(name=scheduler.REARM, position=self.now)
+
+        s.tick(self.now + timedelta(seconds=1))
+        self.assertEqual(s.next_boundary(), special.start_date)
+
+    def test_saving_dates_or_status_rearms_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            special = self.make_special(10, 3600)
+        first = scheduler._position(scheduler.REARM)
+        self.assertIsNotNone(first)
+
+        with patch("app.scheduler.rearm") as rearm, self.captureOnCommitCallbacks(execute=True):
+            special.title = "Renamed"
+            special.save(update_fields=["title"])
+        rearm.assert_not_called()
+
+        with patch("app.scheduler.rearm") as rearm, self.captureOnCommitCallbacks(execute=True):
+            special.save(update_fields=["status"])
+            special.delete()
+        self.assertEqual(rearm.call_count, 2)
+
+    @patch("app.management.commands.run_scheduler.time.sleep")
+    def test_run_scheduler_survives_a_locked_database(self, sleep):
+        ended = self.make_special(-7200, -60)
+        ticks = [OperationalError("database is locked")]
+        real_tick = scheduler.Scheduler.tick
+
+        def flaky(s, *args, **kwargs):
+            if ticks:
+                raise ticks.pop()
+            return real_tick(s, *args, **kwargs)
+
+        with patch.object(scheduler.Scheduler, "tick", flaky), \
+                self.assertLogs("app.management.commands.run_scheduler", "ERROR"):
+            call_command("run_scheduler", "--once", stdout=Mock())
+        sleep.assert_called_once_with(5)
+        ended.refresh_from_db()
+        self.assertEqual(ended.status, "expired")
+
+    def test_cron_catch_up_works_without_a_running_scheduler(self):
+        ScheduleWatermark.objects.create(name=scheduler.WATERMARK, position=self.now - timedelta(hours=1))
+        ended = self.make_special(-7200, -60)
+        started = self.make_special(-600, 3600)
+
+        report = scheduler.catch_up(self.now)
+
+        ended.refresh_from_db()
+        self.assertEqual((report.expired, report.activated, ended.status), (1, 1, "expired"))
+        self.assertEqual(Publication.objects.get().special, started)
+        self.assertEqual(scheduler.watermark(), self.now)
+
+    def test_already_published_special_is_not_republished(self):
+        s = scheduler.Scheduler()
+        s.load(self.now)
+        special = self.make_special(-1, 3600)
+        distribution.publish(special)
+
+        s.tick(self.now + timedelta(seconds=1))
+        self.assertEqual(Job.objects.filter(task=distribution.TASK).count(), 1)
+
+
+class CreateSpecialSchedulingTests(TestCase):
+    def setUp(self):
+        caches["widget"].clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        Connection.objects.create(user=self.user, platform="google_business", is_connected=True, settings={})
+        self.client.force_login(self.user)
+
+    def create(self, start):
+        return self.client.post(reverse("create_special"), {
+            "title": "Deal",
+            "description": "Desc",
+            "price": "5.00",
+            "start_date": start.strftime("%Y-%m-%dT%H:%M"),
+            "end_date": (start + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M"),
+            "cta_type": "web",
+            "cta_url": "https://example.com",
+        })
+
+    def test_future_special_waits_for_scheduler(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create(timezone.localtime() + timedelta(days=2))
+        self.assertFalse(Publication.objects.exists())
+        self.assertTrue(ScheduleWatermark.objects.filter(name=scheduler.REARM).exists())
+
+    def test_started_special_is_published_now(self):
+        self.create(timezone.localtime() - timedelta(hours=1))
+        self.assertEqual(Publication.objects.get().status, "pending")
@@ -0,0 +1,167 @@
+import csv
+import io
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from app import subscribers
+from app.models import EmailSignup
+
+
+class SubscriberImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        EmailSignup.objects.create(restaurant=self.user, email="existing@example.com")
+
+    def test_imports_in_chunks_and_reports(self):
+        lines = ["Name,Email\n", "A,a@example.com\n", "B,not-an-email\n", "C,A@example.com\n",
+                 "D,existing@example.com\n", "\n", "E,b@example.com\n", "F,c@example.com\n"]
+        progress = mock.Mock()
+        report = subscribers.import_csv(self.user, lines, chunk_size=2, progress=progress)
+
+        self.assertEqual(report.rows, 6)
+        self.assertEqual(report.created, 3)
+        self.assertEqual(report.duplicates, 2)
+        self.assertEqual(report.invalid, 1)
+        self.assertEqual(report.errors, [(3, "not-an-email")])
+        self.assertEqual(progress.call_count, 3)
+        self.assertEqual(
+            set(EmailSignup.objects.filter(restaurant=self.user).values_list("email", flat=True)),
+            {"existing@example.com", "a@example.com", "b@example.com", "c@example.com"},
+        )
+
+    def test_headerless_file_uses_first_column(self):
+        report = subscribers.import_csv(self.user, ["x@example.com\n", "y@example.com,extra\n"])
+        self.assertEqual(report.created, 2)
+
+    def test_each_chunk_costs_three_queries(self):
+        lines = [f"guest{i}@example.com\n" for i in range(50)]
+        with self.assertNumQueries(3):
+            subscribers.import_csv(self.user, lines, chunk_size=100)
+
+    def test_existing_subscribers_match_in_any_case(self):
+        EmailSignup.objects.create(restaurant=self.user, email="Legacy@Example.com")
+        report = subscribers.import_csv(self.user, ["LEGACY@example.com\n", "EXISTING@EXAMPLE.COM\n", "New@Example.com\n"])
+
+        self.assertEqual((report.created, report.duplicates), (1, 2))
+        self.assertTrue(EmailSignup.objects.filter(restaurant=self.user, email="new@example.com").exists())
+        self.assertEqual(EmailSignup.objects.filter(restaurant=self.user).count(), 3)
+
+    def test_rows_skipped_by_a_concurrent_insert_are_not_counted(self):
+        original = EmailSignup.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            EmailSignup.objects.create(restaurant=self.user, email="raced@example.com")
+            return original(objs, **kwargs)
+
+        with mock.patch.object(EmailSignup.objects, "bulk_create", side_effect=racing_bulk_create):
+            report = subscribers.import_csv(self.user, ["raced@example.com\n", "fresh@example.com\n"])
+
+        self.assertEqual((report.created, report.duplicates), (1, 1))
+
+    def test_upload_view(self):
+        self.client.login(username="owner", password="pw")
+        upload = SimpleUploadedFile("subs.csv", "﻿email\nnew@example.com\nexisting@example.com\n".encode())
+        response = self.client.post(reverse("subscribers_import"), {"file": upload}, follow=True)
+        self.assertRedirects(response, reverse("email_analytics"))
+        self.assertEqual(
+            [str(m) for m in response.context["messages"]],
+            ["Imported 1 new subscribers (1 already subscribed, 0 invalid)."],
+        )
+        self.assertTrue(EmailSignup.objects.filter(restaurant=self.user, email="new@example.com").exists())
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as handle:
+            handle.write("email\ncmd@example.com\n")
+        out = io.StringIO()
+        call_command("import_subscribers", "owner", handle.name, stdout=out)
+        self.assertIn("Imported 1 subscribers", out.getvalue())
+
+
+class SubscriberExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        other = User.objects.create_user(username="other", password="pw")
+        for i in range(5):
+            EmailSignup.objects.create(restaurant=self.user, email=f"s{i}@example.com")
+        EmailSignup.objects.create(restaurant=other, email="hidden@example.com")
+
+    def test_streams_csv(self):
+        self.client.login(username="owner", password="pw")
+        response = self.client.get(reverse("subscribers_export"))
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], list(subscribers.EXPORT_HEADER))
+        self.assertEqual([row[0] for row in rows[1:]], [f"s{i}@example.com" for i in range(5)])
+
+    def test_export_pages_in_signup_order(self):
+        with self.settings(SUBSCRIBER_EXPORT_CHUNK_SIZE=2), self.assertNumQueries(3):
+            lines = list(subscribers.export_rows(self.user))
+        self.assertEqual(len(lines), 6)
+
+    def test_export_neutralizes_formulas(self):
+        EmailSignup.objects.create(restaurant=self.user, email="=cmd@example.com")
+        EmailSignup.objects.create(restaurant=self.user, email="-1+1@example.com")
+        rows = list(csv.reader(io.StringIO("".join(subscribers.export_rows(self.user)))))
+        self.assertEqual([row[0] for row in rows[-2:]], ["'=cmd@example.com", "'-1+1@example.com"])
+        self.assertEqual(rows[1][0], "s0@example.com")
+
+    def test_export_requires_login(self):
+        response = self.client.get(reverse("subscribers_export"))
+        self.assertEqual(response.status_code, 302)
+
+
+class KeysetIterationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.signups = [EmailSignup.objects.create(restaurant=self.user, email=f"k{i}@example.com") for i in range(7)]
+        EmailSignup.objects.filter(pk=self.signups[3].pk).update(is_active=False)
+
+    def test_pages_cover_active_subscribers_once(self):
+        pages = list(subscribers.active_pages(self.user, chunk_size=3))
+        self.assertEqual([len(page) for page in pages], [3, 3])
+        rows = [row for page in pages for row in page]
+        self.assertEqual(rows, sorted(rows))
+        self.assertEqual([email for _, _, email in rows], [s.email for s in self.signups if s.email != "k3@example.com"])
+
+    def test_resumes_after_a_cursor(self):
+        first = next(subscribers.active_pages(self.user, chunk_size=2))
+        rest = list(subscribers.iter_active(self.user, chunk_size=2))
+        after = [row for page in subscribers.active_pages(self.user, chunk_size=2, after=first[-1][:2]) for row in page]
+        self.assertEqual(first + after, rest)
+
+    def test_signups_added_while_paging_are_reached(self):
+        first = next(subscribers.active_pages(self.user, chunk_size=3))
+        # A UUID below every existing one: paging by id would skip it.
+        late = EmailSignup.objects.create(
+            pk=uuid.UUID(int=1), restaurant=self.user, email="late@example.com"
+        )
+        rest = [row for page in subscribers.active_pages(self.user, chunk_size=3, after=first[-1][:2]) for row in page]
+        self.assertEqual(rest[-1][1:], (late.pk, "late@example.com"))
+
+    def test_each_page_is_one_query(self):
+        with self.assertNumQueries(3):
+            self.assertEqual(len(list(subscribers.iter_active(self.user, chunk_size=3))), 6)
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite-specific")
+    def test_pages_use_the_signup_order_index(self):
+        signup = self.signups[0]
+        for pages in (subscribers.active_pages(self.user, 3, after=(signup.signed_up_at, signup.pk)),
+                      subscribers.export_rows(self.user)):
+            with CaptureQueriesContext(connection) as ctx:
+                list(pages)
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + ctx.captured_queries[0]["sql"])
+                plan = " ".join(row[-1] for row in cursor.fetchall())
+            self.assertIn("INDEX emailsignup_signup_keyset ", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
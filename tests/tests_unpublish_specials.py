@@ -5,8 +5,8 @@ from django.contrib.auth.models import User
 from django.test import TestCase
 from django.utils import timezone
 
-from app.models import Special, Connection
-from app import cron, distribution
+from app.models import Special, Connection, Job, Publication
+from app import cron, distribution, jobs
 
 
 class UnpublishSpecialsTests(TestCase):
@@ -26,19 +26,56 @@ class UnpublishSpecialsTests(TestCase):
         defaults.update(kwargs)
         return Special.objects.create(**defaults)
 
-    @patch("app.distribution.remove_special_from_distributions")
+    @patch("app.distribution.remove_specials_from_distributions")
     def test_unpublish_expired_specials(self, mock_remove):
         expired = self._create_special()
         active = self._create_special(end_date=timezone.now() + timedelta(days=1))
 
-        cron.unpublish_expired_specials()
+        report = cron.unpublish_expired_specials()
 
         expired.refresh_from_db()
         active.refresh_from_db()
 
         self.assertEqual(expired.status, "expired")
         self.assertEqual(active.status, "active")
-        mock_remove.assert_called_once_with(expired)
+        mock_remove.assert_called_once_with([expired])
+        self.assertEqual(report.expired, 1)
+
+    def test_bulk_expiry_queries_do_not_grow_with_specials(self):
+        other = User.objects.create_user(username="other", password="pw")
+        for user in (self.user, other):
+            Connection.objects.create(
+                user=user, platform="google_business", is_connected=True, settings={"access_token": "tok"}
+            )
+        for i in range(6):
+            self._create_special(user=self.user if i % 2 else other, google_post_name=f"posts/{i}")
+        self._create_special()  # never reached Google: nothing to remove
+
+        # Per chunk: select, update, connections, publications, two inserts (plus savepoints).
+        with self.assertNumQueries(23):
+            report = cron.unpublish_expired_specials(chunk_size=4)
+
+        self.assertEqual((report.expired, report.chunks, report.removals_queued), (7, 2, 6))
+        self.assertFalse(Special.objects.filter(status="active").exists())
+        self.assertEqual(Publication.objects.filter(status="removing").count(), 6)
+        self.assertEqual(Job.objects.filter(task=distribution.TASK).count(), 6)
+
+    @patch("app.integrations.google.remove_special", return_value=True)
+    def test_expired_posts_are_removed_by_workers(self, mock_google):
+        Connection.objects.create(
+            user=self.user, platform="google_business", is_connected=True, settings={"access_token": "tok"}
+        )
+        for i in range(3):
+            self._create_special(google_post_name=f"posts/{i}")
+
+        cron.unpublish_expired_specials()
+        mock_google.assert_not_called()
+
+        jobs.drain()
+        self.assertEqual(
+            sorted(call.kwargs["post_name"] for call in mock_google.call_args_list), ["posts/0", "posts/1", "posts/2"]
+        )
+        self.assertEqual(Publication.objects.filter(status="removed").count(), 3)
 
     @patch("app.integrations.google.remove_special")
     def test_remove_special_from_distributions_invokes_google(self, mock_google):
@@ -51,4 +88,8 @@ class UnpublishSpecialsTests(TestCase):
         )
 
         distribution.remove_special_from_distributions(special)
+        mock_google.assert_not_called()
+
+        jobs.drain()
         mock_google.assert_called_once()
+        self.assertEqual(Publication.objects.get(special=special).status, "removed")
@@ -0,0 +1,84 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from app import bundles
+
+
+class WidgetBundleTests(TestCase):
+    def setUp(self):
+        caches["widget"].clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.static_dir = Path(tmp.name)
+        self.bundle_dir = self.static_dir / "dist"
+        settings_override = override_settings(
+            BUNDLE_DIR=self.bundle_dir,
+            STATICFILES_DIRS=[self.static_dir, Path(__file__).resolve().parent.parent / "static"],
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(bundles.load_manifest.cache_clear)
+        bundles.load_manifest.cache_clear()
+
+    def test_build_writes_hashed_copies_and_manifest(self):
+        call_command("build_bundles", stdout=open("/dev/null", "w"))
+        manifest = json.loads((self.bundle_dir / "manifest.json").read_text())
+        target = manifest["widget/appertivo-widget.js"]
+        self.assertRegex(target, r"^dist/widget/appertivo-widget\.[0-9a-f]{12}\.js$")
+        self.assertTrue((self.static_dir / target).exists())
+        self.assertEqual(bundles.bundle_url("widget/appertivo-widget.js"), f"/static/{target}")
+
+    def test_build_removes_stale_hashed_copies(self):
+        first = self.static_dir / bundles.build()["widget/appertivo-widget.js"]
+        unrelated = self.bundle_dir / "widget" / "notes.txt"
+        unrelated.write_text("keep")
+        source = self.static_dir / "widget" / "appertivo-widget.js"
+        source.parent.mkdir()
+        source.write_text("/* changed */")
+
+        second = self.static_dir / bundles.build()["widget/appertivo-widget.js"]
+
+        self.assertNotEqual(first, second)
+        self.assertFalse(first.exists())
+        self.assertTrue(second.exists())
+        self.assertTrue(unrelated.exists())
+
+    def test_hash_changes_with_content(self):
+        self.assertNotEqual(
+            bundles.hashed_name("widget/appertivo-widget.js", b"one"),
+            bundles.hashed_name("widget/appertivo-widget.js", b"two"),
+        )
+
+    def test_bundle_url_falls_back_to_source(self):
+        self.assertEqual(bundles.bundle_url("widget/appertivo-widget.js"), "/static/widget/appertivo-widget.js")
+
+    def test_widget_js_is_a_small_bootstrap(self):
+        bundles.build()
+        response = self.client.get(reverse("widget_js", args=[self.user.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/javascript")
+        body = response.content.decode()
+        self.assertLess(len(body), 512)
+        self.assertIn(bundles.load_manifest()["widget/appertivo-widget.js"], body)
+        self.assertIn(f's.dataset.restaurant="{self.user.id}"', body)
+
+    def test_widget_js_unknown_restaurant(self):
+        response = self.client.get(reverse("widget_js", args=[9999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_demo_widget_js_uses_demo_mode(self):
+        body = self.client.get(reverse("demo_widget_js")).content.decode()
+        self.assertIn('s.dataset.demo="true"', body)
+        self.assertIn('s.dataset.container="appertivo-demo-widget"', body)
+
+    def test_widget_special_reports_restaurant_name_without_special(self):
+        response = self.client.get(reverse("widget_special", args=[self.user.id]))
+        self.assertEqual(response.json(), {"special": None, "restaurant_name": "owner"})
@@ -0,0 +1,121 @@
+import json
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app import ai, counters, cron, widget_cache
+from app.models import Special
+
+
+class WidgetSnapshotTests(TestCase):
+    def setUp(self):
+        caches["widget"].clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+
+    def tearDown(self):
+        counters.flush()
+
+    def _create_special(self, **kwargs):
+        now = timezone.now()
+        defaults = dict(
+            user=self.user,
+            title="Deal",
+            description="Desc",
+            price=10,
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+            status="active",
+        )
+        defaults.update(kwargs)
+        return Special.objects.create(**defaults)
+
+    def test_repeat_reads_do_not_query_database(self):
+        special = self._create_special()
+        url = reverse("widget_special", args=[self.user.id])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.json()["special"]["id"], str(special.id))
+
+    def test_snapshot_expires_at_next_boundary(self):
+        now = timezone.now()
+        current = self._create_special(end_date=now + timedelta(hours=5))
+        upcoming = self._create_special(start_date=now + timedelta(hours=2), title="Later")
+        snapshot = widget_cache.build_snapshot(self.user.id)
+        self.assertEqual(snapshot["special"]["id"], str(current.id))
+        self.assertEqual(snapshot["expires_at"], upcoming.start_date)
+
+    def test_unknown_restaurant_returns_404(self):
+        response = self.client.get(reverse("widget_special", args=[9999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_owner_actions_invalidate_snapshot(self):
+        self.client.login(username="owner", password="pw")
+        special = self._create_special()
+        url = reverse("widget_special", args=[self.user.id])
+        self.assertIsNotNone(self.client.get(url).json()["special"])
+
+        self.client.post(reverse("special_unpublish", args=[special.id]))
+        self.assertIsNone(self.client.get(url).json()["special"])
+
+        self.client.post(reverse("special_publish", args=[special.id]))
+        self.assertIsNotNone(self.client.get(url).json()["special"])
+
+        self.client.post(reverse("special_delete", args=[special.id]))
+        self.assertIsNone(self.client.get(url).json()["special"])
+
+    def test_saves_outside_the_views_invalidate_snapshot(self):
+        special = self._create_special()
+        url = reverse("widget_special", args=[self.user.id])
+        self.client.get(url)
+
+        special.title = "Edited in admin"
+        special.save()
+        self.assertEqual(self.client.get(url).json()["special"]["title"], "Edited in admin")
+
+        self.user.username = "renamed"
+        self.user.save()
+        self.assertEqual(self.client.get(url).json()["restaurant_name"], "renamed")
+
+    def test_snapshot_is_dropped_again_after_commit(self):
+        special = self._create_special()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            special.save(update_fields=["title"])  # leaves the scheduler alone
+            # A widget read inside the writer's transaction re-caches the row.
+            widget_cache.get_snapshot(self.user.id)
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(caches["widget"].get(widget_cache._key(self.user.id)))
+
+    @override_settings(OPENAI_API_KEY="sk-test")
+    @patch("app.ai_gateway.respond")
+    def test_ai_enhancement_invalidates_snapshot(self, respond):
+        special = self._create_special()
+        url = reverse("widget_special", args=[self.user.id])
+        self.client.get(url)
+        item = {
+            "id": str(special.pk),
+            "title": "Crispy deal",
+            "description": special.description,
+            "price": str(special.price),
+            "start_date": special.start_date.isoformat(),
+            "end_date": special.end_date.isoformat(),
+        }
+        respond.return_value = Mock(output=[Mock(content=[Mock(text=json.dumps({"specials": [item]}))])])
+
+        ai.enhance_specials([special])
+        self.assertEqual(self.client.get(url).json()["special"]["title"], "Crispy deal")
+
+    @patch("app.distribution.remove_specials_from_distributions")
+    def test_cron_expiry_invalidates_snapshot(self, mock_remove):
+        special = self._create_special()
+        url = reverse("widget_special", args=[self.user.id])
+        self.assertIsNotNone(self.client.get(url).json()["special"])
+
+        Special.objects.filter(pk=special.pk).update(end_date=timezone.now() - timedelta(minutes=1))
+        cron.unpublish_expired_specials()
+        self.assertIsNone(self.client.get(url).json()["special"])
@@ -0,0 +1,112 @@
+import json
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app import counters, reach
+from app.models import Special
+
+
+class WidgetEventIngestionTests(TestCase):
+    def setUp(self):
+        caches["widget"].clear()
+        counters.flush()
+        reach.flush()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.other = User.objects.create_user(username="other", password="pw")
+        self.current = self._create_special()
+        self.old = self._create_special(status="expired", title="Old")
+        self.foreign = self._create_special(user=self.other)
+        self.url = reverse("widget_events", args=[self.user.id])
+
+    def tearDown(self):
+        counters.flush()
+        reach.flush()
+
+    def _create_special(self, **kwargs):
+        now = timezone.now()
+        defaults = dict(
+            user=self.user,
+            title="Deal",
+            description="Desc",
+            price=10,
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+            status="active",
+        )
+        defaults.update(kwargs)
+        return Special.objects.create(**defaults)
+
+    def _post(self, events):
+        return self.client.post(self.url, data=json.dumps({"events": events}), content_type="text/plain")
+
+    def test_batch_is_coalesced_into_counters(self):
+        special_id = str(self.current.id)
+        events = (
+            [{"type": "view", "special_id": special_id}] * 3
+            + [{"type": "click", "special_id": special_id}] * 2
+            + [{"type": "share", "special_id": special_id}, {"type": "signup_open", "special_id": special_id}]
+        )
+        self.client.get(reverse("widget_special", args=[self.user.id]))
+        with self.assertNumQueries(0):
+            response = self._post(events)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {"accepted": 7})
+
+        counters.flush()
+        self.current.refresh_from_db()
+        self.assertEqual(
+            (self.current.views, self.current.clicks, self.current.shares, self.current.signup_opens),
+            (3, 2, 1, 1),
+        )
+
+    def test_ids_in_other_spellings_count_for_the_same_special(self):
+        self.client.get(reverse("widget_special", args=[self.user.id]))
+        events = [
+            {"type": "view", "special_id": str(self.current.id).upper()},
+            {"type": "view", "special_id": "{%s}" % self.current.id},
+            {"type": "view", "special_id": self.current.id.hex},
+        ]
+        with self.assertNumQueries(0):  # all match the cached current special
+            response = self._post(events)
+        self.assertEqual(response.json(), {"accepted": 3})
+
+        counters.flush()
+        self.current.refresh_from_db()
+        self.assertEqual(self.current.views, 3)
+
+    def test_invalid_and_foreign_events_are_dropped(self):
+        response = self._post(
+            [
+                {"type": "view", "special_id": str(self.old.id)},
+                {"type": "view", "special_id": str(self.foreign.id)},
+                {"type": "view", "special_id": str(uuid.uuid4())},
+                {"type": "view", "special_id": "not-a-uuid"},
+                {"type": "purchase", "special_id": str(self.current.id)},
+                "garbage",
+            ]
+        )
+        self.assertEqual(response.json(), {"accepted": 1})
+        counters.flush()
+        self.old.refresh_from_db()
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.old.views, 1)
+        self.assertEqual(self.foreign.views, 0)
+
+    def test_rejects_malformed_payloads(self):
+        self.assertEqual(self.client.post(self.url, data="{", content_type="text/plain").status_code, 400)
+        self.assertEqual(self._post({"type": "view"}).status_code, 400)
+        self.assertEqual(self._post([{"type": "view"}] * 101).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+    def test_dashboard_reports_clicks(self):
+        self._post([{"type": "click", "special_id": str(self.current.id)}] * 4)
+        counters.flush()
+        self.client.login(username="owner", password="pw")
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.context["stats"]["clicks"], 4)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app import counters
+from app.models import Special
+
+
+class WidgetConditionalCachingTests(TestCase):
+    def setUp(self):
+        caches["widget"].clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        now = timezone.now()
+        self.special = Special.objects.create(
+            user=self.user,
+            title="Deal",
+            description="Desc",
+            price=10,
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+            status="active",
+        )
+        self.url = reverse("widget_special", args=[self.user.id])
+
+    def tearDown(self):
+        counters.flush()
+
+    def test_special_response_has_validators_and_cache_control(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=60", response["Cache-Control"])
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_changes_when_special_is_edited(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.login(username="owner", password="pw")
+        self.client.post(
+            reverse("special_edit", args=[self.special.id]),
+            {
+                "title": "New",
+                "description": "Desc",
+                "price": "10.00",
+                "start_date": self.special.start_date.strftime("%Y-%m-%d %H:%M:%S"),
+                "end_date": self.special.end_date.strftime("%Y-%m-%d %H:%M:%S"),
+                "cta_type": "web",
+            },
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["special"]["title"], "New")
+
+    def test_max_age_does_not_outlive_special(self):
+        Special.objects.filter(pk=self.special.pk).update(end_date=timezone.now() + timedelta(seconds=20))
+        caches["widget"].clear()
+        response = self.client.get(self.url)
+        max_age = int(response["Cache-Control"].split("max-age=")[1].split(",")[0])
+        self.assertLessEqual(max_age, 20)
+
+    def test_serving_special_does_not_count_view(self):
+        before = counters.pending()
+        self.client.get(self.url)
+        self.assertEqual(counters.pending(), before)
+
+    def test_widget_js_revalidates_with_etag(self):
+        url = reverse("widget_js", args=[self.user.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age=3600", response["Cache-Control"])
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_demo_widget_js_revalidates_with_etag(self):
+        url = reverse("demo_widget_js")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
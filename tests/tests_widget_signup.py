@@ -0,0 +1,128 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import skipIf
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app import counters, reach
+from app.models import DailySpecialStats, EmailSignup, Special
+
+
+def _special(user, **kwargs):
+    now = timezone.now()
+    defaults = dict(
+        user=user,
+        title="Deal",
+        description="Desc",
+        price=10,
+        start_date=now - timedelta(days=1),
+        end_date=now + timedelta(days=1),
+        status="active",
+    )
+    defaults.update(kwargs)
+    return Special.objects.create(**defaults)
+
+
+def _signup(client, user_id, email, special_id=None):
+    return client.post(
+        reverse("widget_signup", args=[user_id]),
+        data=json.dumps({"email": email, "special_id": special_id}),
+        content_type="application/json",
+    )
+
+
+class WidgetSignupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["widget"].clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.special = _special(self.user)
+
+    def tearDown(self):
+        counters.flush()
+        reach.flush()
+
+    def test_new_signup_bumps_special_and_rollups(self):
+        response = _signup(self.client, self.user.id, "a@example.com", str(self.special.id))
+        self.assertEqual(response.json(), {"success": True, "created": True})
+        self.special.refresh_from_db()
+        self.assertEqual(self.special.email_signups, 1)
+        self.assertEqual(DailySpecialStats.objects.get(special=self.special).email_signups, 1)
+        self.assertEqual(EmailSignup.objects.get().special, self.special)
+
+    def test_duplicate_signup_is_ignored(self):
+        _signup(self.client, self.user.id, "a@example.com", str(self.special.id))
+        response = _signup(self.client, self.user.id, "a@example.com", str(self.special.id))
+        self.assertEqual(response.json(), {"success": True, "created": False})
+        self.special.refresh_from_db()
+        self.assertEqual(self.special.email_signups, 1)
+        self.assertEqual(EmailSignup.objects.count(), 1)
+
+    def test_duplicate_detection_ignores_case(self):
+        EmailSignup.objects.create(restaurant=self.user, email="Legacy@Example.com")
+        self.assertTrue(_signup(self.client, self.user.id, " A@Example.com ").json()["created"])
+        self.assertFalse(_signup(self.client, self.user.id, "a@example.com").json()["created"])
+        self.assertFalse(_signup(self.client, self.user.id, "legacy@example.com").json()["created"])
+        self.assertEqual(
+            sorted(EmailSignup.objects.values_list("email", flat=True)), ["Legacy@Example.com", "a@example.com"]
+        )
+
+    def test_foreign_special_is_not_credited(self):
+        other = User.objects.create_user(username="other", password="pw")
+        foreign = _special(other)
+        response = _signup(self.client, self.user.id, "a@example.com", str(foreign.id))
+        self.assertTrue(response.json()["created"])
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.email_signups, 0)
+        self.assertIsNone(EmailSignup.objects.get().special)
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(_signup(self.client, self.user.id, "").status_code, 400)
+        self.assertEqual(_signup(self.client, self.user.id, "not-an-email").status_code, 400)
+        self.assertEqual(_signup(self.client, 999999, "a@example.com").status_code, 404)
+        self.assertEqual(self.client.get(reverse("widget_signup", args=[self.user.id])).status_code, 405)
+
+
+@skipIf(connection.vendor == "sqlite" and not os.getenv("TEST_DATABASE_NAME"),
+        "needs a file database (set TEST_DATABASE_NAME); in-memory SQLite fails concurrent writers outright")
+class WidgetSignupLoadTests(TransactionTestCase):
+    """Concurrent signups must produce exact counts."""
+
+    SIGNUPS = 300
+    DUPLICATES = 100
+    WORKERS = 8
+
+    def setUp(self):
+        cache.clear()
+        caches["widget"].clear()
+        self.user = User.objects.create_user(username="owner", password="pw")
+        self.special = _special(self.user)
+
+    def tearDown(self):
+        counters.flush()
+        reach.flush()
+
+    def _post(self, email):
+        try:
+            return _signup(Client(), self.user.id, email, str(self.special.id)).status_code
+        finally:
+            connection.close()
+
+    def test_burst_of_signups_counts_exactly(self):
+        emails = [f"guest{i}@example.com" for i in range(self.SIGNUPS)]
+        emails += emails[: self.DUPLICATES]
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            statuses = list(pool.map(self._post, emails))
+
+        self.assertEqual(statuses, [200] * len(emails))
+        self.special.refresh_from_db()
+        self.assertEqual(EmailSignup.objects.filter(restaurant=self.user).count(), self.SIGNUPS)
+        self.assertEqual(self.special.email_signups, self.SIGNUPS)
+        self.assertEqual(DailySpecialStats.objects.get(special=self.special).email_signups, self.SIGNUPS)